@@ -3,10 +3,63 @@
 
 Здесь описаны настройки отображения модели Quote в Django Admin:
 списки, фильтры, поля только для чтения, группировка полей и служебные заголовки.
+Список рассчитан на миллионы цитат: число записей оценивается без полного
+``COUNT(*)`` (``pagination.EstimatedCountPaginator``), сортировка совпадает
+с индексом, варианты фильтра по весу кэшируются, а массовые действия
+выполняются одним ``UPDATE`` (``bulk.bulk_set``).
 """
 
-from django.contrib import admin
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.cache import cache
+from .bulk import bulk_set
 from .models import Quote
+from .pagination import EstimatedCountPaginator
+from .search import filter_queryset
+
+WEIGHT_CHOICES_CACHE_KEY = "random_quote:admin:weights"
+
+
+def filter_cache_ttl():
+    """Время жизни (в секундах) кэша вариантов фильтров списка цитат."""
+    return getattr(settings, "RANDOM_QUOTE_ADMIN_FILTER_CACHE_TTL", 300)
+
+
+class WeightListFilter(admin.SimpleListFilter):
+    """
+    Фильтр по весу с кэшируемым списком вариантов.
+
+    Стандартный фильтр по полю выполняет ``SELECT DISTINCT weight`` на каждое
+    открытие списка; здесь варианты читаются по индексу ``weight`` не чаще
+    раза в ``RANDOM_QUOTE_ADMIN_FILTER_CACHE_TTL`` секунд.
+    """
+    title = 'вес'
+    parameter_name = 'weight'
+
+    def lookups(self, request, model_admin):
+        weights = cache.get(WEIGHT_CHOICES_CACHE_KEY)
+        if weights is None:
+            weights = list(Quote.objects.order_by('weight').values_list('weight', flat=True).distinct())
+            cache.set(WEIGHT_CHOICES_CACHE_KEY, weights, filter_cache_ttl())
+        return [(str(weight), str(weight)) for weight in weights]
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        try:
+            return queryset.filter(weight=int(self.value()))
+        except ValueError:
+            return queryset.none()
+
+
+class QuoteActionForm(ActionForm):
+    """Форма действий списка цитат: параметры массовых изменений."""
+    weight = forms.IntegerField(label='Вес', required=False, min_value=0, max_value=100)
+    source_type = forms.ChoiceField(label='Тип источника', required=False,
+                                    choices=(('', '---------'),) + Quote.SOURCE_CHOICES)
+
 
 @admin.register(Quote)
 class QuoteAdmin(admin.ModelAdmin):
@@ -14,23 +67,32 @@ class QuoteAdmin(admin.ModelAdmin):
     Конфигурация модели Quote в админке.
 
     Определяет:
-      - какие колонки показывать в списке записей;
-      - фильтры/поиск/сортировку по умолчанию;
+      - какие колонки показывать в списке записей и по каким из них можно
+        сортировать (только по проиндексированным);
+      - фильтры/поиск/сортировку по умолчанию (совпадает с индексом
+        ``random_quote_top_idx``, ``quote_id`` делает порядок однозначным);
+      - оценку числа записей вместо точного подсчёта;
+      - массовые действия (вес, сброс счётчиков, тип источника);
       - какие поля доступны только для чтения;
       - группировку полей в форме редактирования (fieldsets).
     """
     list_display = ('get_short_text', 'source', 'source_type', 'weight', 'likes', 'dislikes', 'watches', 'created_at')
-    list_filter = ('source_type', 'created_at', 'weight')
+    list_filter = ('source_type', 'created_at', WeightListFilter)
     search_fields = ('quote_text', 'source')
-    ordering = ('-likes', '-weight', '-watches')
-    readonly_fields = ('watches', 'created_at', 'updated_at')
+    ordering = ('-likes', '-weight', '-watches', 'quote_id')
+    sortable_by = ('weight', 'likes', 'created_at')
+    readonly_fields = ('watches', 'popularity_score', 'like_percentage', 'created_at', 'updated_at')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = QuoteActionForm
+    actions = ('set_weight', 'reset_counters', 'set_source_type')
 
     fieldsets = (
         ('Основная информация', {
             'fields': ('quote_text', 'source', 'source_type', 'weight')
         }),
         ('Статистика', {
-            'fields': ('watches', 'likes', 'dislikes'),
+            'fields': ('watches', 'likes', 'dislikes', 'popularity_score', 'like_percentage'),
             'classes': ('collapse',)
         }),
         ('Системная информация', {
@@ -44,10 +106,39 @@ class QuoteAdmin(admin.ModelAdmin):
         return obj.get_short_text(50)
     get_short_text.short_description = 'Текст цитаты'
 
+    """Поиск по полнотекстовому индексу (FTS5 / tsvector) вместо ``icontains`` по ``search_fields``."""
+    def get_search_results(self, request, queryset, search_term):
+        return filter_queryset(queryset, search_term), False
+
     """Базовый QuerySet для списка записей в админке."""
     def get_queryset(self, request):
         return super().get_queryset(request).select_related()
 
+    def _bulk_set(self, request, queryset, **values):
+        updated = bulk_set(queryset, **values)
+        cache.delete(WEIGHT_CHOICES_CACHE_KEY)
+        self.message_user(request, f"Изменено цитат: {updated}.", messages.SUCCESS)
+
+    @admin.action(description='Установить вес (одним UPDATE)')
+    def set_weight(self, request, queryset):
+        weight = request.POST.get('weight', '')
+        if not weight.isdigit() or not 0 <= int(weight) <= 100:
+            self.message_user(request, "Укажите вес от 0 до 100.", messages.ERROR)
+            return
+        self._bulk_set(request, queryset, weight=int(weight))
+
+    @admin.action(description='Сбросить просмотры, лайки и дизлайки (одним UPDATE)')
+    def reset_counters(self, request, queryset):
+        self._bulk_set(request, queryset, watches=0, likes=0, dislikes=0)
+
+    @admin.action(description='Изменить тип источника (одним UPDATE)')
+    def set_source_type(self, request, queryset):
+        source_type = request.POST.get('source_type', '')
+        if source_type not in dict(Quote.SOURCE_CHOICES):
+            self.message_user(request, "Выберите тип источника.", messages.ERROR)
+            return
+        self._bulk_set(request, queryset, source_type=source_type)
+
 admin.site.site_header = "Администрирование цитат"
 admin.site.site_title = "Цитаты Admin"
-admin.site.index_title = "Добро пожаловать в панель управления цитатами 🤩"
\ No newline at end of file
+admin.site.index_title = "Добро пожаловать в панель управления цитатами 🤩"
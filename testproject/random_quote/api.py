@@ -0,0 +1,168 @@
+"""JSON API для мобильных клиентов и виджетов.
+
+Содержит облегчённые аналоги HTML-страниц:
+- ``random_quotes_api`` — одна или несколько (``?n=``) случайных цитат по весу;
+- ``top_quotes_api`` — топ по лайкам;
+- ``ranked_quotes_api`` — рейтинги по популярности и доле лайков;
+- ``dashboard_api`` — сводная статистика.
+
+Данные читаются только нужными колонками через ``values()`` (или из
+процессного топа/кэша дашборда), без создания экземпляров модели и
+рендеринга шаблонов. Ответы снабжаются заголовками кэширования.
+"""
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+
+from .counters import watches_buffer
+from .dashboard import cache_ttl as dashboard_cache_ttl, get_dashboard_data
+from .db import replica_reads
+from .leaderboard import leaderboard
+from .models import Quote
+from .sampling import get_sampler
+
+QUOTE_FIELDS = ("quote_id", "quote_text", "source", "source_type", "watches", "likes", "dislikes")
+
+
+def api_max_age():
+    """``max-age`` (в секундах) для ответов топа."""
+    return getattr(settings, "RANDOM_QUOTE_API_MAX_AGE", 30)
+
+
+def api_max_n():
+    """Максимальное число цитат в одном ответе ``random_quotes_api``."""
+    return getattr(settings, "RANDOM_QUOTE_API_MAX_N", 50)
+
+
+@replica_reads
+@require_GET
+def random_quotes_api(request):
+    """
+    Случайные цитаты по весу.
+
+    Параметр ``n`` (по умолчанию 1, не больше ``RANDOM_QUOTE_API_MAX_N``) —
+    сколько разных цитат вернуть (выборка без возвращения). Как и HTML-страница,
+    учитывает просмотр каждой возвращённой цитаты.
+
+    Ответ: ``{"quotes": [{quote_id, quote_text, source, source_type,
+    source_type_label, watches, likes, dislikes}, ...]}``; не кэшируется.
+    """
+    try:
+        n = int(request.GET.get("n", 1))
+    except ValueError:
+        return JsonResponse({"error": "Параметр n должен быть целым числом."}, status=400)
+    if not 1 <= n <= api_max_n():
+        return JsonResponse({"error": f"Параметр n должен быть от 1 до {api_max_n()}."}, status=400)
+
+    sampler = get_sampler()
+    ids = sampler.sample(n)
+    rows = {row["quote_id"]: row for row in Quote.objects.filter(pk__in=ids).values(*QUOTE_FIELDS)}
+    if len(rows) < len(ids):
+        # Часть цитат удалена другим процессом — индекс устарел.
+        sampler.invalidate()
+
+    labels = dict(Quote.SOURCE_CHOICES)
+    quotes = []
+    for quote_id in ids:
+        row = rows.get(quote_id)
+        if row is None:
+            continue
+        # Как в ``views.random_quote_view``: незаписанные просмотры читаются до
+        # ``increment``, который может сбросить их в БД после чтения строки.
+        unflushed = watches_buffer.pending(quote_id)
+        watches_buffer.increment(quote_id)
+        row["watches"] += unflushed + 1
+        row["source_type_label"] = labels.get(row["source_type"], "")
+        quotes.append(row)
+
+    response = JsonResponse({"quotes": quotes})
+    patch_cache_control(response, no_store=True)
+    return response
+
+
+@replica_reads
+@require_GET
+def top_quotes_api(request):
+    """
+    Топ цитат по лайкам (лайки ↓, вес ↓, просмотры ↓) из процессного топа.
+
+    Ответ: ``{"quotes": [{quote_id, quote_text, source, likes, weight, watches}, ...]}``.
+    """
+    quotes = [
+        {
+            "quote_id": entry.pk,
+            "quote_text": entry.quote_text,
+            "source": entry.source,
+            "likes": entry.likes,
+            "weight": entry.weight,
+            "watches": entry.watches,
+        }
+        for entry in leaderboard.top()
+    ]
+    response = JsonResponse({"quotes": quotes})
+    patch_cache_control(response, public=True, max_age=api_max_age())
+    return response
+
+
+@replica_reads
+@require_GET
+def ranked_quotes_api(request):
+    """
+    Рейтинг цитат по хранимому показателю.
+
+    Параметры: ``by`` — ``popularity`` (``popularity_score`` ↓, по умолчанию)
+    или ``like_ratio`` (``like_percentage`` ↓, затем лайки ↓); ``n`` — размер
+    (по умолчанию 10, не больше ``RANDOM_QUOTE_API_MAX_N``). Выборка —
+    ``ORDER BY ... LIMIT`` по индексу рейтинга, без сортировки в Python.
+
+    Ответ: ``{"by": ..., "quotes": [{quote_id, quote_text, source, source_type,
+    watches, likes, dislikes, popularity_score, like_percentage}, ...]}``.
+    """
+    by = request.GET.get("by", "popularity")
+    if by not in Quote.RANKINGS:
+        return JsonResponse({"error": f"Параметр by должен быть одним из: {', '.join(Quote.RANKINGS)}."},
+                            status=400)
+    try:
+        n = int(request.GET.get("n", 10))
+    except ValueError:
+        return JsonResponse({"error": "Параметр n должен быть целым числом."}, status=400)
+    if not 1 <= n <= api_max_n():
+        return JsonResponse({"error": f"Параметр n должен быть от 1 до {api_max_n()}."}, status=400)
+
+    quotes = list(Quote.ranked(by).values(*QUOTE_FIELDS, "popularity_score", "like_percentage")[:n])
+    response = JsonResponse({"by": by, "quotes": quotes})
+    patch_cache_control(response, public=True, max_age=api_max_age())
+    return response
+
+
+@replica_reads
+@require_GET
+def dashboard_api(request):
+    """
+    Сводная статистика дашборда из кэшируемого слоя ``dashboard``.
+
+    Ответ: ``{"stats": {...}, "source_stats": [...], "top_sources": [...],
+    "recent_quotes": [...]}``.
+    """
+    data = get_dashboard_data()
+    response = JsonResponse({
+        "stats": data["stats"],
+        "source_stats": list(data["source_stats"]),
+        "top_sources": list(data["top_sources"]),
+        "recent_quotes": [
+            {
+                "quote_id": quote.pk,
+                "quote_text": quote.get_short_text(),
+                "source": quote.source,
+                "likes": quote.likes,
+                "dislikes": quote.dislikes,
+                "watches": quote.watches,
+                "created_at": quote.created_at,
+            }
+            for quote in data["recent_quotes"]
+        ],
+    })
+    patch_cache_control(response, public=True, max_age=dashboard_cache_ttl())
+    return response
@@ -4,3 +4,25 @@ from django.apps import AppConfig
 class RandomQuoteConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'random_quote'
+
+    def ready(self):
+        # Регистрация обработчиков сигналов модели Quote.
+        from . import signals  # noqa: F401
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+        from .db import apply_sqlite_pragmas
+
+        # PRAGMA для каждого нового соединения SQLite (synchronous, busy_timeout и т.д.).
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid="random_quote_sqlite_pragmas")
+
+        # Замер SQL-запросов и рендеринга шаблонов для InstrumentationMiddleware —
+        # только пока он подключён и включён (в том числе после override_settings).
+        from django.test.signals import setting_changed
+        from .instrumentation import sync_instrumentation
+        sync_instrumentation()
+        setting_changed.connect(sync_instrumentation, dispatch_uid="random_quote_instrumentation")
+
+        # Триггеры FTS5 теряются, когда SQLite пересоздаёт таблицу цитат при
+        # изменении схемы, — восстанавливаем структуры поиска после migrate.
+        from .search import ensure_search_index
+        post_migrate.connect(ensure_search_index, sender=self, dispatch_uid="random_quote_search_index")
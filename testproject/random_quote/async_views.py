@@ -0,0 +1,136 @@
+"""Асинхронные (ASGI) views для основных страниц цитат.
+
+Повторяют ``views.random_quote_view``, ``like_quote``/``dislike_quote``,
+``Top10ByLikesView`` и ``dashboard_view`` с теми же шаблонами и контекстом,
+но не занимают поток на время запросов к БД: используется асинхронный ORM
+(``afirst``, ``aupdate``, ``acount``) и асинхронный API кэша. Запись
+счётчиков (сброс буфера просмотров, индекс весов) выполняется фоновыми
+задачами (``tasks.fire_and_forget``) — ответ не ждёт её.
+
+Подключаются вместо синхронных настройкой ``RANDOM_QUOTE_ASYNC_VIEWS``
+(см. ``urls.py``); имеет смысл только при запуске через ASGI-сервер
+(``uvicorn testproject.asgi:application``). Сравнить пропускную способность
+WSGI и ASGI — ``manage.py loadtest``.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404, HttpResponseNotAllowed
+from django.shortcuts import redirect, render
+
+from .caching import cached_page, fragment_cache_ttl
+from .counters import watches_buffer
+from .dashboard import aget_dashboard_data, cache_ttl as dashboard_cache_ttl
+from .db import replica_reads
+from .leaderboard import leaderboard
+from .models import Quote
+from .reactions import DISLIKE, LIKE, aapply_reaction
+from .rotation import RecentlySeen
+from .sample_queue import low_water, sample_queue, sample_queue_enabled
+from .sampling import get_sampler
+from .sharding import pending_reactions
+from .tasks import fire_and_forget
+
+
+@replica_reads
+async def random_quote_view(request):
+    """
+    Показ случайной цитаты с учётом веса (асинхронный вариант).
+
+    Цитата берётся из очереди заранее выбранных (``sample_queue``; пополнение —
+    фоновой задачей), а если та пуста — ``get_sampler().achoose_excluding()``
+    без недавно показанных посетителю цитат; просмотр учитывается в буфере
+    ``counters.watches_buffer``, а его сброс в БД запускается фоновой задачей.
+    Шаблон и контекст — как у ``views.random_quote_view``.
+    """
+    sampler = get_sampler()
+    recent = await RecentlySeen.aload(request)
+    chosen = None
+    if sample_queue_enabled():
+        chosen, remaining = await sync_to_async(sample_queue.take)(recent.ids)
+        if remaining < low_water():
+            fire_and_forget(sample_queue.refill)
+    for _ in range(2):
+        if chosen is not None:
+            break
+        quote_id = await sampler.achoose_excluding(recent.ids)
+        if quote_id is None:
+            break
+        chosen = await Quote.objects.filter(pk=quote_id).afirst()
+        if chosen is not None:
+            break
+        # Цитата удалена другим процессом — индекс устарел.
+        sampler.invalidate()
+
+    if chosen is None:
+        return render(request, "random.html", {"quote": None})
+
+    unflushed = watches_buffer.pending(chosen.pk)
+    if watches_buffer.increment(chosen.pk, autoflush=False):
+        fire_and_forget(watches_buffer.flush)
+    chosen.watches += unflushed + 1
+    likes, dislikes = await sync_to_async(pending_reactions)(chosen.pk)
+    chosen.likes += likes
+    chosen.dislikes += dislikes
+
+    response = render(request, "random.html", {"quote": chosen, "fragment_cache_ttl": fragment_cache_ttl()})
+    recent.push(chosen.pk)
+    await recent.asave(request, response)
+    return response
+
+
+async def _react(request, pk, reaction):
+    # require_POST в Django 4.2 не поддерживает асинхронные views — проверяем метод сами.
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    if not await aapply_reaction(pk, reaction):
+        raise Http404("Цитата не найдена.")
+    return redirect("random_quote")
+
+
+async def like_quote(request, pk: int):
+    """Лайк цитаты (POST, асинхронный вариант ``views.like_quote``)."""
+    return await _react(request, pk, LIKE)
+
+
+async def dislike_quote(request, pk: int):
+    """Дизлайк цитаты (POST, асинхронный вариант ``views.dislike_quote``)."""
+    return await _react(request, pk, DISLIKE)
+
+
+@replica_reads
+@cached_page("top", params=("page",), variant=leaderboard.signature)
+async def top_quotes_view(request):
+    """
+    Топ-N цитат по лайкам (асинхронный вариант ``views.Top10ByLikesView``).
+
+    Актуальный процессный топ отдаётся без обращения к БД; если его нужно
+    перечитать, ``leaderboard.top()`` выполняется в пуле потоков.
+    """
+    entries = leaderboard.cached_top()
+    if entries is None:
+        entries = await sync_to_async(leaderboard.top)()
+
+    paginator = Paginator(entries, getattr(settings, "RANDOM_QUOTE_LEADERBOARD_PAGE_SIZE", 10))
+    try:
+        page = paginator.page(request.GET.get("page") or 1)
+    except InvalidPage:
+        raise Http404("Страница не найдена.")
+
+    return render(request, "top10.html", {
+        "quotes": page.object_list,
+        "paginator": paginator,
+        "page_obj": page,
+        "is_paginated": page.has_other_pages(),
+        "top_size": leaderboard.size,
+        "start_index": page.start_index(),
+        "fragment_cache_ttl": fragment_cache_ttl(),
+    })
+
+
+@replica_reads
+@cached_page("dashboard", timeout=dashboard_cache_ttl)
+async def dashboard_view(request):
+    """Дашборд (асинхронный вариант ``views.dashboard_view``), данные — ``aget_dashboard_data()``."""
+    return render(request, "dashboard.html", await aget_dashboard_data())
@@ -0,0 +1,11 @@
+"""Бенчмарки горячих путей приложения цитат.
+
+Модули:
+- ``datasets`` — синтетические наборы цитат (1k, 100k, 1M) с реалистичными
+  распределениями веса, лайков и просмотров;
+- ``scenarios`` — измеряемые запросы (страницы, API, реакции, форма) и замер
+  задержек, числа SQL-запросов и пикового объёма памяти;
+- ``report`` — машиночитаемый отчёт (JSON) и сравнение двух отчётов.
+
+Запуск — ``manage.py benchmark``; данные сеются в отдельную тестовую БД.
+"""
@@ -0,0 +1,92 @@
+"""Синтетические наборы цитат для бенчмарков.
+
+Распределения приближены к реальным: вес и лайки — с «тяжёлым хвостом»
+(большинство цитат почти не оценивают, немногие очень популярны),
+просмотры растут вместе с весом и лайками, дизлайков заметно меньше лайков.
+На источник приходится не больше трёх цитат, как требует ``QuoteForm``.
+"""
+
+import random
+import time
+
+from random_quote.caching import bump_content_version
+from random_quote.leaderboard import leaderboard
+from random_quote.models import Quote, QuoteStats, normalize_source, quote_text_hash
+from random_quote.sample_queue import sample_queue
+from random_quote.sampling import rebuild_weight_blocks, sampler, use_database_sampling
+from random_quote.stats import rebuild_stats
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+QUOTES_PER_SOURCE = 3
+SOURCE_TYPES = [code for code, _ in Quote.SOURCE_CHOICES]
+SOURCE_TYPE_WEIGHTS = [30, 35, 15, 20]
+WORDS = (
+    "жизнь время мир любовь человек слово дорога правда свет память сила "
+    "дом путь надежда мечта город друг море небо огонь ветер"
+).split()
+
+
+def parse_size(value):
+    """Размер набора: ``1k``/``100k``/``1m`` или целое число."""
+    value = str(value).strip().lower()
+    if value in SIZES:
+        return SIZES[value]
+    return int(value.replace("_", ""))
+
+
+def make_quote(number, rng):
+    """Цитата номер ``number`` со случайными метриками."""
+    weight = min(100, int(rng.paretovariate(1.2)))
+    likes = int(rng.paretovariate(1.1)) - 1
+    if rng.random() < 0.01:
+        likes += int(rng.paretovariate(0.8) * 10)
+    dislikes = int(likes * rng.random() * 0.4)
+    watches = likes * rng.randint(5, 20) + int(rng.expovariate(1 / (weight * 5)))
+    text = f"{' '.join(rng.choices(WORDS, k=rng.randint(4, 14))).capitalize()} — №{number}."
+    source = f"Источник {number // QUOTES_PER_SOURCE}"
+    quote = Quote(
+        quote_text=text,
+        source=source,
+        source_type=rng.choices(SOURCE_TYPES, SOURCE_TYPE_WEIGHTS)[0],
+        weight=weight,
+        likes=likes,
+        dislikes=dislikes,
+        watches=watches,
+        source_key=normalize_source(source),
+        text_hash=quote_text_hash(text),
+    )
+    quote.refresh_scores()
+    return quote
+
+
+def seed(size, seed_value=0, batch_size=5000):
+    """
+    Дополнить таблицу цитат синтетическими записями до ``size`` штук.
+
+    Наборы растут инкрементально (1k → 100k → 1M): уже созданные записи
+    сохраняются, добавляются только недостающие. После вставки
+    перестраиваются материализованная статистика и индексы выбора.
+
+    Returns:
+        float: время заполнения в секундах.
+    """
+    started = time.monotonic()
+    existing = Quote.objects.count()
+    rng = random.Random(f"{seed_value}:{existing}")
+    batch = []
+    for number in range(existing, size):
+        batch.append(make_quote(number, rng))
+        if len(batch) >= batch_size:
+            Quote.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Quote.objects.bulk_create(batch)
+
+    rebuild_stats(Quote, QuoteStats)
+    if use_database_sampling():
+        rebuild_weight_blocks()
+    sampler.invalidate()
+    sample_queue.discard()
+    leaderboard.invalidate()
+    bump_content_version()
+    return time.monotonic() - started
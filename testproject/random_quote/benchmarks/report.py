@@ -0,0 +1,81 @@
+"""Машиночитаемый отчёт бенчмарка и сравнение отчётов.
+
+Формат отчёта (JSON)::
+
+    {"meta": {"commit": ..., "python": ..., "django": ..., "database": ..., ...},
+     "datasets": {"100000": {"seed_seconds": ..., "scenarios": {"random": {...}, ...}}}}
+
+Ключи отсортированы, поэтому отчёты разных коммитов удобно сравнивать и
+обычным ``diff``; ``compare`` считает относительные изменения метрик.
+"""
+
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.db import connection
+
+from random_quote.sampling import use_database_sampling
+
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms", "queries_mean", "peak_kib")
+
+
+def git_commit():
+    """Текущий коммит репозитория или ``None``, если git недоступен."""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=settings.BASE_DIR, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def metadata():
+    """Окружение прогона: коммит, версии, СУБД и режимы приложения."""
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "sampling": "database" if use_database_sampling() else "memory",
+        "async_views": getattr(settings, "RANDOM_QUOTE_ASYNC_VIEWS", False),
+    }
+
+
+def write_report(report, path):
+    with open(path, "w", encoding="utf-8") as out:
+        json.dump(report, out, ensure_ascii=False, indent=2, sort_keys=True)
+        out.write("\n")
+
+
+def load_report(path):
+    with open(path, encoding="utf-8") as src:
+        return json.load(src)
+
+
+def compare(old, new):
+    """
+    Сравнить метрики двух отчётов.
+
+    Returns:
+        list[tuple]: ``(набор, сценарий, метрика, было, стало, изменение в %)``
+        для сценариев, присутствующих в обоих отчётах.
+    """
+    rows = []
+    for dataset, new_data in sorted(new["datasets"].items(), key=lambda item: int(item[0])):
+        old_data = old.get("datasets", {}).get(dataset)
+        if old_data is None:
+            continue
+        for name, metrics in sorted(new_data["scenarios"].items()):
+            before = old_data["scenarios"].get(name)
+            if before is None:
+                continue
+            for metric in COMPARED_METRICS:
+                was, now = before.get(metric, 0), metrics.get(metric, 0)
+                change = (now - was) / was * 100 if was else 0.0
+                rows.append((dataset, name, metric, was, now, round(change, 1)))
+    return rows
@@ -0,0 +1,139 @@
+"""Измеряемые сценарии и замеры.
+
+Каждый сценарий — запрос через тестовый клиент Django (полный стек
+middleware, URLConf и шаблонов). Для сценария измеряются:
+
+- задержки (p50/p95/p99/среднее, мс) — в основном проходе без
+  дополнительной инструментации;
+- число SQL-запросов на запрос (среднее/максимум) и пиковый объём памяти,
+  выделенной за запрос (``tracemalloc``), — в отдельном коротком проходе,
+  поскольку эти замеры сами замедляют обработку.
+"""
+
+import itertools
+import json
+import time
+import tracemalloc
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from random_quote.models import Quote
+
+Scenario = namedtuple("Scenario", ["name", "method", "path", "data"])
+
+
+def percentile(values, p):
+    """Перцентиль ``p`` (0..100) отсортированного списка методом ближайшего ранга."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, round(p / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def default_scenarios(rng):
+    """
+    Сценарии горячих путей: страницы, JSON API, реакции и отправка формы.
+
+    ``path``/``data`` — функции номера итерации; идентификаторы цитат для
+    реакций выбираются случайно из диапазона существующих ``quote_id``.
+    """
+    bounds = Quote.objects.order_by("pk").values_list("pk", flat=True)
+    low, high = bounds.first() or 1, bounds.last() or 1
+    run = rng.randrange(10 ** 9)
+    submissions = itertools.count()
+
+    def quote_form(_):
+        number = next(submissions)
+        return {
+            "quote_text": f"Бенчмарк-цитата {run}-{number}: проверка формы",
+            "source": f"Бенчмарк {run}-{number}",
+            "source_type": Quote.BOOK,
+            "weight": 5,
+        }
+
+    def reactions(_):
+        items = [{"quote_id": rng.randint(low, high), "reaction": rng.choice(("like", "dislike"))}
+                 for _ in range(50)]
+        return json.dumps({"reactions": items})
+
+    return [
+        Scenario("random", "get", lambda i: reverse("random_quote"), None),
+        Scenario("top", "get", lambda i: reverse("quotes_top"), None),
+        Scenario("dashboard", "get", lambda i: reverse("dashboard"), None),
+        Scenario("api_random", "get", lambda i: reverse("api_quotes_random") + "?n=10", None),
+        Scenario("api_top", "get", lambda i: reverse("api_quotes_top"), None),
+        Scenario("api_dashboard", "get", lambda i: reverse("api_dashboard"), None),
+        Scenario("like", "post", lambda i: reverse("quote_like", args=[rng.randint(low, high)]), None),
+        Scenario("reactions_batch", "post", lambda i: reverse("quote_reactions"), reactions),
+        Scenario("form_submit", "post", lambda i: reverse("quote_add"), quote_form),
+    ]
+
+
+def _call(client, scenario, i):
+    path = scenario.path(i)
+    if scenario.method == "get":
+        return client.get(path)
+    data = scenario.data(i) if scenario.data else {}
+    if isinstance(data, str):
+        # JSON-эндпоинты требуют токен API.
+        return client.post(path, data, content_type="application/json",
+                           HTTP_AUTHORIZATION=f"Bearer {getattr(settings, 'RANDOM_QUOTE_API_TOKEN', '')}")
+    return client.post(path, data)
+
+
+def run_scenario(client, scenario, requests=200, warmup=10, probe=20):
+    """
+    Измерить сценарий.
+
+    Args:
+        requests (int): запросов в основном проходе (задержки).
+        warmup (int): запросов прогрева (не учитываются).
+        probe (int): запросов в проходе замера SQL и памяти.
+
+    Returns:
+        dict: ``requests``, ``errors``, ``p50_ms``, ``p95_ms``, ``p99_ms``,
+        ``mean_ms``, ``queries_mean``, ``queries_max``, ``peak_kib``.
+    """
+    counter = itertools.count()
+    errors = 0
+    for _ in range(warmup):
+        _call(client, scenario, next(counter))
+
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = _call(client, scenario, next(counter))
+        latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            errors += 1
+    latencies.sort()
+
+    queries = []
+    peak = 0
+    for _ in range(probe):
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as captured:
+                response = _call(client, scenario, next(counter))
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        queries.append(len(captured))
+        if response.status_code >= 400:
+            errors += 1
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "queries_mean": round(sum(queries) / len(queries), 2) if queries else 0.0,
+        "queries_max": max(queries, default=0),
+        "peak_kib": round(peak / 1024, 1),
+    }
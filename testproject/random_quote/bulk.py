@@ -0,0 +1,101 @@
+"""Массовые изменения цитат одним ``UPDATE``.
+
+``bulk_set`` присваивает выбранным цитатам постоянные значения (вес,
+счётчики, тип источника) одним ``queryset.update()`` вместо сохранения
+каждой цитаты (``save()`` и сигналы — несколько запросов на строку).
+То, что при поштучном сохранении делают сигналы, выполняется один раз
+на всю пачку:
+
+- хранимые ``popularity_score``/``like_percentage`` пересчитываются тем же
+  ``UPDATE`` (``score_expressions``);
+- материализованная статистика ``QuoteStats`` получает приращения,
+  вычисленные по агрегатам выборки до изменения (``GROUP BY`` по
+  источнику и типу) — новые значения известны заранее;
+- индексы выбора по весу, очередь заранее выбранных цитат, топ цитат
+  и версия кэша страниц сбрасываются.
+
+Используется действиями списка цитат в админке.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Now
+
+from .caching import bump_content_version
+from .leaderboard import leaderboard
+from .models import Quote, score_expressions
+from .sample_queue import sample_queue
+from .sampling import rebuild_weight_blocks, sampler, use_database_sampling
+from .stats import apply_stats_deltas, stats_keys, use_materialized_stats
+
+BULK_FIELDS = ("weight", "watches", "likes", "dislikes", "source_type")
+# Метрики цитаты и соответствующие им колонки QuoteStats.
+STATS_METRICS = {"watches": "watches", "likes": "likes", "dislikes": "dislikes", "weight": "weight_sum"}
+
+
+def _stats_deltas(groups, values):
+    """
+    Приращения ``QuoteStats`` при присваивании ``values`` цитатам из ``groups``.
+
+    ``groups`` — агрегаты выборки до изменения по ``(source, source_type)``.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for row in groups:
+        count = row["quotes"]
+        before = {metric: row[metric] or 0 for metric in STATS_METRICS}
+        after = {metric: values[metric] * count if metric in values else before[metric] for metric in STATS_METRICS}
+        new_type = values.get("source_type", row["source_type"])
+        for key in stats_keys(row["source"], row["source_type"]):
+            deltas[key]["quotes"] -= count
+            for metric, column in STATS_METRICS.items():
+                deltas[key][column] -= before[metric]
+        for key in stats_keys(row["source"], new_type):
+            deltas[key]["quotes"] += count
+            for metric, column in STATS_METRICS.items():
+                deltas[key][column] += after[metric]
+    return deltas
+
+
+def bulk_set(queryset, **values):
+    """
+    Присвоить цитатам из ``queryset`` значения ``values`` одним ``UPDATE``.
+
+    Args:
+        queryset: выборка цитат (например, отмеченные в админке).
+        values: поля из ``BULK_FIELDS`` и их новые значения.
+
+    Returns:
+        int: число изменённых цитат.
+    """
+    unknown = set(values) - set(BULK_FIELDS)
+    if unknown:
+        raise ValueError(f"Массово можно менять только поля {', '.join(BULK_FIELDS)}: {', '.join(sorted(unknown))}.")
+    queryset = queryset.order_by()
+    changes = dict(values)
+    metrics = {name: Value(value) for name, value in values.items() if name in Quote.METRIC_FIELDS}
+    if metrics:
+        changes.update(score_expressions(**metrics))
+    changes["updated_at"] = Now()
+
+    with transaction.atomic():
+        groups = []
+        if use_materialized_stats():
+            groups = list(
+                queryset.values("source", "source_type")
+                .annotate(quotes=Count("pk"), **{metric: Sum(metric) for metric in STATS_METRICS})
+            )
+        updated = queryset.update(**changes)
+        if groups:
+            apply_stats_deltas(_stats_deltas(groups, values))
+
+    if updated:
+        if "weight" in values:
+            sampler.invalidate()
+            if use_database_sampling():
+                rebuild_weight_blocks()
+        sample_queue.discard()
+        leaderboard.invalidate()
+        bump_content_version()
+    return updated
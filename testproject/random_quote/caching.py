@@ -0,0 +1,143 @@
+"""Кэширование страниц приложения цитат.
+
+Содержит:
+- «версию содержимого» в кэше Django — счётчик, который увеличивается при
+  сохранении/удалении цитат и массовых изменениях (``bump_content_version``);
+  ключи кэша страниц включают версию, поэтому её увеличение инвалидирует все
+  сохранённые страницы сразу, в том числе в других процессах. Реакции
+  версию не меняют: страница топа зависит от состава и порядка топа
+  (``variant``), а счётчики в закэшированных страницах отстают не больше
+  чем на время их жизни;
+- декоратор ``cached_page`` — кэширование отрендеренного ответа страницы
+  с ``ETag``/``Last-Modified`` и ответом 304 на условные запросы. Ключ —
+  имя страницы и значения разрешённых параметров запроса, поэтому
+  произвольные строки запроса не создают новых записей кэша.
+
+Фрагменты шаблонов (блоки отдельных цитат) кэшируются тегом ``{% cache %}``
+с ключом из ``quote_id`` и ``updated_at``, см. ``fragment_cache_ttl``.
+"""
+
+import asyncio
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .instrumentation import record_cache
+
+VERSION_KEY = "random_quote:content_version"
+
+
+def content_version():
+    """Текущая версия содержимого (создаётся при первом обращении)."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_content_version():
+    """Инвалидировать кэш страниц, зависящих от цитат."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, timeout=None)
+
+
+def page_cache_ttl():
+    """Время жизни кэша страницы топа (в секундах)."""
+    return getattr(settings, "RANDOM_QUOTE_PAGE_CACHE_TTL", 60)
+
+
+def fragment_cache_ttl():
+    """Время жизни кэша фрагментов с отдельными цитатами (в секундах)."""
+    return getattr(settings, "RANDOM_QUOTE_FRAGMENT_CACHE_TTL", 300)
+
+
+def _page_key(request, name, params=(), variant=None):
+    parts = [f"{param}={request.GET.get(param, '')}" for param in params]
+    if variant is not None:
+        parts.append(str(variant()))
+    digest = hashlib.md5("&".join(parts).encode()).hexdigest()
+    return f"random_quote:page:{name}:{content_version()}:{digest}"
+
+
+def _prepare(response):
+    """Отрендерить ответ и проставить ``ETag``/``Last-Modified``; ``False`` — ответ не кэшируется."""
+    if hasattr(response, "render") and callable(response.render):
+        response = response.render()
+    if response.status_code != 200 or response.streaming:
+        return response, False
+    response["ETag"] = quote_etag(hashlib.md5(response.content).hexdigest())
+    response["Last-Modified"] = http_date(time.time())
+    patch_cache_control(response, max_age=0, must_revalidate=True)
+    return response, True
+
+
+def _conditional(request, response):
+    return get_conditional_response(
+        request,
+        etag=response["ETag"],
+        last_modified=parse_http_date_safe(response["Last-Modified"]),
+        response=response,
+    )
+
+
+def cached_page(name, timeout=page_cache_ttl, params=(), variant=None):
+    """
+    Декоратор кэширования страницы целиком.
+
+    Для ``GET``/``HEAD`` ответ (200) рендерится один раз на версию содержимого,
+    значения параметров ``params`` и ``variant()``, сохраняется в кэш вместе
+    с ``ETag`` (хэш содержимого) и ``Last-Modified``; повторный посетитель
+    с совпадающим ``If-None-Match`` или ``If-Modified-Since`` получает 304.
+    Остальные параметры запроса в ключ не входят. Подходит и для асинхронных views.
+
+    Args:
+        name (str): имя страницы в ключе кэша.
+        timeout (callable): функция, возвращающая время жизни в секундах.
+        params (tuple[str]): параметры запроса, от которых зависит страница.
+        variant (callable | None): функция без аргументов, значение которой
+            тоже входит в ключ (вызывается синхронно, в том числе для
+            асинхронных views — в пуле потоков).
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapped(request, *args, **kwargs):
+                if request.method not in ("GET", "HEAD"):
+                    return await view(request, *args, **kwargs)
+
+                key = await sync_to_async(_page_key)(request, name, params, variant)
+                response = await cache.aget(key)
+                record_cache("page", "misses" if response is None else "hits")
+                if response is None:
+                    response, cacheable = _prepare(await view(request, *args, **kwargs))
+                    if not cacheable:
+                        return response
+                    await cache.aset(key, response, timeout())
+                return _conditional(request, response)
+            return wrapped
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+
+            key = _page_key(request, name, params, variant)
+            response = cache.get(key)
+            record_cache("page", "misses" if response is None else "hits")
+            if response is None:
+                response, cacheable = _prepare(view(request, *args, **kwargs))
+                if not cacheable:
+                    return response
+                cache.set(key, response, timeout())
+            return _conditional(request, response)
+        return wrapped
+    return decorator
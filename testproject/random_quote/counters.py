@@ -0,0 +1,142 @@
+"""Буферизация счётчика просмотров цитат.
+
+Вместо ``UPDATE ... watches = watches + 1`` на каждый показ случайной цитаты
+приращения копятся в памяти процесса и сбрасываются в БД пачкой —
+одним ``UPDATE ... CASE`` на группу цитат — не чаще, чем раз в
+``RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL`` секунд.
+
+Содержит:
+- ``ViewCounterBuffer`` — потокобезопасный буфер приращений;
+- ``watches_buffer`` — общий для процесса экземпляр, сбрасываемый также
+  при завершении процесса (``atexit``).
+"""
+
+import atexit
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Quote, QuoteEvent, score_expressions
+from .stats import apply_metric_deltas
+from .trending import write_events
+
+
+class ViewCounterBuffer:
+    """
+    Буфер приращений ``Quote.watches``.
+
+    Приращения агрегируются по ``quote_id``. Сброс происходит:
+        - при очередном ``increment()``, если с прошлого сброса прошло больше
+          ``RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL`` секунд;
+        - если в буфере накопилось больше ``RANDOM_QUOTE_WATCHES_MAX_PENDING`` цитат;
+        - явным вызовом ``flush()`` и при завершении процесса.
+
+    Интервал ``0`` отключает буферизацию: каждый просмотр записывается сразу.
+    Отображаемое число просмотров — значение из БД плюс ``pending(quote_id)``.
+    """
+
+    # Ограничение числа параметров в одном запросе (лимит переменных SQLite).
+    chunk_size = 400
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._flushed_at = time.monotonic()
+
+    @property
+    def interval(self):
+        """Период сброса в секундах."""
+        return getattr(settings, "RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL", 0)
+
+    @property
+    def max_pending(self):
+        """Максимальное число цитат в буфере до принудительного сброса."""
+        return getattr(settings, "RANDOM_QUOTE_WATCHES_MAX_PENDING", 1000)
+
+    def increment(self, quote_id, amount=1, autoflush=True):
+        """
+        Учесть ``amount`` просмотров цитаты; при необходимости сбросить буфер.
+
+        Args:
+            autoflush (bool): сбрасывать буфер сразу. Асинхронные views передают
+                ``False`` и сами запускают ``flush()`` фоновой задачей.
+
+        Returns:
+            bool: пора ли сбросить буфер.
+        """
+        with self._lock:
+            self._pending[quote_id] = self._pending.get(quote_id, 0) + amount
+            due = (
+                time.monotonic() - self._flushed_at >= self.interval
+                or len(self._pending) >= self.max_pending
+            )
+        if due and autoflush:
+            self.flush()
+        return due
+
+    def pending(self, quote_id):
+        """Количество ещё не записанных в БД просмотров цитаты."""
+        with self._lock:
+            return self._pending.get(quote_id, 0)
+
+    def flush(self):
+        """
+        Записать накопленные приращения в БД.
+
+        Returns:
+            int: количество обновлённых цитат.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return 0
+
+        items = list(pending.items())
+        for i in range(0, len(items), self.chunk_size):
+            chunk = items[i:i + self.chunk_size]
+            try:
+                self._write(chunk)
+            except Exception:
+                # Не теряем просмотры при ошибке записи: вернём в буфер
+                # всё, что ещё не записано.
+                with self._lock:
+                    for pk, delta in items[i:]:
+                        self._pending[pk] = self._pending.get(pk, 0) + delta
+                raise
+        return len(items)
+
+    def _write(self, chunk):
+        """Одним ``UPDATE`` прибавить приращения пачке цитат (с показателем популярности), статистике и журналу событий."""
+        if len(chunk) == 1:
+            increment = Value(chunk[0][1])
+        else:
+            increment = Case(
+                *[When(pk=pk, then=Value(delta)) for pk, delta in chunk],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        with transaction.atomic():
+            watches = F("watches") + increment
+            Quote.objects.filter(pk__in=[pk for pk, _ in chunk]).update(
+                watches=watches,
+                popularity_score=score_expressions(watches=watches)["popularity_score"],
+            )
+            apply_metric_deltas("watches", dict(chunk))
+            write_events(QuoteEvent.VIEW, dict(chunk))
+
+
+watches_buffer = ViewCounterBuffer()
+
+
+def _flush_on_exit():
+    try:
+        watches_buffer.flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_on_exit)
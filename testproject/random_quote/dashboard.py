@@ -0,0 +1,218 @@
+"""Слой данных дашборда.
+
+Собирает контекст ``dashboard.html`` минимальным числом запросов и кэширует
+его во фреймворке кэширования Django:
+
+- ``live_dashboard_data`` — расчёт агрегатами по таблице цитат: вся общая
+  статистика одним ``aggregate(...)``, плюс срезы по типам и источникам;
+- ``build_dashboard_data`` — выбор между материализованной статистикой
+  (``QuoteStats``) и расчётом агрегатами;
+- ``get_dashboard_data`` — кэш с коротким TTL и защитой от «стампеды»:
+  после истечения TTL пересчёт выполняет один запрос, остальные в это
+  время получают предыдущее (устаревшее) значение, а при пустом кэше —
+  недолго ждут результата этого запроса;
+- ``aget_dashboard_data`` — то же для асинхронных views;
+- ``cache_stats`` — счётчики попаданий/промахов кэша.
+"""
+
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, CharField, Case, Count, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .instrumentation import record_cache
+from .models import Quote
+from .stats import dashboard_stats, use_materialized_stats
+
+CACHE_KEY = "random_quote:dashboard"
+LOCK_KEY = "random_quote:dashboard:lock"
+COUNTER_KEYS = {
+    "hits": "random_quote:dashboard:hits",
+    "stale": "random_quote:dashboard:stale",
+    "waits": "random_quote:dashboard:waits",
+    "misses": "random_quote:dashboard:misses",
+}
+
+
+def cache_ttl():
+    """Сколько секунд значение кэша считается свежим."""
+    return getattr(settings, "RANDOM_QUOTE_DASHBOARD_CACHE_TTL", 10)
+
+
+def stale_ttl():
+    """Сколько секунд после устаревания значение ещё можно отдавать во время пересчёта."""
+    return getattr(settings, "RANDOM_QUOTE_DASHBOARD_STALE_TTL", 60)
+
+
+def cold_wait():
+    """Сколько секунд при пустом кэше ждать значения, которое считает другой запрос."""
+    return getattr(settings, "RANDOM_QUOTE_DASHBOARD_COLD_WAIT", 5)
+
+
+COLD_POLL_INTERVAL = 0.05
+
+
+def live_dashboard_data():
+    """
+    Посчитать данные дашборда агрегатами по таблице цитат.
+
+    Общая статистика — один запрос ``aggregate(Count, Sum, Sum, Sum, Avg)``;
+    срезы по типам источников и топ источников — по одному ``GROUP BY``.
+
+    Returns:
+        tuple: ``(stats, source_stats, top_sources)``.
+    """
+    totals = Quote.objects.aggregate(
+        total_quotes=Count('quote_id'),
+        total_views=Sum('watches'),
+        total_likes=Sum('likes'),
+        total_dislikes=Sum('dislikes'),
+        avg_weight=Avg('weight'),
+    )
+    stats = {name: value or 0 for name, value in totals.items()}
+
+    source_stats = list(
+        Quote.objects.values('source_type')
+        .annotate(
+            source_type_label=Case(
+                When(source_type=Quote.MOVIE, then=Value('Фильм')),
+                When(source_type=Quote.BOOK, then=Value('Книга')),
+                When(source_type=Quote.SERIES, then=Value('Сериал')),
+                When(source_type=Quote.PEOPLE, then=Value('Известный человек')),
+                default=Value('Неизвестно'),
+                output_field=CharField(),
+            ),
+            count=Count('quote_id'),
+            total_likes=Coalesce(Sum('likes'), 0),
+            total_views=Coalesce(Sum('watches'), 0),
+        )
+        .order_by('-count')
+    )
+
+    top_sources = list(
+        Quote.objects.values('source').annotate(
+            count=Count('quote_id'),
+            total_likes=Sum('likes')
+        ).order_by('-total_likes')[:5]
+    )
+    return stats, source_stats, top_sources
+
+
+def build_dashboard_data():
+    """
+    Собрать полный контекст дашборда (без кэша).
+
+    Returns:
+        dict: ``stats``, ``source_stats``, ``top_sources``, ``recent_quotes``.
+    """
+    if use_materialized_stats():
+        stats, source_stats, top_sources = dashboard_stats()
+    else:
+        stats, source_stats, top_sources = live_dashboard_data()
+    return {
+        'stats': stats,
+        'source_stats': source_stats,
+        'top_sources': top_sources,
+        'recent_quotes': list(Quote.objects.order_by('-created_at')[:5]),
+    }
+
+
+def _count(name):
+    record_cache("dashboard", name)
+    key = COUNTER_KEYS[name]
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ вытеснен между add и incr — счётчик начинается заново.
+        cache.set(key, 1, timeout=None)
+
+
+def _refresh():
+    data = build_dashboard_data()
+    cache.set(CACHE_KEY, (time.time() + cache_ttl(), data), timeout=cache_ttl() + stale_ttl())
+    return data
+
+
+def _refresh_locked():
+    """Пересчитать значение, если удалось взять блокировку; иначе ``None``."""
+    if not cache.add(LOCK_KEY, 1, timeout=max(cache_ttl(), 1)):
+        return None
+    try:
+        _count("misses")
+        return _refresh()
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def get_dashboard_data():
+    """
+    Вернуть контекст дашборда из кэша, пересчитывая его не чаще раза в TTL.
+
+    - свежее значение — отдаётся сразу (hit);
+    - устаревшее — пересчитывает тот, кто взял блокировку (``cache.add``),
+      остальные отдают устаревшее значение (stale);
+    - значения нет — считает тот, кто взял блокировку (miss), остальные ждут
+      его результата до ``RANDOM_QUOTE_DASHBOARD_COLD_WAIT`` секунд (waits),
+      а не дождавшись — считают сами.
+    """
+    cached = cache.get(CACHE_KEY)
+    if cached is not None:
+        expires, data = cached
+        if time.time() < expires:
+            _count("hits")
+            return data
+        refreshed = _refresh_locked()
+        if refreshed is None:
+            _count("stale")
+            return data
+        return refreshed
+
+    refreshed = _refresh_locked()
+    if refreshed is not None:
+        return refreshed
+    deadline = time.monotonic() + cold_wait()
+    while time.monotonic() < deadline:
+        time.sleep(COLD_POLL_INTERVAL)
+        cached = cache.get(CACHE_KEY)
+        if cached is not None:
+            _count("waits")
+            return cached[1]
+    _count("misses")
+    return _refresh()
+
+
+async def aget_dashboard_data():
+    """
+    Асинхронный вариант ``get_dashboard_data()``.
+
+    Свежее значение читается из кэша асинхронно; пересчёт (редкий, под
+    блокировкой) выполняется синхронным кодом в пуле потоков.
+    """
+    cached = await cache.aget(CACHE_KEY)
+    if cached is not None:
+        expires, data = cached
+        if time.time() < expires:
+            await sync_to_async(_count)("hits")
+            return data
+    return await sync_to_async(get_dashboard_data)()
+
+
+def invalidate_dashboard_cache():
+    """Сбросить кэш дашборда."""
+    cache.delete(CACHE_KEY)
+
+
+def cache_stats():
+    """
+    Счётчики кэша дашборда.
+
+    Returns:
+        dict: ``hits``, ``stale`` (отдано устаревшее значение во время пересчёта),
+        ``waits`` (дождались пересчёта другим запросом) и ``misses`` (пересчёты).
+    """
+    values = cache.get_many(list(COUNTER_KEYS.values()))
+    return {name: values.get(key, 0) for name, key in COUNTER_KEYS.items()}
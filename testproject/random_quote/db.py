@@ -0,0 +1,136 @@
+"""Настройка подключений к БД для приложения цитат.
+
+Содержит:
+- ``apply_sqlite_pragmas`` — обработчик ``connection_created``: применяет
+  ``RANDOM_QUOTE_SQLITE_PRAGMAS`` к каждому новому соединению SQLite
+  (только настройки соединения: ``synchronous``, ``busy_timeout`` и т.п.);
+- ``set_journal_mode`` — режим журнала, который хранится в самом файле БД
+  (WAL позволяет читать во время записи счётчиков и реакций); включается
+  один раз командой ``manage.py sqlite_journal_mode``;
+- ``replica_reads`` — декоратор views, которым разрешено читать с реплик;
+- ``ReadReplicaRouter`` — роутер, отправляющий на реплики чтения моделей
+  приложения только внутри таких views, а остальные чтения и все записи —
+  на основную БД.
+
+Профили ``DATABASES`` собираются в ``testproject/databases.py``.
+"""
+
+import asyncio
+import contextvars
+import random
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = "default"
+
+DEFAULT_SQLITE_PRAGMAS = {
+    "synchronous": "NORMAL",
+    "busy_timeout": 20000,
+    "mmap_size": 268435456,
+    "temp_store": "MEMORY",
+}
+JOURNAL_MODES = ("wal", "delete", "truncate", "persist")
+
+_replica_reads = contextvars.ContextVar("random_quote_replica_reads", default=False)
+
+
+def sqlite_pragmas():
+    """PRAGMA для соединений SQLite: ``{имя: значение}``."""
+    return getattr(settings, "RANDOM_QUOTE_SQLITE_PRAGMAS", DEFAULT_SQLITE_PRAGMAS)
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Применить PRAGMA к новому соединению SQLite (другие СУБД пропускаются)."""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+
+
+def set_journal_mode(connection, mode):
+    """
+    Сменить режим журнала SQLite (сохраняется в файле БД, действует на все соединения).
+
+    Returns:
+        str: режим после смены (для БД в памяти остаётся ``memory``).
+    """
+    if mode.lower() not in JOURNAL_MODES:
+        raise ValueError(f"Режим журнала: {', '.join(JOURNAL_MODES)}")
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA journal_mode={mode}")
+        return cursor.fetchone()[0]
+
+
+def read_replicas():
+    """Псевдонимы реплик для чтения (``RANDOM_QUOTE_READ_REPLICAS``)."""
+    return getattr(settings, "RANDOM_QUOTE_READ_REPLICAS", [])
+
+
+def replica_reads(view):
+    """
+    Разрешить чтение с реплик на время обработки запроса view.
+
+    Только для страниц, которые показывают данные и не читают того, что
+    сами только что записали. Подходит и для асинхронных views.
+    """
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapped(*args, **kwargs):
+            token = _replica_reads.set(True)
+            try:
+                return await view(*args, **kwargs)
+            finally:
+                _replica_reads.reset(token)
+        return wrapped
+
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        token = _replica_reads.set(True)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapped
+
+
+class ReadReplicaRouter:
+    """
+    Роутер чтения с реплик для моделей ``random_quote``.
+
+    - чтение — на случайную реплику, только если они настроены, запрос
+      обрабатывает view с ``replica_reads`` и нет открытой транзакции на
+      основной БД; иначе — основная БД. Формы, сигналы, реакции и команды
+      читают с основной БД и видят только что записанное;
+    - запись и миграции — только основная БД.
+
+    Реплики могут отставать: внутри ``replica_reads`` данные, которые должны
+    отражать только что сделанные изменения, следует читать с ``.using(PRIMARY)``.
+    """
+    app_label = "random_quote"
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != self.app_label:
+            return None
+        replicas = read_replicas()
+        if not replicas or not _replica_reads.get() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label != self.app_label:
+            return None
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *read_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in read_replicas():
+            return False
+        return None
@@ -1,6 +1,8 @@
 from django import forms
 from django.core.exceptions import ValidationError
-from .models import Quote
+from django.db.models import Count, Q
+from .db import PRIMARY
+from .models import Quote, normalize_source, quote_text_hash
 
 class QuoteForm(forms.ModelForm):
     """
@@ -12,6 +14,8 @@ class QuoteForm(forms.ModelForm):
     корректность и обязательность веса).
     """
 
+    DUPLICATE_ERROR = "Такая цитата уже существует."
+
     class Meta:
         """
         Мета-настройки формы.
@@ -51,6 +55,8 @@ class QuoteForm(forms.ModelForm):
         3) Глобальная уникальность сочетания (case-insensitive):
            (``quote_text``, ``source``) — при нарушении добавляем non-field error.
         4) Ограничение: для одного ``source`` допускается не более 3 цитат.
+           Проверки 3 и 4 выполняются одним запросом по индексу
+           (``source_key``, ``text_hash``), см. ``_source_usage``.
         5) ``weight`` обязателен и не может быть отрицательным.
 
     Возвращает:
@@ -66,15 +72,16 @@ class QuoteForm(forms.ModelForm):
         elif len(qt) < 10:
             self.add_error("quote_text", "Цитата должна содержать минимум 10 символов.")
 
-        if Quote.objects.filter(quote_text__iexact=qt, source__iexact=source).exists():
-            self.add_error(None, "Такая цитата уже существует.")
+        source_count, duplicates = self._source_usage(source, qt)
+        if duplicates:
+            self.add_error(None, self.DUPLICATE_ERROR)
 
         if not source:
             self.add_error("source", "Источник не может быть пустым.")
         elif len(source) < 2:
             self.add_error("source", "Название источника должно содержать минимум 2 символа.")
 
-        if Quote.objects.filter(source__iexact=source).count() >= 3:
+        if source_count >= 3:
             self.add_error("source", "У одного источника нельзя хранить больше трёх цитат.")
 
         weight = cleaned.get("weight")
@@ -85,6 +92,26 @@ class QuoteForm(forms.ModelForm):
 
         return cleaned
 
+    """
+    Количество цитат источника и число совпадений текста — одним запросом.
+
+    Использует нормализованные поля ``source_key``/``text_hash`` и индекс
+    уникального ограничения по ним. Редактируемая цитата не учитывается.
+
+    Returns:
+        tuple[int, int]: (цитат у источника, цитат с таким же текстом).
+    """
+    def _source_usage(self, source, quote_text):
+        # Проверка перед записью — только по основной БД: реплика может не видеть свежих цитат.
+        queryset = Quote.objects.using(PRIMARY).filter(source_key=normalize_source(source))
+        if self.instance.pk:
+            queryset = queryset.exclude(pk=self.instance.pk)
+        usage = queryset.aggregate(
+            total=Count("pk"),
+            duplicates=Count("pk", filter=Q(text_hash=quote_text_hash(quote_text))),
+        )
+        return usage["total"], usage["duplicates"]
+
 
     """
     Сохранить объект Quote, гарантируя корректные значения счётчиков.
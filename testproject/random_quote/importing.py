@@ -0,0 +1,235 @@
+"""Массовый импорт цитат из CSV/JSONL.
+
+Содержит:
+- ``read_rows`` — потоковое чтение записей из CSV (с заголовком) или JSONL;
+- ``QuoteImporter`` — проверка записей по правилам ``QuoteForm.clean`` и запись
+  пачками через ``bulk_create``.
+
+Проверки дубликатов и лимита цитат на источник выполняются по множествам
+и счётчикам в памяти: для источников, впервые встреченных в пачке, уже
+существующие цитаты подгружаются одним запросом на пачку, а не на строку.
+"""
+
+import csv
+import json
+import time
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+
+from .caching import bump_content_version
+from .leaderboard import leaderboard
+from .models import Quote, normalize_source, quote_text_hash
+from .sample_queue import sample_queue
+from .sampling import rebuild_weight_blocks, refresh_weight_block, sampler, use_database_sampling, weight_block_size
+from .stats import apply_stats_deltas, merge_deltas, quote_deltas
+
+MAX_QUOTES_PER_SOURCE = 3
+SOURCE_TYPES = dict(Quote.SOURCE_CHOICES)
+SOURCE_TYPE_BY_LABEL = {label.casefold(): code for code, label in Quote.SOURCE_CHOICES}
+
+
+def read_rows(stream, fmt):
+    """
+    Прочитать записи из открытого текстового потока.
+
+    Args:
+        stream: текстовый поток.
+        fmt (str): ``"csv"`` (первая строка — заголовок) или ``"jsonl"``.
+
+    Yields:
+        tuple[int, dict | None]: номер строки и запись (``None`` — строку не удалось разобрать).
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None
+            continue
+        yield number, row if isinstance(row, dict) else None
+
+
+class QuoteImporter:
+    """
+    Импорт цитат пачками.
+
+    Правила совпадают с ``QuoteForm.clean``: текст не короче 10 символов,
+    источник — от 2 до 100 символов, не больше трёх цитат на источник и без
+    повторов текста в пределах источника (без учёта регистра), вес — целое
+    от 0 до 100. Каждая пачка записывается ``bulk_create`` в своей транзакции.
+
+    После импорта обновляются материализованная статистика, индексы выбора
+    по весу, топ и версия содержимого для кэша страниц.
+    """
+
+    def __init__(self, batch_size=1000, dry_run=False, on_reject=None):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.on_reject = on_reject
+        self.read = 0
+        self.imported = 0
+        self.rejected = Counter()
+        self.elapsed = 0.0
+        self._counts = {}
+        self._hashes = set()
+        self._blocks = set()
+        self._unknown_pks = False
+
+    @property
+    def rejected_total(self):
+        return sum(self.rejected.values())
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+    def run(self, rows):
+        """
+        Импортировать записи из итератора ``(номер строки, запись)``.
+
+        Returns:
+            QuoteImporter: себя же — для чтения счётчиков.
+        """
+        started = time.monotonic()
+        batch = []
+        for number, row in rows:
+            self.read += 1
+            batch.append((number, row))
+            if len(batch) >= self.batch_size:
+                self._process(batch)
+                batch = []
+        if batch:
+            self._process(batch)
+        if self.imported and not self.dry_run:
+            self._refresh_indexes()
+        self.elapsed = time.monotonic() - started
+        return self
+
+    def _reject(self, number, row, reason):
+        self.rejected[reason] += 1
+        if self.on_reject is not None:
+            self.on_reject(number, row, reason)
+
+    def _clean(self, row):
+        """Проверить запись; вернуть ``(Quote, None)`` или ``(None, причина)``."""
+        qt = str(row.get("quote_text") or "").strip()
+        source = str(row.get("source") or "").strip()
+        if len(qt) < 10:
+            return None, "Цитата должна содержать минимум 10 символов."
+        if len(source) < 2:
+            return None, "Название источника должно содержать минимум 2 символа."
+        if len(source) > 100:
+            return None, "Название источника длиннее 100 символов."
+
+        source_type = str(row.get("source_type") or Quote.PEOPLE).strip()
+        if source_type not in SOURCE_TYPES:
+            source_type = SOURCE_TYPE_BY_LABEL.get(source_type.casefold())
+            if source_type is None:
+                return None, "Неизвестный тип источника."
+
+        weight = row.get("weight")
+        try:
+            weight = 1 if weight in (None, "") else int(weight)
+        except (TypeError, ValueError):
+            return None, "Вес должен быть целым числом."
+        if not 0 <= weight <= 100:
+            return None, "Вес должен быть от 0 до 100."
+
+        quote = Quote(
+            quote_text=qt,
+            source=source,
+            source_type=source_type,
+            weight=weight,
+            source_key=normalize_source(source),
+            text_hash=quote_text_hash(qt),
+        )
+        quote.refresh_scores()
+        return quote, None
+
+    def _load_sources(self, source_keys):
+        """Подгрузить существующие цитаты ещё не встреченных источников одним запросом."""
+        new_keys = [key for key in source_keys if key not in self._counts]
+        for key in new_keys:
+            self._counts[key] = 0
+        for start in range(0, len(new_keys), 500):
+            existing = Quote.objects.filter(source_key__in=new_keys[start:start + 500]) \
+                .values_list("source_key", "text_hash")
+            for key, text_hash in existing:
+                self._counts[key] += 1
+                self._hashes.add((key, text_hash))
+
+    def _process(self, batch):
+        candidates = []
+        for number, row in batch:
+            if row is None:
+                self._reject(number, row, "Не удалось разобрать строку.")
+                continue
+            quote, reason = self._clean(row)
+            if quote is None:
+                self._reject(number, row, reason)
+            else:
+                candidates.append((number, row, quote))
+
+        self._load_sources({quote.source_key for _, _, quote in candidates})
+        accepted = []
+        for number, row, quote in candidates:
+            key = (quote.source_key, quote.text_hash)
+            if key in self._hashes:
+                self._reject(number, row, "Такая цитата уже существует.")
+            elif self._counts[quote.source_key] >= MAX_QUOTES_PER_SOURCE:
+                self._reject(number, row, "У одного источника нельзя хранить больше трёх цитат.")
+            else:
+                self._hashes.add(key)
+                self._counts[quote.source_key] += 1
+                accepted.append((number, row, quote))
+
+        if self.dry_run:
+            self.imported += len(accepted)
+            return
+        try:
+            with transaction.atomic():
+                created = Quote.objects.bulk_create([quote for _, _, quote in accepted])
+                self._record(created)
+        except IntegrityError:
+            # Параллельная вставка нарушила уникальность — записываем пачку поштучно
+            # (save() отправляет сигналы, поэтому статистика обновится сама).
+            created = []
+            for number, row, quote in accepted:
+                try:
+                    with transaction.atomic():
+                        quote.save()
+                        created.append(quote)
+                except IntegrityError:
+                    self._reject(number, row, "Такая цитата уже существует.")
+        self.imported += len(created)
+
+    def _record(self, created):
+        """Учесть созданные пачкой цитаты в статистике (сигналы bulk_create не отправляет)."""
+        apply_stats_deltas(merge_deltas(*[
+            quote_deltas(quote.source, quote.source_type, weight=quote.weight) for quote in created
+        ]))
+        size = weight_block_size()
+        for quote in created:
+            if quote.pk is None:
+                self._unknown_pks = True
+            else:
+                self._blocks.add(quote.pk // size)
+
+    def _refresh_indexes(self):
+        sampler.invalidate()
+        sample_queue.discard()
+        leaderboard.invalidate()
+        bump_content_version()
+        if use_database_sampling():
+            if self._unknown_pks:
+                rebuild_weight_blocks()
+            else:
+                for block_id in sorted(self._blocks):
+                    refresh_weight_block(block_id)
@@ -0,0 +1,347 @@
+"""Инструментация запросов приложения цитат.
+
+Содержит:
+- ``InstrumentationMiddleware`` — замер времени запроса, числа и суммарного
+  времени SQL-запросов, времени рендеринга шаблонов и обращений к кэшам для
+  views ``random_quote``; результат отдаётся заголовком ``Server-Timing``
+  и копится в процессном реестре по view;
+- ``record_query`` — обёртка выполнения SQL (``execute_wrapper``),
+  подключается к каждому соединению при его создании;
+- ``sync_instrumentation`` — подключение замеров SQL и обёртки
+  ``Template._render``, только пока middleware подключён и инструментация
+  включена (и их отключение, если настройки изменились);
+- ``record_cache`` — учёт попаданий/промахов кэшей страниц и дашборда;
+- ``render_prometheus`` — накопленные метрики в текстовом формате Prometheus
+  (эндпоинт ``metrics/``);
+- журнал медленных запросов (логгер ``random_quote.slow_requests``) со
+  списком их SQL-запросов — при превышении ``RANDOM_QUOTE_SLOW_REQUEST_MS``.
+
+Метрики запроса хранятся в ``contextvars``, поэтому учитываются и запросы
+к БД асинхронных views, выполняемые в пуле потоков.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+
+logger = logging.getLogger("random_quote.slow_requests")
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+MAX_LOGGED_QUERIES = 100
+MIDDLEWARE_PATH = "random_quote.instrumentation.InstrumentationMiddleware"
+
+_current = ContextVar("random_quote_request_metrics", default=None)
+
+
+def instrumentation_enabled():
+    return getattr(settings, "RANDOM_QUOTE_INSTRUMENTATION", True)
+
+
+def server_timing_enabled():
+    return getattr(settings, "RANDOM_QUOTE_SERVER_TIMING", True)
+
+
+def slow_request_ms():
+    """Порог медленного запроса в миллисекундах (``None`` — журнал выключен)."""
+    return getattr(settings, "RANDOM_QUOTE_SLOW_REQUEST_MS", 500)
+
+
+class RequestMetrics:
+    """Метрики одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.queries = []
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache = defaultdict(int)
+
+
+class MetricsRegistry:
+    """Накопленные метрики процесса по view (потокобезопасно)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = defaultdict(int)
+            self.buckets = defaultdict(lambda: [0] * len(BUCKETS))
+            self.duration = defaultdict(float)
+            self.sql_count = defaultdict(int)
+            self.sql_time = defaultdict(float)
+            self.template_time = defaultdict(float)
+            self.cache = defaultdict(int)
+
+    def observe(self, view, method, status, duration, metrics):
+        with self._lock:
+            self.requests[(view, method, status)] += 1
+            counts = self.buckets[view]
+            for i, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    counts[i] += 1
+            self.duration[view] += duration
+            self.sql_count[view] += metrics.sql_count
+            self.sql_time[view] += metrics.sql_time
+            self.template_time[view] += metrics.template_time
+
+    def observe_cache(self, name, result):
+        with self._lock:
+            self.cache[(name, result)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "buckets": {view: list(counts) for view, counts in self.buckets.items()},
+                "duration": dict(self.duration),
+                "sql_count": dict(self.sql_count),
+                "sql_time": dict(self.sql_time),
+                "template_time": dict(self.template_time),
+                "cache": dict(self.cache),
+            }
+
+
+registry = MetricsRegistry()
+
+
+def record_query(execute, sql, params, many, context):
+    """``execute_wrapper``: учесть SQL-запрос в метриках текущего запроса."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.sql_count += 1
+        metrics.sql_time += elapsed
+        if len(metrics.queries) < MAX_LOGGED_QUERIES:
+            metrics.queries.append((elapsed, sql))
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """Обработчик ``connection_created``: подключить ``record_query`` к соединению."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def record_cache(name, result):
+    """
+    Учесть обращение к кэшу.
+
+    Args:
+        name (str): кэш (``"page"``, ``"dashboard"``).
+        result (str): ``"hits"``, ``"stale"`` (отдано устаревшее значение), ``"waits"`` или ``"misses"``.
+    """
+    if not instrumentation_enabled():
+        return
+    registry.observe_cache(name, result)
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache[(name, result)] += 1
+
+
+def install_template_timer():
+    """
+    Замерять время рендеринга шаблонов.
+
+    Оборачивает ``Template._render`` (как это делает тестовое окружение Django);
+    вложенные шаблоны (``extends``/``include``) учитываются в объемлющем.
+    Исходный метод сохраняется в обёртке и возвращается ``uninstall_template_timer``.
+    """
+    if getattr(Template._render, "random_quote_timed", False):
+        return
+    original = Template._render
+
+    def timed_render(self, context):
+        metrics = _current.get()
+        if metrics is None:
+            return original(self, context)
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_time += time.perf_counter() - started
+
+    timed_render.random_quote_timed = True
+    timed_render.original = original
+    Template._render = timed_render
+
+
+def uninstall_template_timer():
+    """Вернуть исходный ``Template._render``, если он обёрнут ``install_template_timer``."""
+    if getattr(Template._render, "random_quote_timed", False):
+        Template._render = Template._render.original
+
+
+def instrumentation_active():
+    """Включена ли инструментация настройкой и подключён ли ``InstrumentationMiddleware``."""
+    return instrumentation_enabled() and MIDDLEWARE_PATH in getattr(settings, "MIDDLEWARE", ())
+
+
+def sync_instrumentation(**kwargs):
+    """
+    Подключить замеры SQL и шаблонов, если инструментация активна, иначе отключить.
+
+    Вызывается из ``AppConfig.ready`` и обработчиком ``setting_changed``
+    (``override_settings`` в тестах): ``Template._render`` обёрнут, только
+    пока замеры кому-то нужны.
+    """
+    if kwargs.get("setting") not in (None, "RANDOM_QUOTE_INSTRUMENTATION", "MIDDLEWARE"):
+        return
+    if instrumentation_active():
+        connection_created.connect(install_query_wrapper, dispatch_uid="random_quote_query_wrapper")
+        install_template_timer()
+    else:
+        connection_created.disconnect(dispatch_uid="random_quote_query_wrapper")
+        uninstall_template_timer()
+
+
+def _view_name(request):
+    """Имя view приложения цитат или ``None`` для прочих запросов."""
+    match = getattr(request, "resolver_match", None)
+    if match is None or not match.func.__module__.startswith("random_quote."):
+        return None
+    if match.url_name == "metrics":
+        return None
+    return match.view_name
+
+
+def _server_timing(metrics, duration):
+    parts = [
+        f"total;dur={duration * 1000:.1f}",
+        f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.sql_count} SQL"',
+        f"tpl;dur={metrics.template_time * 1000:.1f}",
+    ]
+    for (name, result), count in sorted(metrics.cache.items()):
+        parts.append(f'cache-{name};desc="{result} x{count}"')
+    return ", ".join(parts)
+
+
+def _log_slow(request, view, duration, metrics):
+    threshold = slow_request_ms()
+    if threshold is None or duration * 1000 < threshold:
+        return
+    queries = "\n".join(f"  {elapsed * 1000:8.1f} мс  {sql}"
+                        for elapsed, sql in sorted(metrics.queries, reverse=True))
+    logger.warning(
+        "Медленный запрос %s %s (%s): %.1f мс, SQL: %d запросов за %.1f мс, шаблоны: %.1f мс\n%s",
+        request.method, request.get_full_path(), view, duration * 1000,
+        metrics.sql_count, metrics.sql_time * 1000, metrics.template_time * 1000, queries,
+    )
+
+
+class InstrumentationMiddleware:
+    """
+    Middleware замера запросов к views ``random_quote``.
+
+    Работает и в синхронном, и в асинхронном стеке. Запросы к другим
+    приложениям (админка, статика) и к эндпоинту метрик не учитываются.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not instrumentation_enabled():
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not instrumentation_enabled():
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    def _finish(self, request, response, metrics):
+        view = _view_name(request)
+        if view is None:
+            return response
+        duration = time.perf_counter() - metrics.started
+        registry.observe(view, request.method, response.status_code, duration, metrics)
+        if server_timing_enabled():
+            response["Server-Timing"] = _server_timing(metrics, duration)
+        _log_slow(request, view, duration, metrics)
+        return response
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+
+def render_prometheus():
+    """Накопленные метрики в текстовом формате экспозиции Prometheus."""
+    data = registry.snapshot()
+    lines = [
+        "# HELP random_quote_requests_total Запросы к views по методу и коду ответа.",
+        "# TYPE random_quote_requests_total counter",
+    ]
+    for (view, method, status), count in sorted(data["requests"].items()):
+        lines.append(f"random_quote_requests_total{{{_labels(view=view, method=method, status=status)}}} {count}")
+
+    lines += [
+        "# HELP random_quote_request_duration_seconds Время обработки запроса.",
+        "# TYPE random_quote_request_duration_seconds histogram",
+    ]
+    totals = defaultdict(int)
+    for (view, _, _), count in data["requests"].items():
+        totals[view] += count
+    for view, counts in sorted(data["buckets"].items()):
+        for bound, count in zip(BUCKETS, counts):
+            lines.append(f"random_quote_request_duration_seconds_bucket{{{_labels(view=view, le=bound)}}} {count}")
+        lines.append(f'random_quote_request_duration_seconds_bucket{{{_labels(view=view, le="+Inf")}}} '
+                     f"{totals[view]}")
+        lines.append(f"random_quote_request_duration_seconds_sum{{{_labels(view=view)}}} "
+                     f"{data['duration'][view]:.6f}")
+        lines.append(f"random_quote_request_duration_seconds_count{{{_labels(view=view)}}} {totals[view]}")
+
+    for name, key, help_text in (
+        ("random_quote_sql_queries_total", "sql_count", "SQL-запросы, выполненные views."),
+        ("random_quote_sql_duration_seconds_total", "sql_time", "Суммарное время SQL-запросов."),
+        ("random_quote_template_render_seconds_total", "template_time", "Суммарное время рендеринга шаблонов."),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for view, value in sorted(data[key].items()):
+            value = value if isinstance(value, int) else f"{value:.6f}"
+            lines.append(f"{name}{{{_labels(view=view)}}} {value}")
+
+    lines += [
+        "# HELP random_quote_cache_requests_total Обращения к кэшам страниц и дашборда.",
+        "# TYPE random_quote_cache_requests_total counter",
+    ]
+    for (name, result), count in sorted(data["cache"].items()):
+        lines.append(f"random_quote_cache_requests_total{{{_labels(cache=name, result=result)}}} {count}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,171 @@
+"""Топ цитат по лайкам без сортировки всей таблицы на каждый запрос.
+
+Содержит:
+- ``Leaderboard`` — ограниченный отсортированный список лучших цитат
+  (лайки ↓, вес ↓, просмотры ↓) в памяти процесса;
+- ``leaderboard`` — общий для процесса экземпляр.
+
+Холодный старт — один запрос по составному индексу
+``(-likes, -weight, -watches)``. Дальше список поддерживается
+инкрементально: реакции и правки цитат помечают ``quote_id`` как изменённые,
+а при следующем чтении их актуальные значения подтягиваются одним
+запросом по первичным ключам. Если изменений не было, чтение топа
+не обращается к БД.
+"""
+
+import bisect
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+from .db import PRIMARY
+from .models import Quote
+
+LeaderboardEntry = namedtuple(
+    "LeaderboardEntry", ["pk", "quote_text", "source", "likes", "weight", "watches", "updated_at"]
+)
+ENTRY_FIELDS = LeaderboardEntry._fields
+
+
+def _sort_key(entry):
+    # bisect работает по возрастанию, поэтому метрики берём со знаком минус.
+    return (-entry.likes, -entry.weight, -entry.watches, entry.pk)
+
+
+class Leaderboard:
+    """
+    Ограниченный топ цитат.
+
+    Хранит ``size + RANDOM_QUOTE_LEADERBOARD_SLACK`` лучших записей, чтобы
+    после дизлайков не приходилось сразу перечитывать топ из БД. ``floor`` —
+    ключ сортировки, не лучше которого гарантированно все цитаты вне списка;
+    запись, опустившаяся ниже ``floor``, выбывает из списка, и если
+    гарантированно верных записей становится меньше ``size``, топ
+    перечитывается из БД. Также топ перечитывается раз в
+    ``RANDOM_QUOTE_LEADERBOARD_TTL`` секунд — чтобы учесть изменения
+    из других процессов.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []
+        self._keys = []
+        self._floor = None
+        self._dirty = set()
+        self._loaded_at = None
+
+    @property
+    def size(self):
+        """Сколько записей топа показывается (N)."""
+        return getattr(settings, "RANDOM_QUOTE_LEADERBOARD_SIZE", 10)
+
+    @property
+    def capacity(self):
+        """Сколько записей хранится с запасом."""
+        return self.size + getattr(settings, "RANDOM_QUOTE_LEADERBOARD_SLACK", 10)
+
+    @property
+    def ttl(self):
+        return getattr(settings, "RANDOM_QUOTE_LEADERBOARD_TTL", 60)
+
+    def touch(self, quote_ids):
+        """Пометить цитаты изменёнными — их значения будут перечитаны при чтении топа."""
+        with self._lock:
+            self._dirty.update(quote_ids)
+
+    def discard(self, quote_id):
+        """Убрать удалённую цитату из топа."""
+        with self._lock:
+            self._dirty.discard(quote_id)
+            self._remove(quote_id)
+            self._check_complete()
+
+    def invalidate(self):
+        """Перечитать топ из БД при следующем обращении."""
+        with self._lock:
+            self._loaded_at = None
+
+    def top(self):
+        """
+        Вернуть текущий топ.
+
+        Returns:
+            list[LeaderboardEntry]: не более ``size`` записей в порядке убывания.
+        """
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+                self._load()
+            elif self._dirty:
+                self._merge_dirty()
+            return self._entries[:self.size]
+
+    def signature(self):
+        """Состав и порядок показываемого топа (``quote_id`` через запятую) — часть ключа кэша страницы."""
+        return ",".join(str(entry.pk) for entry in self.top())
+
+    def cached_top(self):
+        """
+        Вернуть топ, если он актуален без обращения к БД, иначе ``None``.
+
+        Используется асинхронными views: при ``None`` они вызывают ``top()``
+        в пуле потоков.
+        """
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl or self._dirty:
+                return None
+            return self._entries[:self.size]
+
+    def _load(self):
+        capacity = self.capacity
+        rows = list(
+            Quote.objects.order_by("-likes", "-weight", "-watches", "pk")
+            .values_list(*ENTRY_FIELDS)[:capacity + 1]
+        )
+        entries = [LeaderboardEntry(*row) for row in rows]
+        self._floor = _sort_key(entries[capacity]) if len(entries) > capacity else None
+        self._entries = entries[:capacity]
+        self._keys = [_sort_key(entry) for entry in self._entries]
+        self._dirty.clear()
+        self._loaded_at = time.monotonic()
+
+    def _merge_dirty(self):
+        dirty, self._dirty = self._dirty, set()
+        # Изменённые записи читаем с основной БД: реплика может отставать.
+        rows = Quote.objects.using(PRIMARY).filter(pk__in=list(dirty)).values_list(*ENTRY_FIELDS)
+        found = set()
+        for row in rows:
+            entry = LeaderboardEntry(*row)
+            found.add(entry.pk)
+            self._remove(entry.pk)
+            key = _sort_key(entry)
+            if self._floor is None or key <= self._floor:
+                i = bisect.bisect_left(self._keys, key)
+                self._keys.insert(i, key)
+                self._entries.insert(i, entry)
+        for quote_id in dirty - found:
+            self._remove(quote_id)
+
+        capacity = self.capacity
+        if len(self._entries) > capacity:
+            # Вытесненные записи уходят за границу списка — граница сдвигается вверх.
+            trimmed = self._keys[capacity]
+            self._floor = trimmed if self._floor is None else min(self._floor, trimmed)
+            del self._entries[capacity:]
+            del self._keys[capacity:]
+        self._check_complete()
+
+    def _remove(self, quote_id):
+        for i, entry in enumerate(self._entries):
+            if entry.pk == quote_id:
+                del self._entries[i]
+                del self._keys[i]
+                return
+
+    def _check_complete(self):
+        if self._floor is not None and len(self._entries) < self.size:
+            self._load()
+
+
+leaderboard = Leaderboard()
@@ -0,0 +1,26 @@
+"""Команда пересчёта хранимых показателей популярности цитат."""
+
+from django.core.management.base import BaseCommand
+
+from random_quote.models import Quote, backfill_scores
+
+
+class Command(BaseCommand):
+    """
+    ``manage.py backfill_quote_scores [--batch-size N]``
+
+    Пересчитывает ``Quote.popularity_score`` и ``like_percentage`` по текущим
+    лайкам, дизлайкам, просмотрам и весу — диапазонами ``quote_id`` по
+    ``--batch-size`` строк, одним ``UPDATE`` на диапазон. Миграция ``0008``
+    заполняет показатели сама; команда нужна после изменения метрик в обход
+    модели (ручной SQL, загрузка дампа) и безопасна для повторного запуска.
+    """
+    help = "Пересчитать хранимые popularity_score и like_percentage цитат."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Размер диапазона quote_id на один UPDATE (по умолчанию 1000).")
+
+    def handle(self, *args, **options):
+        updated = backfill_scores(Quote, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Показатели популярности пересчитаны: {updated} цитат(ы)."))
@@ -0,0 +1,112 @@
+"""Команда бенчмарка горячих путей приложения цитат."""
+
+import os
+import random
+import secrets
+import tempfile
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+
+from random_quote.benchmarks.datasets import parse_size, seed
+from random_quote.benchmarks.report import compare, load_report, metadata, write_report
+from random_quote.benchmarks.scenarios import default_scenarios, run_scenario
+from random_quote.counters import watches_buffer
+from random_quote.db import set_journal_mode
+
+
+class Command(BaseCommand):
+    """
+    ``manage.py benchmark [--sizes 1k 100k 1m] [--requests N] [--scenario ИМЯ ...]
+    [--output отчёт.json] [--compare старый.json]``
+
+    Создаёт отдельную тестовую БД, последовательно заполняет её синтетическими
+    наборами указанных размеров и для каждого набора измеряет сценарии из
+    ``benchmarks.scenarios``: задержки (p50/p95/p99), SQL-запросы на запрос
+    и пиковую память. Результат — JSON-отчёт (``--output``), который можно
+    сравнить с отчётом другого коммита (``--compare``).
+    Рабочая БД не затрагивается.
+    """
+    help = "Измерить задержки, число SQL-запросов и память горячих путей на синтетических данных."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", default=["1k", "100k", "1m"],
+                            help="Размеры наборов: 1k, 100k, 1m или число (по умолчанию все три).")
+        parser.add_argument("--requests", type=int, default=200, help="Запросов на сценарий (задержки).")
+        parser.add_argument("--warmup", type=int, default=10, help="Запросов прогрева на сценарий.")
+        parser.add_argument("--probe", type=int, default=20,
+                            help="Запросов на сценарий для замера SQL-запросов и памяти.")
+        parser.add_argument("--scenario", action="append", default=[],
+                            help="Измерять только указанные сценарии (можно несколько).")
+        parser.add_argument("--seed", type=int, default=0, help="Начальное значение генератора данных.")
+        parser.add_argument("--output", help="Файл JSON-отчёта (по умолчанию — только сводка).")
+        parser.add_argument("--compare", help="JSON-отчёт предыдущего прогона для сравнения.")
+        parser.add_argument("--db-name", help="Файл тестовой БД SQLite (по умолчанию во временном каталоге).")
+        parser.add_argument("--keepdb", action="store_true",
+                            help="Не удалять тестовую БД (повторный запуск досеет только недостающее).")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted({parse_size(size) for size in options["sizes"]})
+        except ValueError:
+            raise CommandError("Размер набора: 1k, 100k, 1m или целое число.")
+        baseline = load_report(options["compare"]) if options["compare"] else None
+
+        if connection.vendor == "sqlite":
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = options["db_name"] or os.path.join(
+                tempfile.gettempdir(), "random_quote_benchmark.sqlite3"
+            )
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options["keepdb"])
+        if connection.vendor == "sqlite":
+            set_journal_mode(connection, "wal")
+        try:
+            with override_settings(ALLOWED_HOSTS=["testserver"], RANDOM_QUOTE_READ_REPLICAS=[],
+                                   RANDOM_QUOTE_API_TOKEN=secrets.token_hex(16)):
+                report = self._run(sizes, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+
+        if options["output"]:
+            write_report(report, options["output"])
+            self.stdout.write(self.style.SUCCESS(f"Отчёт записан в {options['output']}."))
+        if baseline is not None:
+            self._print_comparison(compare(baseline, report))
+
+    def _run(self, sizes, options):
+        report = {"meta": metadata(), "datasets": {}}
+        client = Client()
+        rng = random.Random(options["seed"])
+        for size in sizes:
+            self.stdout.write(f"Набор {size}: заполнение…")
+            seconds = seed(size, seed_value=options["seed"])
+            cache.clear()
+            scenarios = default_scenarios(rng)
+            unknown = set(options["scenario"]) - {scenario.name for scenario in scenarios}
+            if unknown:
+                raise CommandError(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+
+            results = {}
+            for scenario in scenarios:
+                if options["scenario"] and scenario.name not in options["scenario"]:
+                    continue
+                results[scenario.name] = run_scenario(
+                    client, scenario, options["requests"], options["warmup"], options["probe"]
+                )
+                watches_buffer.flush()
+                result = results[scenario.name]
+                self.stdout.write(
+                    f"  {scenario.name:16} p50={result['p50_ms']:.2f} мс  p95={result['p95_ms']:.2f} мс  "
+                    f"p99={result['p99_ms']:.2f} мс  SQL={result['queries_mean']:.1f}  "
+                    f"память={result['peak_kib']:.0f} КиБ  ошибок={result['errors']}"
+                )
+            report["datasets"][str(size)] = {"seed_seconds": round(seconds, 2), "scenarios": results}
+        return report
+
+    def _print_comparison(self, rows):
+        self.stdout.write("Сравнение с предыдущим отчётом:")
+        for dataset, name, metric, was, now, change in rows:
+            line = f"  {dataset:>8} {name:16} {metric:12} {was:>10} → {now:<10} {change:+.1f}%"
+            style = self.style.ERROR if change > 10 else self.style.SUCCESS if change < -10 else str
+            self.stdout.write(style(line))
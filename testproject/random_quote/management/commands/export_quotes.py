@@ -0,0 +1,64 @@
+"""Команда потоковой выгрузки цитат в CSV/JSONL."""
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from random_quote.exporting import FORMATS, export_queryset, gzip_chunks, iter_export, parse_bound
+from random_quote.models import Quote
+
+
+class Command(BaseCommand):
+    """
+    ``manage.py export_quotes [--format csv|jsonl] [--output файл] [--gzip]
+    [--source-type Ф] [--created-from ДАТА] [--created-to ДАТА] [--min-likes N]``
+
+    Выгружает цитаты с метриками потоково (``.iterator``), без загрузки
+    таблицы в память. Без ``--output`` пишет в stdout.
+    """
+    help = "Выгрузить цитаты и метрики в CSV или JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=FORMATS, default="csv", help="Формат (по умолчанию csv).")
+        parser.add_argument("--output", help="Файл для записи (по умолчанию stdout).")
+        parser.add_argument("--gzip", action="store_true", help="Сжимать вывод gzip.")
+        parser.add_argument("--source-type", choices=[code for code, _ in Quote.SOURCE_CHOICES],
+                            help="Только цитаты указанного типа источника.")
+        parser.add_argument("--created-from", help="Созданные не раньше (YYYY-MM-DD или ISO 8601).")
+        parser.add_argument("--created-to", help="Созданные не позже (YYYY-MM-DD или ISO 8601).")
+        parser.add_argument("--min-likes", type=int, help="Минимальное число лайков.")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Размер пачки чтения из БД.")
+
+    def handle(self, *args, **options):
+        try:
+            created_from = parse_bound(options["created_from"])
+            created_to = parse_bound(options["created_to"], end=True)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        queryset = export_queryset(
+            source_type=options["source_type"],
+            created_from=created_from,
+            created_to=created_to,
+            min_likes=options["min_likes"],
+        )
+        chunks = iter_export(queryset, options["format"], chunk_size=options["chunk_size"])
+
+        if options["output"]:
+            mode = "wb" if options["gzip"] else "w"
+            encoding = None if options["gzip"] else "utf-8"
+            with open(options["output"], mode, encoding=encoding, newline=None if options["gzip"] else "") as out:
+                self._write(out, chunks, options["gzip"])
+        else:
+            out = sys.stdout.buffer if options["gzip"] else self.stdout
+            self._write(out, chunks, options["gzip"])
+
+    def _write(self, out, chunks, compress):
+        if compress:
+            for data in gzip_chunks(chunks):
+                out.write(data)
+            return
+        for chunk in chunks:
+            if out is self.stdout:
+                out.write(chunk, ending="")
+            else:
+                out.write(chunk)
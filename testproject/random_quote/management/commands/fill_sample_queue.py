@@ -0,0 +1,41 @@
+"""Команда прогрева и пополнения очереди заранее выбранных цитат."""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from random_quote.sample_queue import low_water, queue_size, sample_queue
+
+
+class Command(BaseCommand):
+    """
+    ``manage.py fill_sample_queue [--discard] [--watch SECONDS]``
+
+    Заполняет очередь ``sample_queue`` до ``RANDOM_QUOTE_SAMPLE_QUEUE_SIZE``
+    элементов (например, после деплоя). С ``--watch`` работает как отдельный
+    процесс пополнения: раз в указанное число секунд дополняет очередь, если
+    она опустилась ниже ``RANDOM_QUOTE_SAMPLE_QUEUE_LOW_WATER``. Имеет смысл
+    при общем для процессов кэше (Redis, Memcached).
+    """
+    help = "Заполнить очередь заранее выбранных случайных цитат в кэше."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--discard", action="store_true",
+                            help="Сначала сбросить текущую очередь.")
+        parser.add_argument("--watch", type=float, metavar="SECONDS",
+                            help="Не завершаться: проверять очередь с этим интервалом.")
+
+    def handle(self, *args, **options):
+        if options["discard"]:
+            sample_queue.discard()
+        added = sample_queue.refill()
+        self.stdout.write(self.style.SUCCESS(
+            f"В очередь добавлено {added}, в очереди {len(sample_queue)} из {queue_size()}."
+        ))
+        if not options["watch"]:
+            return
+        while True:
+            time.sleep(options["watch"])
+            if len(sample_queue) < low_water():
+                added = sample_queue.refill()
+                self.stdout.write(f"В очередь добавлено {added}.")
@@ -0,0 +1,31 @@
+"""Команда переноса шардированных счётчиков реакций в цитаты."""
+
+from django.core.management.base import BaseCommand
+
+from random_quote.reactions import fold_reaction_shards
+from random_quote.sharding import prune
+
+
+class Command(BaseCommand):
+    """
+    ``manage.py fold_reaction_shards [--no-prune]``
+
+    Переносит накопленные в ``QuoteCounterShard`` реакции горячих цитат в
+    ``Quote.likes``/``dislikes``/``weight`` и удаляет пустые шарды цитат,
+    которые больше не горячие. Обработчики реакций запускают перенос в
+    фоне (раз в ``RANDOM_QUOTE_SHARD_FOLD_INTERVAL`` секунд), но только пока
+    реакции поступают; команда по расписанию (cron, раз в минуту) переносит
+    остаток после спада. Повторный запуск безопасен.
+    """
+    help = "Перенести реакции из шардов счётчиков горячих цитат в цитаты."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--no-prune", action="store_true",
+                            help="Не удалять пустые шарды остывших цитат.")
+
+    def handle(self, *args, **options):
+        folded = fold_reaction_shards()
+        self.stdout.write(f"Перенесено реакций: {folded}.")
+        if not options["no_prune"]:
+            self.stdout.write(f"Удалено пустых шардов: {prune()}.")
+        self.stdout.write(self.style.SUCCESS("Готово."))
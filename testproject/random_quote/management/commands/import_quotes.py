@@ -0,0 +1,66 @@
+"""Команда массового импорта цитат из CSV/JSONL."""
+
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from random_quote.importing import QuoteImporter, read_rows
+
+
+class Command(BaseCommand):
+    """
+    ``manage.py import_quotes <файл|-> [--format csv|jsonl] [--batch-size N] [--rejects файл] [--dry-run]``
+
+    Потоково читает цитаты (поля ``quote_text``, ``source``, ``source_type``,
+    ``weight``), проверяет их по правилам ``QuoteForm`` и записывает пачками.
+    В конце выводит число прочитанных/импортированных/отклонённых строк,
+    скорость (строк в секунду) и причины отказов. Отклонённые строки
+    можно сохранить в JSONL (``--rejects``).
+    """
+    help = "Импортировать цитаты из CSV или JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу или «-» для stdin.")
+        parser.add_argument("--format", choices=("csv", "jsonl"),
+                            help="Формат входных данных (по умолчанию — по расширению файла).")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Размер пачки bulk_create (по умолчанию 1000).")
+        parser.add_argument("--rejects", help="Записать отклонённые строки с причиной в JSONL-файл.")
+        parser.add_argument("--dry-run", action="store_true", help="Только проверить, ничего не записывая.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть положительным.")
+
+        rejects = open(options["rejects"], "w", encoding="utf-8") if options["rejects"] else None
+
+        def on_reject(number, row, reason):
+            if rejects is not None:
+                rejects.write(json.dumps({"line": number, "reason": reason, "row": row}, ensure_ascii=False) + "\n")
+
+        importer = QuoteImporter(batch_size=options["batch_size"], dry_run=options["dry_run"], on_reject=on_reject)
+        try:
+            if path == "-":
+                importer.run(read_rows(sys.stdin, fmt))
+            else:
+                try:
+                    stream = open(path, encoding="utf-8", newline="")
+                except OSError as exc:
+                    raise CommandError(f"Не удалось открыть {path}: {exc}")
+                with stream:
+                    importer.run(read_rows(stream, fmt))
+        finally:
+            if rejects is not None:
+                rejects.close()
+
+        self.stdout.write(
+            f"Прочитано: {importer.read}, импортировано: {importer.imported}, "
+            f"отклонено: {importer.rejected_total}, "
+            f"{importer.rows_per_second:.0f} строк/с за {importer.elapsed:.2f} с"
+            + (" (пробный запуск)" if options["dry_run"] else "")
+        )
+        for reason, count in importer.rejected.most_common():
+            self.stdout.write(f"  {count} × {reason}")
@@ -0,0 +1,134 @@
+"""Команда нагрузочного прогона HTTP-эндпоинтов (сравнение WSGI и ASGI)."""
+
+import asyncio
+import json
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from random_quote.benchmarks.scenarios import percentile
+
+DEFAULT_PATHS = ("/", "/quotes/top/", "/quotes/dashboard/")
+
+
+async def _request(host, port, path, timeout):
+    """Один запрос ``GET`` (HTTP/1.1, ``Connection: close``); вернуть код ответа."""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode("ascii")
+        )
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    parts = status_line.split()
+    return int(parts[1]) if len(parts) > 1 else 0
+
+
+async def run_load(base_url, paths, requests, concurrency, timeout):
+    """
+    Выполнить ``requests`` запросов к ``paths`` по кругу не более чем в ``concurrency`` соединений.
+
+    Returns:
+        dict: ``requests``, ``errors``, ``statuses``, ``seconds``, ``rps``
+        и перцентили задержки ``p50``/``p95``/``p99`` в миллисекундах.
+    """
+    url = urlsplit(base_url)
+    host, port = url.hostname or "127.0.0.1", url.port or 80
+    prefix = url.path.rstrip("/")
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(prefix + paths[i % len(paths)])
+    latencies = []
+    statuses = Counter()
+
+    async def worker():
+        while True:
+            try:
+                path = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                status = await _request(host, port, path, timeout)
+            except (OSError, asyncio.TimeoutError):
+                status = 0
+            latencies.append(time.perf_counter() - started)
+            statuses[status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if not 200 <= status < 400)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "seconds": round(seconds, 3),
+        "rps": round(requests / seconds, 1) if seconds else 0.0,
+        "p50": round(percentile(latencies, 50) * 1000, 2),
+        "p95": round(percentile(latencies, 95) * 1000, 2),
+        "p99": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+class Command(BaseCommand):
+    """
+    ``manage.py loadtest [--target ИМЯ=URL ...] [--path ПУТЬ ...] [--requests N]
+    [--concurrency C] [--json]``
+
+    Нагружает уже запущенные серверы и печатает пропускную способность
+    (запросов в секунду), перцентили задержки и число ошибок по каждому.
+    Для сравнения WSGI и ASGI запустите приложение дважды, например::
+
+        gunicorn -w 1 --threads 8 -b 127.0.0.1:8000 testproject.wsgi
+        uvicorn --port 8001 testproject.asgi:application   # RANDOM_QUOTE_ASYNC_VIEWS = True
+
+    и выполните::
+
+        manage.py loadtest --target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001
+    """
+    help = "Нагрузочный прогон эндпоинтов цитат (сравнение WSGI и ASGI)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", action="append", default=[],
+                            help="Сервер в виде ИМЯ=URL (можно несколько; по умолчанию http://127.0.0.1:8000).")
+        parser.add_argument("--path", action="append", default=[],
+                            help="Путь для запросов (можно несколько; по умолчанию главная, топ и дашборд).")
+        parser.add_argument("--requests", type=int, default=1000, help="Число запросов на сервер.")
+        parser.add_argument("--concurrency", type=int, default=50, help="Число одновременных соединений.")
+        parser.add_argument("--timeout", type=float, default=10.0, help="Таймаут запроса в секундах.")
+        parser.add_argument("--json", action="store_true", help="Вывести результат в JSON.")
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options["target"] or ["http=http://127.0.0.1:8000"]:
+            name, sep, url = target.partition("=")
+            if not sep or not url.startswith("http://"):
+                raise CommandError(f"Ожидается ИМЯ=http://хост:порт, получено: {target}")
+            targets.append((name, url))
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests и --concurrency должны быть положительными.")
+        paths = options["path"] or list(DEFAULT_PATHS)
+
+        results = {}
+        for name, url in targets:
+            results[name] = asyncio.run(run_load(
+                url, paths, options["requests"], options["concurrency"], options["timeout"]
+            ))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+            return
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name}: {result['rps']} req/s, p50={result['p50']} мс, p95={result['p95']} мс, "
+                f"p99={result['p99']} мс, ошибок {result['errors']}/{result['requests']} "
+                f"(коды: {result['statuses']})"
+            )
@@ -0,0 +1,34 @@
+"""Команда перестройки и проверки материализованной статистики дашборда."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from random_quote.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    """
+    ``manage.py rebuild_quote_stats [--check]``
+
+    Пересчитывает ``QuoteStats`` с нуля агрегатами по таблице цитат и выводит
+    расхождения с сохранёнными значениями. С ``--check`` ничего не записывает
+    и завершается с ошибкой, если расхождения найдены (для мониторинга).
+    """
+    help = "Перестроить материализованную статистику цитат и показать расхождения."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true",
+                            help="Только проверить расхождения, не перезаписывая статистику.")
+
+    def handle(self, *args, **options):
+        drift = rebuild_stats(dry_run=options["check"])
+        for scope, key, name, saved, actual in drift:
+            self.stdout.write(f"{scope}:{key or '*'} {name}: сохранено {saved}, фактически {actual}")
+
+        if options["check"]:
+            if drift:
+                raise CommandError(f"Найдено расхождений: {len(drift)}.")
+            self.stdout.write(self.style.SUCCESS("Статистика совпадает с данными."))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Статистика перестроена (исправлено расхождений: {len(drift)})."
+            ))
@@ -0,0 +1,29 @@
+"""Команда перестройки полнотекстового индекса цитат."""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from random_quote import search
+
+
+class Command(BaseCommand):
+    """
+    ``manage.py rebuild_search_index [--database ALIAS]``
+
+    Создаёт недостающие структуры поиска (таблицу FTS5 и триггеры в SQLite,
+    GIN-индекс в PostgreSQL) и перестраивает индекс по текущему содержимому
+    таблицы цитат. Нужна после восстановления БД из дампа без этих
+    структур или при подозрении на рассинхронизацию индекса.
+    """
+    help = "Пересоздать и перестроить полнотекстовый индекс цитат."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Псевдоним БД (по умолчанию default).")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if search.backend(connection) is None:
+            raise CommandError(f"Полнотекстовый индекс не поддерживается для {connection.vendor}.")
+        search.install(connection)
+        search.rebuild(connection)
+        self.stdout.write(self.style.SUCCESS(f"Поисковый индекс перестроен ({search.backend(connection)})."))
@@ -0,0 +1,27 @@
+"""Команда пересчёта префиксных сумм весов для выбора цитаты средствами БД."""
+
+from django.core.management.base import BaseCommand
+
+from random_quote.sampling import rebuild_weight_blocks, weight_block_size
+
+
+class Command(BaseCommand):
+    """
+    ``manage.py rebuild_weight_index``
+
+    Полностью пересчитывает ``Quote.weight_block``/``weight_offset`` и таблицу
+    ``QuoteWeightBlock``. Нужна при включении ``RANDOM_QUOTE_SAMPLING = "database"``
+    на существующих данных, после смены ``RANDOM_QUOTE_WEIGHT_BLOCK_SIZE``
+    и после массовых изменений весов в обход сигналов модели.
+    """
+    help = "Пересчитать префиксные суммы весов цитат для выбора по весу в БД."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Размер пачки для чтения и bulk_update (по умолчанию 1000).")
+
+    def handle(self, *args, **options):
+        blocks = rebuild_weight_blocks(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Префиксные суммы пересчитаны: {blocks} блок(ов) по {weight_block_size()} id."
+        ))
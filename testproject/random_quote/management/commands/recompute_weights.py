@@ -0,0 +1,54 @@
+"""Команда пакетного пересчёта весов цитат по реакциям."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from random_quote.weighting import FORMULAS, recompute_weights
+
+
+def _quantile(histogram, share):
+    """Вес, ниже или равный которому у доли ``share`` цитат (по гистограмме)."""
+    target = share * sum(histogram)
+    seen = 0
+    for weight, count in enumerate(histogram):
+        seen += count
+        if seen >= target:
+            return weight
+    return len(histogram) - 1
+
+
+class Command(BaseCommand):
+    """
+    ``manage.py recompute_weights [--formula ИМЯ] [--prior-strength S] [--chunk-size N] [--dry-run]``
+
+    Выставляет вес каждой цитаты заново по её лайкам, дизлайкам и просмотрам
+    (см. ``random_quote.weighting``) вместо накопленных сдвигов ±1 от
+    реакций. Формулы: ``bayesian`` (по умолчанию, ``RANDOM_QUOTE_WEIGHT_FORMULA``),
+    ``wilson``, ``engagement``. Запускается по расписанию; после записи
+    сбрасывает индексы выбора случайной цитаты. Требует NumPy.
+    """
+    help = "Пересчитать веса цитат по реакциям векторной формулой."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--formula", choices=sorted(FORMULAS), help="Формула веса.")
+        parser.add_argument("--prior-strength", type=float,
+                            help="Сила априорного распределения (виртуальных реакций на цитату).")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Цитат в порции чтения (по умолчанию 5000).")
+        parser.add_argument("--dry-run", action="store_true", help="Только посчитать, ничего не записывая.")
+
+    def handle(self, *args, **options):
+        try:
+            result = recompute_weights(
+                formula=options["formula"], strength=options["prior_strength"],
+                chunk_size=options["chunk_size"], dry_run=options["dry_run"],
+            )
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+        histogram = result.histogram
+        mean = sum(weight * count for weight, count in enumerate(histogram)) / max(result.scanned, 1)
+        self.stdout.write(
+            f"Цитат: {result.scanned}, вес изменён у {result.changed}; средняя доля лайков {result.prior:.3f}.\n"
+            f"Новые веса: среднее {mean:.1f}, квартили {_quantile(histogram, 0.25)} / "
+            f"{_quantile(histogram, 0.5)} / {_quantile(histogram, 0.75)}, нулевых {histogram[0]}."
+        )
+        verb = "Посчитано (без записи)" if options["dry_run"] else "Веса пересчитаны"
+        self.stdout.write(self.style.SUCCESS(f"{verb} за {result.seconds:.2f} с."))
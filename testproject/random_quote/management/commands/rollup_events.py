@@ -0,0 +1,40 @@
+"""Команда свёртки журнала событий цитат и очистки старых данных."""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from random_quote.trending import compact, event_log, hour_of, rollup
+
+
+class Command(BaseCommand):
+    """
+    ``manage.py rollup_events [--since-hours N] [--no-compact]``
+
+    Сворачивает журнал ``QuoteEvent`` в почасовые ``QuoteHourlyRollup``
+    (с часа перед последним свёрнутым или за последние ``--since-hours``
+    часов, но не раньше первого сохранённого сырого события),
+    затем удаляет свёрнутые сырые события старше
+    ``RANDOM_QUOTE_EVENT_RETENTION_HOURS`` и свёртки старше
+    ``RANDOM_QUOTE_ROLLUP_RETENTION_HOURS``. Рассчитана на запуск по
+    расписанию (cron, раз в несколько минут); повторный запуск безопасен.
+    """
+    help = "Свернуть журнал событий цитат по часам и удалить устаревшие события."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since-hours", type=int,
+                            help="Пересчитать свёртку за столько последних часов "
+                                 "(не дальше хранимых сырых событий).")
+        parser.add_argument("--no-compact", action="store_true",
+                            help="Не удалять старые события и свёртки.")
+
+    def handle(self, *args, **options):
+        event_log.flush()
+        since_hour = None
+        if options["since_hours"] is not None:
+            since_hour = hour_of(timezone.now()) - options["since_hours"]
+        rows = rollup(since_hour)
+        self.stdout.write(f"Строк почасовой свёртки записано: {rows}.")
+        if not options["no_compact"]:
+            events, rollups = compact()
+            self.stdout.write(f"Удалено событий: {events}, строк свёртки: {rollups}.")
+        self.stdout.write(self.style.SUCCESS("Готово."))
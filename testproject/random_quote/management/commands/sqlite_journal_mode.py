@@ -0,0 +1,29 @@
+"""Команда смены режима журнала SQLite."""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from random_quote.db import JOURNAL_MODES, set_journal_mode
+
+
+class Command(BaseCommand):
+    """
+    ``manage.py sqlite_journal_mode [wal|delete|truncate|persist] [--database ALIAS]``
+
+    Режим журнала хранится в файле БД, поэтому меняется один раз, а не при
+    каждом подключении. WAL (по умолчанию) позволяет читать во время записи
+    счётчиков и реакций; ``delete`` возвращает обычный журнал (например,
+    перед копированием файла БД без ``-wal``/``-shm``).
+    """
+    help = "Сменить режим журнала SQLite (по умолчанию WAL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("mode", nargs="?", default="wal", choices=JOURNAL_MODES, help="Режим журнала.")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Псевдоним БД (по умолчанию default).")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if connection.vendor != "sqlite":
+            raise CommandError(f"Режим журнала меняется только для SQLite, а не для {connection.vendor}.")
+        mode = set_journal_mode(connection, options["mode"])
+        self.stdout.write(self.style.SUCCESS(f"Режим журнала: {mode}."))
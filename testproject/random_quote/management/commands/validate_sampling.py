@@ -0,0 +1,136 @@
+"""Команда проверки распределения стратегий взвешенного выбора."""
+
+import math
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from random_quote.models import Quote, QuoteWeightBlock, normalize_source, quote_text_hash
+from random_quote.sampling import ReferenceSampler, WeightedSampler, db_sampler, rebuild_weight_blocks
+from random_quote.sampling_checks import check_distribution, weight_cases
+
+STRATEGIES = ("reference", "memory", "memory_updated", "database")
+
+
+def memory_strategy(pairs):
+    """Процессный индекс, построенный сразу по итоговым весам."""
+    strategy = WeightedSampler(ttl=math.inf)
+    strategy.load(pairs)
+    return strategy
+
+
+def memory_updated_strategy(pairs):
+    """
+    Процессный индекс, приведённый к итоговым весам точечными обновлениями.
+
+    Индекс строится по перемешанным весам, затем каждый вес выставляется
+    через ``update``/``adjust`` — так проверяются инкрементальные изменения
+    дерева Фенвика, которые делают сигналы и реакции.
+    """
+    rng = random.Random(len(pairs))
+    shuffled = [weight for _, weight in pairs]
+    rng.shuffle(shuffled)
+    strategy = WeightedSampler(ttl=math.inf)
+    strategy.load((quote_id, weight) for (quote_id, _), weight in zip(pairs, shuffled))
+    for quote_id, weight in pairs:
+        strategy.adjust(quote_id, rng.randint(-10, 10))
+        strategy.update(quote_id, weight)
+    return strategy
+
+
+def database_strategy(pairs):
+    """Выбор средствами БД по префиксным суммам для цитат с весами ``pairs``."""
+    QuoteWeightBlock.objects.all().delete()
+    Quote.objects.all().delete()
+    quotes = []
+    for quote_id, weight in pairs:
+        text, source = f"Проверочная цитата {quote_id}", f"Источник {quote_id}"
+        quote = Quote(pk=quote_id, quote_text=text, source=source, weight=weight,
+                      source_key=normalize_source(source), text_hash=quote_text_hash(text))
+        quote.refresh_scores()
+        quotes.append(quote)
+    Quote.objects.bulk_create(quotes, batch_size=500)
+    rebuild_weight_blocks()
+    return db_sampler
+
+
+class Command(BaseCommand):
+    """
+    ``manage.py validate_sampling [--strategy ИМЯ ...] [--samples N] [--db-samples N] [--alpha A]``
+
+    Проверяет, что стратегии выбора цитаты сохраняют распределение исходного
+    ``random.choices``: вероятность пропорциональна ``max(0, weight)``, при
+    нулевых весах — равновероятный выбор. Для каждого набора весов из
+    ``sampling_checks.weight_cases`` стратегия делает N выборов, частоты
+    проверяются критериями хи-квадрат и Колмогорова–Смирнова.
+
+    Стратегии: ``reference`` (эталон), ``memory`` (``WeightedSampler``),
+    ``memory_updated`` (то же после точечных обновлений весов) и ``database``
+    (``DatabaseSampler``; выполняется в отдельной тестовой БД, выборов меньше —
+    каждый стоит нескольких запросов). Завершается ошибкой, если хоть одна
+    проверка не пройдена, поэтому подходит для CI. Требует NumPy.
+    """
+    help = "Проверить распределение стратегий взвешенного выбора (хи-квадрат и КС)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--strategy", action="append", choices=STRATEGIES, default=[],
+                            help="Проверяемые стратегии (по умолчанию все).")
+        parser.add_argument("--samples", type=int, default=1_000_000,
+                            help="Выборов на набор весов для стратегий в памяти.")
+        parser.add_argument("--db-samples", type=int, default=20_000,
+                            help="Выборов на набор весов для стратегии database.")
+        parser.add_argument("--size", type=int, default=500, help="Цитат в наборе весов.")
+        parser.add_argument("--alpha", type=float, default=1e-3, help="Уровень значимости критериев.")
+        parser.add_argument("--seed", type=int, help="Начальное значение генератора случайных чисел.")
+
+    def handle(self, *args, **options):
+        if options["seed"] is not None:
+            random.seed(options["seed"])
+        strategies = options["strategy"] or list(STRATEGIES)
+        cases = weight_cases(options["size"], seed=options["seed"] or 0)
+
+        results = []
+        in_memory = [name for name in strategies if name != "database"]
+        factories = {
+            "reference": ReferenceSampler,
+            "memory": memory_strategy,
+            "memory_updated": memory_updated_strategy,
+        }
+        for name in in_memory:
+            for case, pairs in cases.items():
+                results.append(self._check(name, case, pairs, factories[name](pairs), options["samples"], options))
+
+        if "database" in strategies:
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                for case, pairs in cases.items():
+                    strategy = database_strategy(pairs)
+                    results.append(self._check("database", case, pairs, strategy, options["db_samples"], options))
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        failed = [result for result in results if not result.passed]
+        if failed:
+            raise CommandError(f"Распределение не совпадает с весами: {len(failed)} из {len(results)} проверок.")
+        self.stdout.write(self.style.SUCCESS(f"Все проверки пройдены: {len(results)}."))
+
+    def _check(self, name, case, pairs, strategy, samples, options):
+        started = time.monotonic()
+        try:
+            draws = strategy.draw(samples)
+            result = check_distribution(
+                [quote_id for quote_id, _ in pairs], [weight for _, weight in pairs], draws,
+                alpha=options["alpha"], case=case, strategy=name,
+            )
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.monotonic() - started
+        style = self.style.SUCCESS if result.passed else self.style.ERROR
+        self.stdout.write(style(
+            f"{name:15} {case:11} n={result.samples:<8} χ²={result.chi2:<10} df={result.dof:<4} "
+            f"p={result.p_value:.4f}  KS={result.ks:.5f} (≤{result.ks_limit:.5f})  "
+            f"нулевых={result.zero_hits}  {elapsed:.1f} с  {'OK' if result.passed else 'ОШИБКА'}"
+        ))
+        return result
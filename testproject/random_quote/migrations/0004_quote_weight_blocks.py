@@ -0,0 +1,69 @@
+# Generated by Django 4.2.23 on 2026-10-17 20:34
+
+from django.db import migrations, models
+
+
+# Размер блока на момент миграции (``RANDOM_QUOTE_WEIGHT_BLOCK_SIZE`` по умолчанию).
+# Если в настройках задан другой размер, индекс перестраивается командой
+# ``rebuild_weight_index``. Код заморожен: миграция не зависит от текущего
+# ``random_quote.sampling``.
+BLOCK_SIZE = 1000
+BATCH_SIZE = 1000
+
+
+def backfill_weight_blocks(apps, schema_editor):
+    Quote = apps.get_model('random_quote', 'Quote')
+    QuoteWeightBlock = apps.get_model('random_quote', 'QuoteWeightBlock')
+    totals = {}
+    changed = []
+    rows = Quote.objects.order_by('pk').values_list('pk', 'weight')
+    for pk, weight in rows.iterator(chunk_size=BATCH_SIZE):
+        block = pk // BLOCK_SIZE
+        offset = totals.get(block, 0)
+        totals[block] = offset + max(0, weight)
+        changed.append(Quote(pk=pk, weight_block=block, weight_offset=offset))
+        if len(changed) >= BATCH_SIZE:
+            Quote.objects.bulk_update(changed, ['weight_block', 'weight_offset'])
+            changed = []
+    if changed:
+        Quote.objects.bulk_update(changed, ['weight_block', 'weight_offset'])
+
+    start = 0
+    blocks = []
+    for block in sorted(totals):
+        blocks.append(QuoteWeightBlock(block_id=block, start=start, total=totals[block]))
+        start += totals[block]
+    QuoteWeightBlock.objects.bulk_create(blocks, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('random_quote', '0003_alter_quote_options_quote_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuoteWeightBlock',
+            fields=[
+                ('block_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('start', models.BigIntegerField(db_index=True, default=0)),
+                ('total', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='quote',
+            name='weight_block',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='quote',
+            name='weight_offset',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['weight_block', 'weight_offset'], name='random_quot_weight__ced7b3_idx'),
+        ),
+        migrations.RunPython(backfill_weight_blocks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.23 on 2026-10-17 20:38
+
+from django.db import migrations, models
+
+
+# Код заморожен: миграция не зависит от текущего ``random_quote.stats``.
+GLOBAL, SOURCE_TYPE, SOURCE = 'g', 't', 's'
+
+
+def backfill_quote_stats(apps, schema_editor):
+    from django.db.models import Count, Sum
+
+    Quote = apps.get_model('random_quote', 'Quote')
+    QuoteStats = apps.get_model('random_quote', 'QuoteStats')
+    aggregates = dict(
+        quotes=Count('pk'),
+        watches=Sum('watches'),
+        likes=Sum('likes'),
+        dislikes=Sum('dislikes'),
+        weight_sum=Sum('weight'),
+    )
+
+    def stats(scope, key, row):
+        return QuoteStats(scope=scope, key=key, **{name: row[name] or 0 for name in aggregates})
+
+    rows = [stats(GLOBAL, '', Quote.objects.aggregate(**aggregates))]
+    for field, scope in (('source_type', SOURCE_TYPE), ('source', SOURCE)):
+        for row in Quote.objects.order_by().values(field).annotate(**aggregates):
+            rows.append(stats(scope, row[field], row))
+    QuoteStats.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('random_quote', '0004_quote_weight_blocks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuoteStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('g', 'Все цитаты'), ('t', 'Тип источника'), ('s', 'Источник')], max_length=1)),
+                ('key', models.CharField(blank=True, default='', max_length=100)),
+                ('quotes', models.BigIntegerField(default=0)),
+                ('watches', models.BigIntegerField(default=0)),
+                ('likes', models.BigIntegerField(default=0)),
+                ('dislikes', models.BigIntegerField(default=0)),
+                ('weight_sum', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['scope', 'likes'], name='random_quot_scope_d64eea_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='quotestats',
+            constraint=models.UniqueConstraint(fields=('scope', 'key'), name='random_quote_stats_scope_key_uniq'),
+        ),
+        migrations.RunPython(backfill_quote_stats, migrations.RunPython.noop),
+    ]
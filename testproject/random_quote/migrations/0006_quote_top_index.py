@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-17 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('random_quote', '0005_quote_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['-likes', '-weight', '-watches'], name='random_quote_top_idx'),
+        ),
+    ]
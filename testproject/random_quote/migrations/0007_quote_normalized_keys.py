@@ -0,0 +1,62 @@
+# Generated by Django 4.2.23 on 2026-10-17 20:42
+
+import hashlib
+
+from django.db import migrations, models
+
+
+# Нормализация на момент миграции (заморожена: миграция не зависит от
+# текущего ``random_quote.models``). ``casefold`` может удлинить строку
+# источника (до 100 символов) втрое, поэтому колонка ключа — 300 символов.
+def normalize_source(source):
+    return (source or '').strip().casefold()
+
+
+def quote_text_hash(quote_text):
+    return hashlib.sha256((quote_text or '').strip().casefold().encode('utf-8')).hexdigest()
+
+
+def backfill_normalized_keys(apps, schema_editor):
+    Quote = apps.get_model('random_quote', 'Quote')
+    seen = {}
+    batch = []
+    rows = Quote.objects.order_by('pk').values_list('pk', 'source', 'quote_text')
+    for pk, source, quote_text in rows.iterator(chunk_size=1000):
+        key = (normalize_source(source), quote_text_hash(quote_text))
+        if key in seen:
+            raise RuntimeError(
+                f"Цитаты {seen[key]} и {pk} совпадают без учёта регистра в пределах "
+                f"источника «{source}»; удалите дубликат перед миграцией."
+            )
+        seen[key] = pk
+        batch.append(Quote(pk=pk, source_key=key[0], text_hash=key[1]))
+        if len(batch) >= 1000:
+            Quote.objects.bulk_update(batch, ['source_key', 'text_hash'])
+            batch = []
+    if batch:
+        Quote.objects.bulk_update(batch, ['source_key', 'text_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('random_quote', '0006_quote_top_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quote',
+            name='source_key',
+            field=models.CharField(default='', editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='quote',
+            name='text_hash',
+            field=models.CharField(default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(backfill_normalized_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='quote',
+            constraint=models.UniqueConstraint(fields=('source_key', 'text_hash'), name='random_quote_unique_per_source'),
+        ),
+    ]
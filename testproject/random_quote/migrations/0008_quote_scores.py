@@ -0,0 +1,66 @@
+# Generated by Django 4.2.23 on 2026-10-17 21:01
+
+from django.db import migrations, models
+
+
+# Формулы показателей на момент миграции (заморожены: миграция не зависит
+# от текущего ``random_quote.models``).
+BATCH_SIZE = 1000
+
+
+def score_expressions():
+    from django.db.models import Case, ExpressionWrapper, F, FloatField, Value, When
+    from django.db.models.functions import Floor
+    from django.db.models.lookups import GreaterThan
+
+    reactions = F('likes') + F('dislikes')
+    return {
+        'popularity_score': ExpressionWrapper(
+            F('likes') * Value(3.0) + F('watches') * Value(0.1) + F('weight') * Value(0.5) - F('dislikes') * Value(1.0),
+            output_field=FloatField(),
+        ),
+        'like_percentage': Case(
+            When(GreaterThan(reactions, 0),
+                 then=Floor(F('likes') * Value(1000.0) / reactions + Value(0.5)) / Value(10.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+    }
+
+
+def backfill_quote_scores(apps, schema_editor):
+    Quote = apps.get_model('random_quote', 'Quote')
+    bounds = Quote.objects.aggregate(low=models.Min('pk'), high=models.Max('pk'))
+    if bounds['low'] is None:
+        return
+    for start in range(bounds['low'], bounds['high'] + 1, BATCH_SIZE):
+        Quote.objects.filter(pk__gte=start, pk__lt=start + BATCH_SIZE).update(**score_expressions())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('random_quote', '0007_quote_normalized_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quote',
+            name='like_percentage',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='quote',
+            name='popularity_score',
+            field=models.FloatField(default=0.5, editable=False),
+        ),
+        migrations.RunPython(backfill_quote_scores, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['-popularity_score', '-quote_id'], name='random_quote_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['-like_percentage', '-likes', '-quote_id'], name='random_quote_like_ratio_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.23 on 2026-10-17 21:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('random_quote', '0008_quote_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuoteEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quote_id', models.IntegerField()),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Лайк'), (2, 'Дизлайк'), (3, 'Просмотр')])),
+                ('count', models.IntegerField(default=1)),
+                ('created_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuoteHourlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quote_id', models.IntegerField()),
+                ('hour', models.IntegerField()),
+                ('likes', models.IntegerField(default=0)),
+                ('dislikes', models.IntegerField(default=0)),
+                ('watches', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='quotehourlyrollup',
+            constraint=models.UniqueConstraint(fields=('hour', 'quote_id'), name='random_quote_rollup_hour_quote_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='quoteevent',
+            index=models.Index(fields=['created_at'], name='random_quot_created_1fd43b_idx'),
+        ),
+    ]
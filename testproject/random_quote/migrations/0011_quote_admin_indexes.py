@@ -0,0 +1,25 @@
+# Generated by Django 4.2.23 on 2026-10-17 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('random_quote', '0010_quote_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='quote',
+            name='random_quote_top_idx',
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['-likes', '-weight', '-watches', 'quote_id'], name='random_quote_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['-created_at', '-quote_id'], name='random_quote_created_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.23 on 2026-10-17 21:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('random_quote', '0011_quote_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuoteCounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('likes', models.IntegerField(default=0)),
+                ('dislikes', models.IntegerField(default=0)),
+                ('quote', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='counter_shards', to='random_quote.quote')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='quotecountershard',
+            constraint=models.UniqueConstraint(fields=('quote', 'shard'), name='random_quote_shard_quote_uniq'),
+        ),
+    ]
@@ -1,5 +1,98 @@
+import hashlib
+import math
+
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Value, When
+from django.db.models.functions import Floor
+from django.db.models.lookups import GreaterThan
+
+
+# ``casefold`` превращает символ не больше чем в три (ß → ss, ΐ → ΐ),
+# поэтому ключ источника длиной до 100 символов помещается в 300.
+SOURCE_KEY_LENGTH = 300
+
+
+def normalize_source(source):
+    """Ключ источника для сравнения без учёта регистра и краевых пробелов."""
+    return (source or "").strip().casefold()
+
+
+def quote_text_hash(quote_text):
+    """SHA-256 нормализованного (strip + casefold) текста цитаты."""
+    return hashlib.sha256((quote_text or "").strip().casefold().encode("utf-8")).hexdigest()
+
+
+def popularity_score(likes, dislikes, watches, weight):
+    """
+    Комплексный показатель популярности.
+    Формула:
+        (likes * 3) + (watches * 0.1) + (weight * 0.5) - (dislikes * 1)
+    """
+    return (likes * 3) + (watches * 0.1) + (weight * 0.5) - (dislikes * 1)
+
+
+def like_percentage(likes, dislikes):
+    """
+    Доля лайков среди всех реакций в процентах, округлённая до 0.1 (половины — вверх).
+    Возвращает 0, если реакций нет.
+    """
+    if likes + dislikes <= 0:
+        return 0.0
+    return math.floor(likes * 1000 / (likes + dislikes) + 0.5) / 10
+
+
+def score_expressions(likes=None, dislikes=None, watches=None, weight=None):
+    """
+    SQL-выражения ``popularity_score`` и ``like_percentage`` для ``UPDATE``.
+
+    Повторяют ``popularity_score()``/``like_percentage()``. По умолчанию
+    считаются по текущим значениям колонок; чтобы пересчитать показатели
+    тем же ``UPDATE``, что меняет метрики, передайте выражения новых
+    значений (в ``SET`` колонки читаются до изменения).
+
+    Returns:
+        dict: ``{"popularity_score": ..., "like_percentage": ...}`` для ``update(**...)``.
+    """
+    likes = F("likes") if likes is None else likes
+    dislikes = F("dislikes") if dislikes is None else dislikes
+    watches = F("watches") if watches is None else watches
+    weight = F("weight") if weight is None else weight
+    reactions = likes + dislikes
+    return {
+        "popularity_score": ExpressionWrapper(
+            likes * Value(3.0) + watches * Value(0.1) + weight * Value(0.5) - dislikes * Value(1.0),
+            output_field=FloatField(),
+        ),
+        "like_percentage": Case(
+            When(GreaterThan(reactions, 0),
+                 then=Floor(likes * Value(1000.0) / reactions + Value(0.5)) / Value(10.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+    }
+
+
+def backfill_scores(model, batch_size=1000):
+    """
+    Пересчитать хранимые показатели популярности всех цитат.
+
+    Выполняется по диапазонам ``quote_id`` по ``batch_size`` штук — по одному
+    ``UPDATE`` на диапазон, без чтения строк в Python, поэтому большие таблицы
+    не блокируются целиком. ``model`` — модель цитат (в миграциях —
+    историческая).
+
+    Returns:
+        int: число обновлённых строк.
+    """
+    bounds = model.objects.aggregate(low=models.Min("pk"), high=models.Max("pk"))
+    if bounds["low"] is None:
+        return 0
+    updated = 0
+    for start in range(bounds["low"], bounds["high"] + 1, batch_size):
+        updated += model.objects.filter(pk__gte=start, pk__lt=start + batch_size).update(**score_expressions())
+    return updated
+
 
 class Quote(models.Model):
     """Модель цитаты.
@@ -15,6 +108,13 @@ class Quote(models.Model):
             - weight (IntegerField): «вес» цитаты, влияет на частоту показа.
             - watches/likes/dislikes (IntegerField): метрики вовлечённости.
             - created_at/updated_at (DateTimeField): системные временные метки.
+            - source_key/text_hash: нормализованный источник и хэш нормализованного текста
+              для быстрых проверок дубликатов и лимита цитат на источник.
+            - weight_block/weight_offset: служебные поля выбора по весу средствами БД
+              (номер блока и сумма весов предыдущих цитат блока), см. ``QuoteWeightBlock``.
+            - popularity_score/like_percentage (FloatField): хранимые показатели
+              популярности и доли лайков для рейтингов по индексу; обновляются
+              тем же ``UPDATE``, что меняет метрики (см. ``score_expressions``).
 
         Примечания:
             - Для экземпляра модели `quote.get_source_type_display()` вернёт локализованную
@@ -48,11 +148,44 @@ class Quote(models.Model):
     dislikes = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    source_key = models.CharField(max_length=SOURCE_KEY_LENGTH, default="", editable=False)
+    text_hash = models.CharField(max_length=64, default="", editable=False)
+    weight_block = models.IntegerField(default=0, editable=False)
+    weight_offset = models.BigIntegerField(default=0, editable=False)
+    popularity_score = models.FloatField(default=0.5, editable=False)
+    like_percentage = models.FloatField(default=0.0, editable=False)
+
+    METRIC_FIELDS = {"likes", "dislikes", "watches", "weight"}
+    SCORE_FIELDS = {"popularity_score", "like_percentage"}
+    RANKINGS = {
+        "popularity": ("-popularity_score", "-quote_id"),
+        "like_ratio": ("-like_percentage", "-likes", "-quote_id"),
+    }
 
     """Строковое представление модели — возвращает текст цитаты."""
     def __str__(self):
         return self.quote_text
 
+    """Сохранение с пересчётом нормализованных полей и хранимых показателей популярности."""
+    def save(self, *args, **kwargs):
+        self.source_key = normalize_source(self.source)
+        self.text_hash = quote_text_hash(self.quote_text)
+        self.refresh_scores()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if update_fields & {"source", "quote_text"}:
+                update_fields |= {"source_key", "text_hash"}
+            if update_fields & self.METRIC_FIELDS:
+                update_fields |= self.SCORE_FIELDS
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
+    def refresh_scores(self):
+        """Пересчитать ``popularity_score``/``like_percentage`` по метрикам экземпляра (нужно перед ``bulk_create``)."""
+        self.popularity_score = popularity_score(self.likes, self.dislikes, self.watches, self.weight)
+        self.like_percentage = like_percentage(self.likes, self.dislikes)
+
     class Meta:
         """Метаданные модели.
 
@@ -61,12 +194,30 @@ class Quote(models.Model):
                затем по весу (убыв.), затем по просмотрам (убыв.).
 
            indexes:
-               Индексы для ускорения выборок/агрегаций по полям weight, likes и source."""
+               Индексы для ускорения выборок/агрегаций по полям weight, likes и source,
+               составной индекс (weight_block, weight_offset) для выбора по весу в БД,
+               составной индекс под сортировку по умолчанию с ``quote_id`` для
+               однозначного порядка (топ цитат, список в админке), индекс по дате
+               создания (последние цитаты, фильтр админки) и индексы рейтингов
+               по популярности и доле лайков (``RANKINGS``).
+
+           constraints:
+               Уникальность цитаты в пределах источника без учёта регистра
+               (source_key, text_hash); индекс ограничения обслуживает и проверку
+               лимита цитат на источник."""
         ordering = ['-likes', '-weight', '-watches']
         indexes = [
             models.Index(fields=['weight']),
             models.Index(fields=['likes']),
             models.Index(fields=['source']),
+            models.Index(fields=['weight_block', 'weight_offset']),
+            models.Index(fields=['-likes', '-weight', '-watches', 'quote_id'], name='random_quote_top_idx'),
+            models.Index(fields=['-created_at', '-quote_id'], name='random_quote_created_idx'),
+            models.Index(fields=['-popularity_score', '-quote_id'], name='random_quote_popularity_idx'),
+            models.Index(fields=['-like_percentage', '-likes', '-quote_id'], name='random_quote_like_ratio_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['source_key', 'text_hash'], name='random_quote_unique_per_source'),
         ]
 
     @property
@@ -74,25 +225,6 @@ class Quote(models.Model):
         """Общее количество реакций (лайки + дизлайки)"""
         return self.likes + self.dislikes
 
-    @property
-    def like_percentage(self):
-        """
-        Доля лайков среди всех реакций в процентах, округлённая до 0.1.
-        Возвращает 0, если реакций нет (деление на ноль предотвращено).
-        """
-        if self.total_reactions == 0:
-            return 0
-        return round((self.likes / self.total_reactions) * 100, 1)
-
-    @property
-    def popularity_score(self):
-        """
-        Комплексный показатель популярности
-        Формула:
-            (likes * 3) + (watches * 0.1) + (weight * 0.5) - (dislikes * 1)
-        """
-        return (self.likes * 3) + (self.watches * 0.1) + (self.weight * 0.5) - (self.dislikes * 1)
-
     def get_short_text(self, max_length=100):
         """Получить сокращенный текст цитаты
 
@@ -108,7 +240,207 @@ class Quote(models.Model):
         return self.quote_text[:max_length-3] + "..."
 
 
+    @classmethod
+    def ranked(cls, by="popularity"):
+        """QuerySet цитат в порядке рейтинга ``by`` (ключ ``RANKINGS``) — для ``ORDER BY ... LIMIT`` по индексу."""
+        return cls.objects.order_by(*cls.RANKINGS[by])
+
     @classmethod
     def get_quotes_by_source_count(cls, source):
-        """Получить количество цитат для источника"""
-        return cls.objects.filter(source__iexact=source).count()
\ No newline at end of file
+        """Получить количество цитат для источника (без учёта регистра, по индексу)"""
+        return cls.objects.filter(source_key=normalize_source(source)).count()
+
+class QuoteWeightBlock(models.Model):
+    """Блок префиксных сумм весов для выбора случайной цитаты средствами БД.
+
+        Цитаты разбиты на блоки по ``quote_id // RANDOM_QUOTE_WEIGHT_BLOCK_SIZE``.
+        Для каждого блока хранится суммарный вес его цитат и сумма весов всех
+        предыдущих блоков; внутри блока смещение цитаты хранится в
+        ``Quote.weight_offset``. Так взвешенный выбор сводится к двум индексным
+        поискам по диапазону, а изменение веса одной цитаты затрагивает только
+        её блок и строки следующих блоков (а не всю таблицу цитат).
+
+        Основные поля:
+            - block_id (IntegerField): номер блока.
+            - start (BigIntegerField): сумма весов всех предыдущих блоков.
+            - total (BigIntegerField): суммарный вес цитат блока.
+        """
+    block_id = models.IntegerField(primary_key=True)
+    start = models.BigIntegerField(default=0, db_index=True)
+    total = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Блок {self.block_id}: [{self.start}; {self.start + self.total})"
+
+
+class QuoteStats(models.Model):
+    """Материализованная статистика по цитатам для дашборда.
+
+        Хранит заранее посчитанные суммы по всем цитатам (``scope = GLOBAL``),
+        по типам источников (``SOURCE_TYPE``, ключ — код типа) и по источникам
+        (``SOURCE``, ключ — название источника). Строки обновляются
+        инкрементально при создании/изменении/удалении цитат, реакциях и
+        сбросе счётчика просмотров, поэтому дашборд читает несколько строк
+        вместо агрегатов по всей таблице. Перестройка и проверка расхождений —
+        команда ``rebuild_quote_stats``.
+
+        Основные поля:
+            - scope (CharField, choices): уровень агрегации.
+            - key (CharField): код типа источника, название источника или пустая строка.
+            - quotes (BigIntegerField): количество цитат.
+            - watches/likes/dislikes (BigIntegerField): суммы метрик.
+            - weight_sum (BigIntegerField): сумма весов (для среднего веса).
+        """
+    GLOBAL = "g"
+    SOURCE_TYPE = "t"
+    SOURCE = "s"
+    SCOPE_CHOICES = (
+        (GLOBAL, 'Все цитаты'),
+        (SOURCE_TYPE, 'Тип источника'),
+        (SOURCE, 'Источник'),
+    )
+    METRICS = ('quotes', 'watches', 'likes', 'dislikes', 'weight_sum')
+
+    scope = models.CharField(max_length=1, choices=SCOPE_CHOICES)
+    key = models.CharField(max_length=100, blank=True, default="")
+    quotes = models.BigIntegerField(default=0)
+    watches = models.BigIntegerField(default=0)
+    likes = models.BigIntegerField(default=0)
+    dislikes = models.BigIntegerField(default=0)
+    weight_sum = models.BigIntegerField(default=0)
+
+    class Meta:
+        """Метаданные модели.
+
+           constraints:
+               Одна строка на пару (scope, key).
+
+           indexes:
+               Индекс (scope, likes) для выборки топ-источников по лайкам."""
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='random_quote_stats_scope_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['scope', 'likes']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_scope_display()} {self.key}".strip()
+
+    @property
+    def avg_weight(self):
+        """Средний вес цитат строки (0, если цитат нет)."""
+        if not self.quotes:
+            return 0
+        return self.weight_sum / self.quotes
+
+
+class QuoteEvent(models.Model):
+    """Журнал реакций и просмотров цитат (только добавление).
+
+        Строки пишутся пачками при сбросе буферов (``trending.event_log`` для
+        реакций, ``counters.watches_buffer`` для просмотров): одна строка —
+        сколько событий одного вида получила цитата за период сброса, поэтому
+        журнал компактен. Задача ``manage.py rollup_events`` сворачивает его
+        в почасовые ``QuoteHourlyRollup`` и удаляет старые строки.
+
+        Основные поля:
+            - quote_id (IntegerField): цитата (без внешнего ключа — журнал не
+              участвует в каскадном удалении и не блокирует строки цитат).
+            - kind (PositiveSmallIntegerField, choices): лайк, дизлайк или просмотр.
+            - count (IntegerField): количество событий.
+            - created_at (DateTimeField): время записи пачки.
+        """
+    LIKE = 1
+    DISLIKE = 2
+    VIEW = 3
+    KIND_CHOICES = (
+        (LIKE, 'Лайк'),
+        (DISLIKE, 'Дизлайк'),
+        (VIEW, 'Просмотр'),
+    )
+
+    quote_id = models.IntegerField()
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES)
+    count = models.IntegerField(default=1)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        """Метаданные модели.
+
+           indexes:
+               Индекс по created_at для свёртки последних часов и удаления
+               старых строк диапазоном."""
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} ×{self.count}: цитата {self.quote_id}"
+
+
+class QuoteHourlyRollup(models.Model):
+    """Почасовая свёртка журнала ``QuoteEvent``.
+
+        Одна строка на цитату и час, в котором у неё были события; по этим
+        строкам считается рейтинг «в тренде» с экспоненциальным затуханием
+        (см. ``trending``).
+
+        Основные поля:
+            - quote_id (IntegerField): цитата.
+            - hour (IntegerField): номер часа от начала эпохи Unix (UTC).
+            - likes/dislikes/watches (IntegerField): события за час.
+        """
+    quote_id = models.IntegerField()
+    hour = models.IntegerField()
+    likes = models.IntegerField(default=0)
+    dislikes = models.IntegerField(default=0)
+    watches = models.IntegerField(default=0)
+
+    class Meta:
+        """Метаданные модели.
+
+           constraints:
+               Одна строка на пару (hour, quote_id); индекс ограничения
+               обслуживает выборку окна последних часов."""
+        constraints = [
+            models.UniqueConstraint(fields=['hour', 'quote_id'], name='random_quote_rollup_hour_quote_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Цитата {self.quote_id}, час {self.hour}"
+
+
+class QuoteCounterShard(models.Model):
+    """Часть счётчика реакций «горячей» цитаты.
+
+        Пока цитата считается горячей (см. ``sharding``), лайки и дизлайки
+        прибавляются к одной из ``RANDOM_QUOTE_REACTION_SHARDS`` строк,
+        выбранной случайно, а не к строке ``Quote``: одновременные реакции
+        не ждут блокировки одной строки и не перестраивают индексы цитат.
+        Накопленное периодически переносится в ``Quote.likes``/``dislikes``/``weight``
+        и вычитается из шардов.
+
+        Основные поля:
+            - quote (ForeignKey): цитата (шарды удаляются вместе с ней).
+            - shard (PositiveSmallIntegerField): номер шарда, 0..N-1.
+            - likes/dislikes (IntegerField): ещё не перенесённые реакции.
+        """
+    # Отдельный индекс по quote не нужен — его заменяет ограничение уникальности.
+    quote = models.ForeignKey(Quote, on_delete=models.CASCADE, related_name='counter_shards', db_index=False)
+    shard = models.PositiveSmallIntegerField()
+    likes = models.IntegerField(default=0)
+    dislikes = models.IntegerField(default=0)
+
+    class Meta:
+        """Метаданные модели.
+
+           constraints:
+               Одна строка на пару (quote, shard); индекс ограничения
+               обслуживает запись в шард и суммирование по цитате."""
+        constraints = [
+            models.UniqueConstraint(fields=['quote', 'shard'], name='random_quote_shard_quote_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Цитата {self.quote_id}, шард {self.shard}"
@@ -0,0 +1,74 @@
+"""Пагинация больших списков цитат без точного ``COUNT(*)``.
+
+``EstimatedCountPaginator`` (список цитат в админке) определяет число
+записей так:
+
+- без фильтров — из материализованной статистики ``QuoteStats``
+  (строка ``GLOBAL``, одно чтение по индексу), а при выключенной
+  статистике в PostgreSQL — из ``pg_class.reltuples``;
+- с фильтрами или поиском — ограниченным подсчётом
+  ``COUNT(*) FROM (... LIMIT N+1)``, где N — ``RANDOM_QUOTE_ADMIN_EXACT_COUNT_LIMIT``;
+  если строк больше, в PostgreSQL берётся оценка планировщика, иначе — N+1
+  (страниц показывается не больше, чем помещается в этот предел).
+"""
+
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .models import QuoteStats
+from .stats import use_materialized_stats
+
+
+def exact_count_limit():
+    """До скольких записей список считается точно."""
+    return getattr(settings, "RANDOM_QUOTE_ADMIN_EXACT_COUNT_LIMIT", 10000)
+
+
+def _planner_estimate(queryset):
+    """Оценка числа строк планировщиком PostgreSQL (``None`` для других СУБД)."""
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _table_estimate(queryset):
+    """Число строк всей таблицы без сканирования (``None``, если оценки нет)."""
+    if use_materialized_stats():
+        row = QuoteStats.objects.filter(scope=QuoteStats.GLOBAL, key="").values_list("quotes", flat=True).first()
+        if row is not None:
+            return row
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)",
+                           [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] and row[0] > 0:
+            return int(row[0])
+    return None
+
+
+def estimated_count(queryset):
+    """Число записей ``queryset`` — точное для небольших выборок, иначе оценка."""
+    if not queryset.query.where:
+        estimate = _table_estimate(queryset)
+        if estimate is not None:
+            return estimate
+    limit = exact_count_limit()
+    bounded = queryset.order_by()[:limit + 1].count()
+    if bounded <= limit:
+        return bounded
+    return max(_planner_estimate(queryset) or 0, bounded)
+
+
+class EstimatedCountPaginator(Paginator):
+    """``Paginator`` с числом записей из ``estimated_count()``."""
+
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)
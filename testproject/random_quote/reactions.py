@@ -0,0 +1,281 @@
+"""Атомарное применение реакций (лайков/дизлайков) к цитатам.
+
+Реакция меняет ``likes``/``dislikes`` и вес цитаты (в пределах 0..100)
+одним условным ``UPDATE`` с F-выражениями — без чтения строки в Python,
+поэтому одновременные клики не теряются. Отсутствие цитаты определяется
+по числу затронутых строк. ``updated_at`` обновляется тем же ``UPDATE``
+(на него опираются ключи кэша фрагментов), как и хранимые показатели
+``popularity_score``/``like_percentage``. Реакции отражаются и в материализованной
+статистике ``QuoteStats`` — через буфер ``stats.stats_buffer`` после записи
+цитат, чтобы транзакции реакций не ждали друг друга на строке ``GLOBAL``, — в журнале событий для рейтинга
+«в тренде» (см. ``trending``) и в накопленном изменении весов очереди
+заранее выбранных цитат (см. ``sample_queue``).
+
+Реакции «горячих» цитат прибавляются к случайному шарду счётчика
+``QuoteCounterShard`` и переносятся в ``Quote`` пачкой
+(``fold_reaction_shards``) вне обработки запроса — фоновым потоком или
+командой ``manage.py fold_reaction_shards``, см. ``sharding``.
+
+``aapply_reaction`` — вариант для асинхронных views.
+"""
+
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Least, Now
+
+from .leaderboard import leaderboard
+from .models import Quote, QuoteEvent, score_expressions
+from .sample_queue import sample_queue
+from .sampling import apply_weight_deltas
+from .sharding import arecord, fold_schedule, hot_quotes, is_hot, record, shard_count, take_pending
+from .stats import merge_deltas, quote_deltas, stats_buffer, use_materialized_stats
+from .tasks import fire_and_forget
+from .trending import event_log
+
+LIKE = "like"
+DISLIKE = "dislike"
+REACTIONS = (LIKE, DISLIKE)
+
+MIN_WEIGHT = 0
+MAX_WEIGHT = 100
+
+
+def _clamped_weight(delta):
+    """Выражение ``weight + delta``, ограниченное диапазоном 0..100."""
+    return Least(Greatest(F("weight") + Value(delta), Value(MIN_WEIGHT)), Value(MAX_WEIGHT))
+
+
+def _changes(likes, dislikes):
+    """Присваивания ``UPDATE`` для реакций: метрики, вес, показатели популярности и ``updated_at``."""
+    changes = {
+        "likes": F("likes") + likes,
+        "dislikes": F("dislikes") + dislikes,
+        "weight": _clamped_weight(likes - dislikes),
+    }
+    changes.update(score_expressions(**changes))
+    changes["updated_at"] = Now()
+    return changes
+
+
+def _update(quote_ids, likes, dislikes):
+    return Quote.objects.filter(pk__in=quote_ids).update(**_changes(likes, dislikes))
+
+
+def _log_events(quote_id, likes, dislikes, autoflush=True):
+    """Добавить реакции в буфер журнала событий; вернуть, пора ли его сбросить."""
+    due = event_log.record(quote_id, QuoteEvent.LIKE, likes, autoflush)
+    return event_log.record(quote_id, QuoteEvent.DISLIKE, dislikes, autoflush) or due
+
+
+def apply_reaction(quote_id, reaction):
+    """
+    Применить одну реакцию к цитате одним ``UPDATE``.
+
+    Лайк: ``likes + 1``, вес +1 (не выше 100).
+    Дизлайк: ``dislikes + 1``, вес −1 (не ниже 0).
+
+    При включённой материализованной статистике реакция записывается как
+    пачка из одной реакции (``apply_reactions``), чтобы учесть фактическое
+    изменение веса.
+    Для горячей цитаты строка ``Quote`` не меняется: реакция прибавляется
+    к случайному шарду её счётчика.
+
+    Returns:
+        bool: ``False``, если цитаты с таким ``quote_id`` нет.
+    """
+    likes, dislikes = (1, 0) if reaction == LIKE else (0, 1)
+    if is_hot(quote_id) and record(quote_id, likes, dislikes):
+        _log_events(quote_id, likes, dislikes)
+    elif use_materialized_stats():
+        _, missing = apply_reactions([(quote_id, reaction)])
+        if missing:
+            return False
+    else:
+        if not _update([quote_id], likes, dislikes):
+            return False
+        leaderboard.touch([quote_id])
+        _log_events(quote_id, likes, dislikes)
+        _after_update(quote_id, likes - dislikes)
+    _after_reaction(quote_id)
+    return True
+
+
+def _after_update(quote_id, delta):
+    apply_weight_deltas({quote_id: delta})
+    sample_queue.note_weight_change(abs(delta))
+
+
+def _after_reaction(quote_id, in_background=False):
+    """
+    Учесть реакцию при поиске горячих цитат; если пора — перенести шарды в ``Quote``.
+
+    Перенос — отдельная транзакция по всем шардам, поэтому обработчик
+    реакции её не ждёт: из запроса перенос запускается в фоновом потоке,
+    а из фоновой задачи (``in_background``) выполняется сразу.
+    """
+    hot_quotes.hit(quote_id)
+    if not shard_count() or not fold_schedule.due():
+        return
+    if in_background:
+        _fold_shards()
+    else:
+        threading.Thread(target=_fold_shards_in_thread, daemon=True).start()
+
+
+def _fold_shards():
+    try:
+        fold_reaction_shards()
+    except DatabaseError:
+        # Реакции уже записаны в шарды; перенос откатился целиком и повторится
+        # при следующем сроке или командой fold_reaction_shards.
+        pass
+
+
+def _fold_shards_in_thread():
+    try:
+        _fold_shards()
+    finally:
+        connections.close_all()
+
+
+async def aapply_reaction(quote_id, reaction):
+    """
+    Асинхронный вариант ``apply_reaction``.
+
+    Без материализованной статистики реакция — один ``aupdate``, а обновление
+    индекса весов и очереди выборов выполняется фоновой задачей.
+    С материализованной статистикой нужна транзакция из нескольких запросов,
+    поэтому используется синхронный ``apply_reaction`` в пуле потоков.
+    Реакция горячей цитаты — один ``aupdate`` шарда её счётчика.
+
+    Returns:
+        bool: ``False``, если цитаты с таким ``quote_id`` нет.
+    """
+    likes, dislikes = (1, 0) if reaction == LIKE else (0, 1)
+    if await sync_to_async(is_hot)(quote_id) and await arecord(quote_id, likes, dislikes):
+        if _log_events(quote_id, likes, dislikes, autoflush=False):
+            fire_and_forget(event_log.flush)
+        fire_and_forget(_after_reaction, quote_id, in_background=True)
+        return True
+    if use_materialized_stats():
+        return await sync_to_async(apply_reaction)(quote_id, reaction)
+    updated = await Quote.objects.filter(pk=quote_id).aupdate(**_changes(likes, dislikes))
+    if not updated:
+        return False
+    leaderboard.touch([quote_id])
+    if _log_events(quote_id, likes, dislikes, autoflush=False):
+        fire_and_forget(event_log.flush)
+    fire_and_forget(_after_update, quote_id, likes - dislikes)
+    fire_and_forget(_after_reaction, quote_id, in_background=True)
+    return True
+
+
+def apply_reactions(reactions):
+    """
+    Применить пачку реакций.
+
+    Реакции агрегируются по цитате: лайки и дизлайки суммируются, вес
+    меняется на их разность с ограничением 0..100 (один раз на цитату).
+    Цитаты с одинаковыми итоговыми приращениями обновляются одним
+    ``UPDATE ... WHERE quote_id IN (...)`` в одной транзакции; приращения
+    материализованной статистики после неё передаются в ``stats_buffer``.
+
+    Args:
+        reactions (iterable): пары ``(quote_id, reaction)``.
+
+    Returns:
+        tuple[int, list[int]]: число применённых реакций и отсортированный
+        список отсутствующих ``quote_id``.
+    """
+    totals = defaultdict(lambda: [0, 0])
+    for quote_id, reaction in reactions:
+        totals[quote_id][0 if reaction == LIKE else 1] += 1
+    if not totals:
+        return 0, []
+
+    with transaction.atomic():
+        existing, stats = _write_totals(totals)
+    _after_totals(totals, existing, stats)
+    for quote_id in existing:
+        _log_events(quote_id, *totals[quote_id])
+    applied = sum(sum(totals[quote_id]) for quote_id in existing)
+    missing = sorted(set(totals) - existing)
+    return applied, missing
+
+
+def _write_totals(totals):
+    """
+    Записать итоги ``{quote_id: [likes, dislikes]}`` в ``Quote`` (внутри транзакции).
+
+    Транзакция начинается с записи: ``UPDATE`` лайков, дизлайков и показателей
+    (с новым весом в ``popularity_score``) блокирует строки, а в SQLite — всю
+    базу. Транзакция, начатая с чтения, в SQLite не дожидается перехода к
+    записи (``busy_timeout`` при этом не действует) и сразу завершается
+    ошибкой «database is locked». Затем под этой блокировкой читаются веса,
+    и вес меняется на фактическое (ограниченное 0..100) приращение — оно же
+    идёт в статистику.
+
+    Returns:
+        tuple[set[int], dict]: ``quote_id`` существующих цитат и приращения
+        статистики для ``stats_buffer`` (записываются после транзакции).
+    """
+    groups = defaultdict(list)
+    for quote_id, (likes, dislikes) in totals.items():
+        groups[(likes, dislikes)].append(quote_id)
+    for (likes, dislikes), quote_ids in groups.items():
+        changes = _changes(likes, dislikes)
+        del changes["weight"]
+        Quote.objects.filter(pk__in=quote_ids).update(**changes)
+
+    rows = Quote.objects.filter(pk__in=list(totals)).values_list("pk", "source", "source_type", "weight")
+    existing = set()
+    weight_groups = defaultdict(list)
+    deltas = []
+    for quote_id, source, source_type, weight in rows:
+        likes, dislikes = totals[quote_id]
+        delta = min(max(weight + likes - dislikes, MIN_WEIGHT), MAX_WEIGHT) - weight
+        existing.add(quote_id)
+        if delta:
+            weight_groups[delta].append(quote_id)
+        deltas.append(quote_deltas(source, source_type, quotes=0, likes=likes, dislikes=dislikes, weight=delta))
+    for delta, quote_ids in weight_groups.items():
+        Quote.objects.filter(pk__in=quote_ids).update(weight=F("weight") + delta)
+    return existing, merge_deltas(*deltas)
+
+
+def _after_totals(totals, existing, stats):
+    """Отразить записанные итоги в статистике, индексах весов, очереди выборов и топе."""
+    stats_buffer.add(stats)
+    deltas = {
+        quote_id: likes - dislikes
+        for quote_id, (likes, dislikes) in totals.items() if quote_id in existing
+    }
+    apply_weight_deltas(deltas)
+    sample_queue.note_weight_change(sum(abs(delta) for delta in deltas.values()))
+    leaderboard.touch(existing)
+
+
+def fold_reaction_shards():
+    """
+    Перенести накопленные в шардах реакции горячих цитат в ``Quote``.
+
+    В одной транзакции накопленное вычитается из шардов и прибавляется к
+    ``likes``/``dislikes``/``weight`` так же, как пачка реакций в
+    ``apply_reactions``: вес меняется на разность лайков и дизлайков с
+    ограничением 0..100 один раз на цитату. События в журнал уже записаны
+    при самих реакциях.
+
+    Returns:
+        int: число перенесённых реакций.
+    """
+    with transaction.atomic():
+        totals = take_pending()
+        if not totals:
+            return 0
+        existing, stats = _write_totals(totals)
+    _after_totals(totals, existing, stats)
+    return sum(sum(totals[quote_id]) for quote_id in existing)
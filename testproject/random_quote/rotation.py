@@ -0,0 +1,131 @@
+"""Ротация случайных цитат без повторов для посетителя.
+
+``RecentlySeen`` — ограниченное окно из последних ``RANDOM_QUOTE_RECENT_WINDOW``
+показанных посетителю ``quote_id``. Стратегия выбора исключает их
+(``SamplingStrategy.choose_excluding``) — за ``O(окно)``, без просмотра
+таблицы, поэтому одна и та же «тяжёлая» цитата не показывается несколько
+раз подряд и не накручивает ``watches``.
+
+Хранилище окна — ``RANDOM_QUOTE_RECENT_STORAGE``:
+    - ``"cache"`` (по умолчанию) — в кэше Django по cookie сессии, если она
+      уже есть, иначе по отдельной cookie посетителя (без создания сессии и
+      записи в её хранилище на каждый показ). Окно нового посетителя
+      записывается в кэш, только когда cookie вернулась со следующим
+      запросом: боты, проверки доступности и разовые клиенты cookie не
+      возвращают и не оставляют в кэше ключей. Ключ живёт
+      ``RANDOM_QUOTE_RECENT_TTL`` секунд с последнего показа;
+    - ``"session"`` — список чисел в сессии вошедшего пользователя (окно
+      переживает сброс кэша); анонимные посетители и в этом режиме хранят
+      окно в кэше, чтобы главная страница не создавала им сессий.
+"""
+
+import hashlib
+import secrets
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+SESSION_KEY = "random_quote_recent"
+COOKIE_NAME = "random_quote_visitor"
+COOKIE_MAX_AGE = 30 * 24 * 60 * 60
+
+
+def recent_window():
+    """Размер окна недавно показанных цитат (0 — без исключений)."""
+    return getattr(settings, "RANDOM_QUOTE_RECENT_WINDOW", 5)
+
+
+def recent_storage():
+    return getattr(settings, "RANDOM_QUOTE_RECENT_STORAGE", "cache")
+
+
+def recent_ttl():
+    """Сколько секунд окно посетителя хранится в кэше после последнего показа."""
+    return getattr(settings, "RANDOM_QUOTE_RECENT_TTL", 30 * 60)
+
+
+class RecentlySeen:
+    """
+    Окно последних показанных посетителю цитат.
+
+    Хранится компактно — списком не более ``size`` идентификаторов
+    (старые вытесняются при добавлении новых). Использование::
+
+        recent = RecentlySeen.load(request)
+        quote_id = sampler.choose_excluding(recent.ids)
+        recent.push(quote_id)
+        recent.save(request, response)
+    """
+
+    def __init__(self, ids, size, visitor=None, in_session=False):
+        self.size = size
+        self.ids = ids[-size:] if size else []
+        self.visitor = visitor
+        self.in_session = in_session
+        self._new_cookie = None
+
+    @classmethod
+    def load(cls, request):
+        size = recent_window()
+        if not size:
+            return cls([], 0)
+        if cls._uses_session(request):
+            return cls(request.session.get(SESSION_KEY, []), size, in_session=True)
+        visitor = cls._visitor(request)
+        recent = cls(cache.get(cls._cache_key(visitor), []) if visitor else [], size, visitor)
+        if not visitor:
+            recent._new_cookie = secrets.token_urlsafe(16)
+            recent.visitor = f"visitor:{recent._new_cookie}"
+        return recent
+
+    @staticmethod
+    def _uses_session(request):
+        """Хранить ли окно в сессии: только для вошедших пользователей в режиме ``"session"``."""
+        user = getattr(request, "user", None)
+        return recent_storage() == "session" and user is not None and user.is_authenticated
+
+    @staticmethod
+    def _visitor(request):
+        """Идентификатор посетителя для ключа в кэше: по cookie сессии, иначе по cookie посетителя."""
+        session_key = getattr(getattr(request, "session", None), "session_key", None)
+        if session_key:
+            # В ключах кэша — не сам идентификатор сессии, а его хэш.
+            return "session:" + hashlib.sha256(session_key.encode()).hexdigest()[:32]
+        visitor = request.COOKIES.get(COOKIE_NAME)
+        return f"visitor:{visitor}" if visitor else None
+
+    @classmethod
+    async def aload(cls, request):
+        """Асинхронный вариант ``load()`` (сессия читается в пуле потоков)."""
+        return await sync_to_async(cls.load)(request)
+
+    def push(self, quote_id):
+        """Добавить показанную цитату в окно."""
+        if not self.size or quote_id is None:
+            return
+        if quote_id in self.ids:
+            self.ids.remove(quote_id)
+        self.ids.append(quote_id)
+        del self.ids[:-self.size]
+
+    def save(self, request, response):
+        """Сохранить окно (и выдать cookie новому посетителю без сессии)."""
+        if not self.size:
+            return
+        if self.in_session:
+            request.session[SESSION_KEY] = self.ids
+            return
+        if self._new_cookie:
+            # Окно из одной цитаты не сохраняем, пока посетитель не вернёт cookie.
+            response.set_cookie(COOKIE_NAME, self._new_cookie, max_age=COOKIE_MAX_AGE, httponly=True, samesite="Lax")
+            return
+        cache.set(self._cache_key(self.visitor), self.ids, recent_ttl())
+
+    async def asave(self, request, response):
+        """Асинхронный вариант ``save()``."""
+        await sync_to_async(self.save)(request, response)
+
+    @staticmethod
+    def _cache_key(visitor):
+        return f"random_quote:recent:{visitor}"
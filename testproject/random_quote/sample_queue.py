@@ -0,0 +1,262 @@
+"""Очередь заранее выбранных случайных цитат в кэше.
+
+Без очереди каждый показ главной страницы — отдельный выбор по весу и
+отдельное чтение цитаты из БД. ``SampleQueue`` выбирает цитаты пакетами
+(``get_sampler().draw``, векторно для процессного индекса), одним запросом
+читает их поля для показа и складывает готовые элементы в кэш Django;
+запрос страницы только забирает следующий элемент.
+
+- Очередь — нумерованные позиции и два счётчика (голова и хвост),
+  которые сдвигаются атомарным ``cache.incr``, поэтому одна очередь
+  разделяется всеми процессами (при общем кэше — Redis, Memcached).
+  Элементы хранятся пачками по ``CHUNK_SIZE`` позиций в одном ключе, чтобы
+  очередь не вытесняла из кэша остальные ключи.
+  Элементы — независимые выборы с возвращением: элементы, потерянные при
+  гонках или пропущенные из-за окна недавно показанных, не искажают
+  распределение.
+- Когда в очереди остаётся меньше ``RANDOM_QUOTE_SAMPLE_QUEUE_LOW_WATER``
+  элементов, запускается фоновое пополнение до ``RANDOM_QUOTE_SAMPLE_QUEUE_SIZE``
+  (одно на все процессы — под блокировкой в кэше).
+- Очередь сбрасывается (увеличивается её поколение в ключах), когда
+  суммарное изменение весов реакциями превысило долю
+  ``RANDOM_QUOTE_SAMPLE_QUEUE_DRIFT`` от суммарного веса на момент
+  заполнения, но не меньше ``RANDOM_QUOTE_SAMPLE_QUEUE_MIN_DRIFT``
+  (на маленькой таблице доля — меньше одной реакции), а также при массовых изменениях, правке и удалении цитат.
+  Элементы живут не дольше ``RANDOM_QUOTE_SAMPLE_QUEUE_TTL`` секунд,
+  поэтому счётчики в них отстают не больше чем на это время.
+
+Прогрев и отдельный процесс пополнения — ``manage.py fill_sample_queue``.
+"""
+
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .models import Quote
+from .sampling import get_sampler
+
+KEY_PREFIX = "random_quote:sample_queue"
+GENERATION_KEY = f"{KEY_PREFIX}:generation"
+CHUNK_SIZE = 50
+DISPLAY_FIELDS = (
+    "quote_id", "quote_text", "source", "source_type", "weight",
+    "watches", "likes", "dislikes", "created_at", "updated_at",
+)
+
+
+def sample_queue_enabled():
+    return getattr(settings, "RANDOM_QUOTE_SAMPLE_QUEUE", True)
+
+
+def queue_size():
+    """До скольких элементов пополняется очередь."""
+    return getattr(settings, "RANDOM_QUOTE_SAMPLE_QUEUE_SIZE", 1000)
+
+
+def low_water():
+    """При скольких оставшихся элементах запускается пополнение."""
+    return getattr(settings, "RANDOM_QUOTE_SAMPLE_QUEUE_LOW_WATER", 200)
+
+
+def item_ttl():
+    """Время жизни элементов очереди (в секундах)."""
+    return getattr(settings, "RANDOM_QUOTE_SAMPLE_QUEUE_TTL", 60)
+
+
+def drift_threshold():
+    """Доля суммарного веса, после изменения на которую очередь сбрасывается."""
+    return getattr(settings, "RANDOM_QUOTE_SAMPLE_QUEUE_DRIFT", 0.01)
+
+
+def min_drift():
+    """Наименьшее изменение весов, после которого очередь сбрасывается."""
+    return getattr(settings, "RANDOM_QUOTE_SAMPLE_QUEUE_MIN_DRIFT", 20)
+
+
+class SampleQueue:
+    """
+    Очередь готовых к показу цитат в кэше Django.
+
+    Использование::
+
+        quote, remaining = sample_queue.take(recent.ids)
+        if remaining < low_water():
+            sample_queue.refill_in_background()
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refilling = False
+
+    @staticmethod
+    def generation():
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            cache.add(GENERATION_KEY, 1, timeout=None)
+            generation = cache.get(GENERATION_KEY, 1)
+        return generation
+
+    @staticmethod
+    def _key(generation, name):
+        return f"{KEY_PREFIX}:{generation}:{name}"
+
+    @classmethod
+    def _chunk_key(cls, generation, position):
+        return cls._key(generation, f"chunk:{(position - 1) // CHUNK_SIZE}")
+
+    @staticmethod
+    def _incr(key, delta=1):
+        """``cache.incr``, создающий счётчик при первом обращении."""
+        try:
+            return cache.incr(key, delta)
+        except ValueError:
+            cache.add(key, 0, timeout=None)
+            return cache.incr(key, delta)
+
+    def __len__(self):
+        generation = self.generation()
+        values = cache.get_many([self._key(generation, "head"), self._key(generation, "tail")])
+        return max(0, values.get(self._key(generation, "tail"), 0) - values.get(self._key(generation, "head"), 0))
+
+    def pop(self):
+        """
+        Забрать следующий элемент.
+
+        Returns:
+            tuple[dict | None, int]: поля цитаты (``None``, если очередь пуста
+            или элемент истёк) и число оставшихся элементов.
+        """
+        generation = self.generation()
+        head_key = self._key(generation, "head")
+        position = self._incr(head_key)
+        tail = cache.get(self._key(generation, "tail"), 0)
+        if position > tail:
+            return None, 0
+        chunk = cache.get(self._chunk_key(generation, position)) or []
+        index = (position - 1) % CHUNK_SIZE
+        item = chunk[index] if index < len(chunk) else None
+        if item is None:
+            # Элементы истекли (или вытеснены из кэша) — очередь считается пустой.
+            self._incr(head_key, tail - position)
+            return None, 0
+        return item, tail - position
+
+    def take(self, excluded=()):
+        """
+        Забрать элемент с цитатой вне ``excluded`` (недавно показанных).
+
+        Элементы из ``excluded`` пропускаются (не больше ``len(excluded) + 3``
+        попыток) — это точный выбор по весу среди остальных цитат.
+
+        Returns:
+            tuple[Quote | None, int]: цитата (не сохранённый заново экземпляр
+            с прочитанными при заполнении полями) и число оставшихся элементов.
+        """
+        remaining = 0
+        for _ in range(len(excluded) + 3):
+            item, remaining = self.pop()
+            if item is None:
+                return None, remaining
+            if item["quote_id"] not in excluded:
+                return Quote.from_db(None, list(item), list(item.values())), remaining
+        return None, remaining
+
+    def refill(self, size=None):
+        """
+        Дополнить очередь до ``size`` (по умолчанию ``RANDOM_QUOTE_SAMPLE_QUEUE_SIZE``) элементов.
+
+        Одновременно очередь пополняет только один процесс (блокировка в кэше
+        на время пополнения); остальные сразу возвращают 0.
+
+        Returns:
+            int: число добавленных элементов.
+        """
+        generation = self.generation()
+        lock = self._key(generation, "refill")
+        if not cache.add(lock, 1, timeout=30):
+            return 0
+        try:
+            return self._refill(generation, size or queue_size())
+        finally:
+            cache.delete(lock)
+
+    def _refill(self, generation, size):
+        head_key, tail_key = self._key(generation, "head"), self._key(generation, "tail")
+        head = cache.get(head_key, 0)
+        tail = cache.get(tail_key, 0)
+        if head > tail:
+            # Пустую очередь «прочитали» дальше хвоста — продолжаем с головы.
+            tail = self._incr(tail_key, head - tail)
+        needed = size - (tail - head)
+        if needed <= 0:
+            return 0
+
+        sampler = get_sampler()
+        total_key = self._key(generation, "total_weight")
+        if cache.get(total_key) is None:
+            cache.set(total_key, sampler.total_weight(), timeout=None)
+        ids = [quote_id for quote_id in sampler.draw(needed) if quote_id is not None]
+        rows = {row["quote_id"]: row for row in Quote.objects.filter(pk__in=set(ids)).values(*DISPLAY_FIELDS)}
+        if len(rows) < len(set(ids)):
+            # Часть цитат удалена другим процессом — индекс устарел.
+            sampler.invalidate()
+        items = [rows[quote_id] for quote_id in ids if quote_id in rows]
+        if not items:
+            return 0
+
+        # Сначала элементы, потом хвост: читатели не должны видеть позиций без элементов.
+        # Пачка с хвостом может быть заполнена частично — дописываем в неё.
+        first, filled = self._chunk_key(generation, tail + 1), tail % CHUNK_SIZE
+        chunks = {first: (list(cache.get(first) or []) + [None] * filled)[:filled]}
+        for position, item in enumerate(items, start=tail + 1):
+            chunk = chunks.setdefault(self._chunk_key(generation, position), [])
+            chunk.append(item)
+        cache.set_many(chunks, timeout=item_ttl())
+        self._incr(tail_key, len(items))
+        return len(items)
+
+    def refill_in_background(self):
+        """Запустить ``refill()`` в фоновом потоке (не больше одного на процесс)."""
+        with self._lock:
+            if self._refilling:
+                return
+            self._refilling = True
+        threading.Thread(target=self._background_refill, daemon=True).start()
+
+    def _background_refill(self):
+        try:
+            self.refill()
+        finally:
+            connections.close_all()
+            with self._lock:
+                self._refilling = False
+
+    def discard(self):
+        """Сбросить очередь: следующие запросы увидят новое пустое поколение."""
+        generation = self.generation()
+        self._incr(GENERATION_KEY)
+        # Элементы старого поколения истекут сами; счётчики хранятся без срока — удаляем.
+        cache.delete_many([self._key(generation, name) for name in ("head", "tail", "total_weight", "drift")])
+
+    def note_weight_change(self, amount):
+        """
+        Учесть изменение весов на ``amount`` (по модулю) после заполнения очереди.
+
+        Когда накопленное изменение превышает ``RANDOM_QUOTE_SAMPLE_QUEUE_DRIFT``
+        от суммарного веса на момент заполнения (и не меньше
+        ``RANDOM_QUOTE_SAMPLE_QUEUE_MIN_DRIFT``), очередь сбрасывается.
+        """
+        if not amount or not sample_queue_enabled():
+            return
+        generation = self.generation()
+        total = cache.get(self._key(generation, "total_weight"))
+        if total is None:
+            return
+        drift = self._incr(self._key(generation, "drift"), abs(amount))
+        if drift > max(drift_threshold() * total, min_drift()):
+            self.discard()
+
+
+sample_queue = SampleQueue()
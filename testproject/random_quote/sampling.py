@@ -0,0 +1,770 @@
+"""Взвешенный выбор случайной цитаты без загрузки всей таблицы.
+
+Содержит:
+- ``SamplingStrategy`` — общий интерфейс стратегий выбора;
+- ``ReferenceSampler`` — эталонная стратегия (исходный ``random.choices`` по
+  всем весам) для проверки распределения других стратегий;
+- ``WeightedSampler`` — процессный индекс весов (дерево Фенвика по ``quote_id``),
+  позволяющий выбрать цитату за O(log n) и точечно обновлять вес за O(log n);
+- ``sampler`` — общий для процесса экземпляр индекса, используемый во views
+  и поддерживаемый в актуальном состоянии сигналами модели ``Quote``;
+- ``DatabaseSampler`` — выбор по весу средствами БД по префиксным суммам
+  (``QuoteWeightBlock`` + ``Quote.weight_offset``), для многопроцессных
+  развёртываний без процессного состояния;
+- функции поддержки префиксных сумм и ``get_sampler()`` — выбор стратегии
+  по настройке ``RANDOM_QUOTE_SAMPLING`` (``"memory"`` или ``"database"``).
+
+Оба индекса хранят только веса; сама цитата затем читается из БД
+одним запросом по первичному ключу. Пакет независимых выборов (``draw``)
+для очереди заранее выбранных цитат (``sample_queue``) процессный индекс
+делает векторно — ``numpy.searchsorted`` по накопленным весам, если
+установлен NumPy (без него — по одному выбору ``_pick``, с тем же
+распределением). Соответствие распределения выбора
+весам проверяет ``manage.py validate_sampling`` (см. ``sampling_checks``).
+"""
+
+import bisect
+import random
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import Quote, QuoteWeightBlock
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class SamplingStrategy:
+    """
+    Интерфейс стратегии взвешенного выбора ``quote_id``.
+
+    Контракт (семантика исходного ``random.choices`` во ``random_quote_view``):
+        - вероятность цитаты пропорциональна ``max(0, weight)``;
+        - при нулевом суммарном весе выбор равновероятный среди всех цитат;
+        - без цитат ``choose()`` возвращает ``None``.
+    """
+
+    def choose(self):
+        """Выбрать один ``quote_id`` (или ``None``, если цитат нет)."""
+        raise NotImplementedError
+
+    async def achoose(self):
+        """Асинхронный вариант ``choose()``."""
+        return await sync_to_async(self.choose)()
+
+    def choose_excluding(self, excluded):
+        """
+        Выбрать ``quote_id``, не входящий в ``excluded`` (недавно показанные).
+
+        Реализация по умолчанию — повторный выбор с ограниченным числом
+        попыток: ``O(len(excluded))`` выборов в худшем случае. Если подходящей
+        цитаты не нашлось, возвращается результат обычного ``choose()``.
+        """
+        quote_id = None
+        for _ in range(2 * len(excluded) + 3):
+            quote_id = self.choose()
+            if quote_id is None or quote_id not in excluded:
+                break
+        return quote_id
+
+    async def achoose_excluding(self, excluded):
+        """Асинхронный вариант ``choose_excluding()``."""
+        return await sync_to_async(self.choose_excluding)(excluded)
+
+    def sample(self, k):
+        """Выбрать до ``k`` разных ``quote_id`` по весу (без возвращения)."""
+        raise NotImplementedError
+
+    def draw(self, n):
+        """Выбрать ``n`` раз независимо (с возвращением) — для проверки распределения и очереди выборов."""
+        return [self.choose() for _ in range(n)]
+
+    def total_weight(self):
+        """Суммарный (неотрицательный) вес всех цитат."""
+        return Quote.objects.filter(weight__gt=0).aggregate(total=Sum("weight"))["total"] or 0
+
+    def invalidate(self):
+        """Сбросить закэшированное состояние стратегии (если оно есть)."""
+
+
+class ReferenceSampler(SamplingStrategy):
+    """
+    Эталонная стратегия: ``random.choices`` по всем весам, O(n) на выбор.
+
+    Так выбирал цитату исходный ``random_quote_view``. Используется как
+    образец при проверке распределения других стратегий.
+
+    Args:
+        pairs: пары ``(quote_id, weight)``; ``None`` — прочитать из БД.
+    """
+
+    def __init__(self, pairs=None):
+        if pairs is None:
+            pairs = Quote.objects.order_by("pk").values_list("pk", "weight")
+        pairs = list(pairs)
+        self._ids = [quote_id for quote_id, _ in pairs]
+        self._weights = [max(0, weight or 0) for _, weight in pairs]
+
+    def choose(self):
+        if not self._ids:
+            return None
+        if sum(self._weights) <= 0:
+            return random.choice(self._ids)
+        return random.choices(self._ids, weights=self._weights)[0]
+
+    def draw(self, n):
+        if not self._ids:
+            return [None] * n
+        if sum(self._weights) <= 0:
+            return random.choices(self._ids, k=n)
+        return random.choices(self._ids, weights=self._weights, k=n)
+
+    def sample(self, k):
+        ids, weights = list(self._ids), list(self._weights)
+        chosen = []
+        while ids and len(chosen) < k:
+            if sum(weights) > 0:
+                i = random.choices(range(len(ids)), weights=weights)[0]
+            else:
+                i = random.randrange(len(ids))
+            chosen.append(ids.pop(i))
+            weights.pop(i)
+        return chosen
+
+
+class WeightedSampler(SamplingStrategy):
+    """
+    Индекс для взвешенного выбора ``quote_id``.
+
+    Веса хранятся в дереве Фенвика (Binary Indexed Tree), поэтому:
+        - выбор по весу — O(log n);
+        - изменение веса одной цитаты — O(log n);
+        - добавление новой цитаты в конец — O(log n).
+
+    Семантика совпадает с исходной реализацией ``random_quote_view``:
+    отрицательные веса считаются нулём, а при нулевом суммарном весе
+    выбор равновероятный.
+
+    Индекс перестраивается лениво: при первом обращении, после ``invalidate()``
+    (например, при удалении цитаты) и по истечении ``RANDOM_QUOTE_SAMPLER_TTL``
+    секунд — чтобы изменения из других процессов не копились бесконечно.
+    """
+
+    def __init__(self, ttl=None):
+        self._lock = threading.RLock()
+        self._ttl = ttl
+        self._ids = []
+        self._positions = {}
+        self._weights = []
+        self._tree = [0]
+        self._total = 0
+        self._cumsum = None
+        self._built_at = None
+
+    @property
+    def ttl(self):
+        """Время жизни индекса в секундах (``None`` — без ограничения)."""
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, "RANDOM_QUOTE_SAMPLER_TTL", None)
+
+    def _is_stale(self):
+        if self._built_at is None:
+            return True
+        ttl = self.ttl
+        return ttl is not None and time.monotonic() - self._built_at > ttl
+
+    def rebuild(self):
+        """Полностью перестроить индекс одним запросом ``(quote_id, weight)``."""
+        rows = Quote.objects.order_by("pk").values_list("pk", "weight")
+        self.load(rows.iterator(chunk_size=10000))
+
+    def load(self, pairs):
+        """Построить индекс по парам ``(quote_id, weight)``, упорядоченным по ``quote_id``."""
+        with self._lock:
+            self._ids = []
+            self._positions = {}
+            self._weights = []
+            self._tree = [0]
+            self._total = 0
+            for quote_id, weight in pairs:
+                self._append(quote_id, weight)
+            self._built_at = time.monotonic()
+
+    def invalidate(self):
+        """Пометить индекс устаревшим — он будет перестроен при следующем выборе."""
+        with self._lock:
+            self._built_at = None
+
+    def update(self, quote_id, weight):
+        """
+        Установить вес цитаты (или добавить новую цитату в индекс).
+
+        Если индекс ещё не построен, ничего не делает: актуальное значение
+        будет прочитано при построении.
+        """
+        weight = max(0, weight or 0)
+        with self._lock:
+            if self._built_at is None:
+                return
+            pos = self._positions.get(quote_id)
+            if pos is None:
+                if self._ids and quote_id < self._ids[-1]:
+                    # Порядок ключей нарушен (ручная вставка pk) — проще перестроить.
+                    self._built_at = None
+                    return
+                self._append(quote_id, weight)
+                return
+            delta = weight - self._weights[pos]
+            if delta:
+                self._weights[pos] = weight
+                self._add(pos + 1, delta)
+
+    def adjust(self, quote_id, delta, low=0, high=100):
+        """
+        Изменить вес цитаты на ``delta`` с ограничением диапазоном ``[low; high]``.
+
+        Используется, когда новый вес не читается из БД (атомарный ``UPDATE``
+        реакций): вычисляется по значению в индексе тем же правилом, что и в БД.
+        """
+        with self._lock:
+            pos = self._positions.get(quote_id)
+            if self._built_at is None or pos is None:
+                return
+            self.update(quote_id, min(max(self._weights[pos] + delta, low), high))
+
+    def remove(self, quote_id):
+        """Исключить цитату из индекса (перестроение при следующем выборе)."""
+        with self._lock:
+            if quote_id in self._positions:
+                self._built_at = None
+
+    def choose(self):
+        """
+        Выбрать ``quote_id`` с вероятностью, пропорциональной весу.
+
+        Returns:
+            int | None: идентификатор цитаты или ``None``, если цитат нет.
+        """
+        with self._lock:
+            if self._is_stale():
+                self.rebuild()
+            return self._pick()
+
+    async def achoose(self):
+        """
+        Асинхронный вариант ``choose()``.
+
+        Выбор по актуальному индексу не обращается к БД и выполняется сразу;
+        перестроение индекса — в пуле потоков.
+        """
+        with self._lock:
+            if not self._is_stale():
+                return self._pick()
+        return await sync_to_async(self.choose)()
+
+    def choose_excluding(self, excluded):
+        """
+        Выбрать ``quote_id`` по весу среди цитат, не входящих в ``excluded``.
+
+        Веса исключённых цитат на время выбора обнуляются в дереве и затем
+        восстанавливаются — ``O(len(excluded) · log n)``, без просмотра всех
+        цитат. Если вне ``excluded`` нет цитат с положительным весом (при
+        ненулевом суммарном весе), выбор делается без исключений.
+        """
+        with self._lock:
+            if self._is_stale():
+                self.rebuild()
+            return self._pick_excluding(excluded)
+
+    async def achoose_excluding(self, excluded):
+        """Асинхронный вариант ``choose_excluding()`` (см. ``achoose``)."""
+        with self._lock:
+            if not self._is_stale():
+                return self._pick_excluding(excluded)
+        return await sync_to_async(self.choose_excluding)(excluded)
+
+    def draw(self, n):
+        """
+        Выбрать ``n`` раз независимо (с возвращением) под одной блокировкой.
+
+        С NumPy выбор векторный: ``searchsorted`` случайных точек по массиву
+        накопленных весов. Массив строится за O(число цитат) и переиспользуется
+        до первого изменения веса.
+        """
+        with self._lock:
+            if self._is_stale():
+                self.rebuild()
+            if np is None or not self._ids or self._total <= 0:
+                return [self._pick() for _ in range(n)]
+            if self._cumsum is None:
+                self._cumsum = np.cumsum(np.array(self._weights, dtype=np.int64))
+            points = np.random.random(n) * int(self._cumsum[-1])
+            positions = np.searchsorted(self._cumsum, points, side="right")
+            return [self._ids[pos] for pos in np.minimum(positions, len(self._ids) - 1).tolist()]
+
+    def total_weight(self):
+        with self._lock:
+            if self._is_stale():
+                self.rebuild()
+            return self._total
+
+    def _pick(self):
+        if not self._ids:
+            return None
+        if self._total <= 0:
+            return random.choice(self._ids)
+        return self._ids[self._find(random.random() * self._total)]
+
+    def _pick_excluding(self, excluded):
+        positions = {self._positions[quote_id] for quote_id in excluded if quote_id in self._positions}
+        if not positions or len(positions) >= len(self._ids):
+            return self._pick()
+        if self._total <= 0:
+            # Все веса нулевые — равновероятный выбор среди неисключённых.
+            while True:
+                pos = random.randrange(len(self._ids))
+                if pos not in positions:
+                    return self._ids[pos]
+
+        removed = [(pos, self._weights[pos]) for pos in positions if self._weights[pos]]
+        for pos, weight in removed:
+            self._weights[pos] = 0
+            self._add(pos + 1, -weight)
+        try:
+            if self._total > 0:
+                return self._ids[self._find(random.random() * self._total)]
+        finally:
+            for pos, weight in removed:
+                self._weights[pos] = weight
+                self._add(pos + 1, weight)
+        return self._pick()
+
+    def sample(self, k):
+        """
+        Выбрать до ``k`` разных ``quote_id`` по весу (без возвращения).
+
+        Выбранная цитата на время выборки получает нулевой вес, поэтому
+        каждая следующая выбирается среди оставшихся пропорционально весу —
+        O(k log n). Когда положительные веса заканчиваются, оставшиеся места
+        заполняются равновероятно.
+
+        Returns:
+            list[int]: идентификаторы в порядке выбора.
+        """
+        with self._lock:
+            if self._is_stale():
+                self.rebuild()
+            k = min(k, len(self._ids))
+            taken = []
+            try:
+                while len(taken) < k and self._total > 0:
+                    pos = self._find(random.random() * self._total)
+                    weight = self._weights[pos]
+                    taken.append((pos, weight))
+                    self._weights[pos] = 0
+                    self._add(pos + 1, -weight)
+            finally:
+                for pos, weight in taken:
+                    self._weights[pos] = weight
+                    self._add(pos + 1, weight)
+            chosen = [self._ids[pos] for pos, _ in taken]
+            if len(chosen) < k:
+                used = {pos for pos, _ in taken}
+                rest = [pos for pos in range(len(self._ids)) if pos not in used]
+                chosen.extend(self._ids[pos] for pos in random.sample(rest, k - len(chosen)))
+            return chosen
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _append(self, quote_id, weight):
+        weight = max(0, weight or 0)
+        self._positions[quote_id] = len(self._ids)
+        self._ids.append(quote_id)
+        self._weights.append(weight)
+        i = len(self._ids)
+        # tree[i] хранит сумму весов на отрезке (i - lowbit(i), i].
+        node = weight
+        lower = i - (i & -i)
+        j = i - 1
+        while j > lower:
+            node += self._tree[j]
+            j -= j & -j
+        self._tree.append(node)
+        self._total += weight
+        self._cumsum = None
+
+    def _add(self, i, delta):
+        self._total += delta
+        self._cumsum = None
+        size = len(self._tree)
+        while i < size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _find(self, target):
+        """Найти позицию первого элемента, префиксная сумма которого > target."""
+        pos = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] <= target:
+                pos = nxt
+                target -= self._tree[nxt]
+            step >>= 1
+        # Защита от погрешности float на правой границе: берём ближайший
+        # слева элемент с положительным весом.
+        pos = min(pos, len(self._ids) - 1)
+        while self._weights[pos] == 0 and pos > 0:
+            pos -= 1
+        return pos
+
+
+sampler = WeightedSampler()
+
+
+def use_database_sampling():
+    """Включён ли выбор по весу средствами БД (``RANDOM_QUOTE_SAMPLING``)."""
+    return getattr(settings, "RANDOM_QUOTE_SAMPLING", "memory") == "database"
+
+
+def weight_block_size():
+    """Количество идентификаторов цитат в одном блоке префиксных сумм."""
+    return getattr(settings, "RANDOM_QUOTE_WEIGHT_BLOCK_SIZE", 1000)
+
+
+def rebuild_weight_blocks(quote_model=Quote, block_model=QuoteWeightBlock, batch_size=1000):
+    """
+    Полностью пересчитать префиксные суммы весов.
+
+    Проходит по цитатам в порядке ``quote_id`` (потоково, без загрузки всей
+    таблицы), заново вычисляет ``weight_block``/``weight_offset`` и пересоздаёт
+    строки ``QuoteWeightBlock``. Модели передаются параметрами, чтобы функцию
+    можно было вызывать из миграций с историческими моделями.
+
+    Returns:
+        int: количество блоков.
+    """
+    size = weight_block_size()
+    totals = {}
+    changed = []
+    with transaction.atomic():
+        rows = (
+            quote_model.objects.order_by("pk")
+            .values_list("pk", "weight", "weight_block", "weight_offset")
+        )
+        for pk, weight, old_block, old_offset in rows.iterator(chunk_size=batch_size):
+            block = pk // size
+            offset = totals.get(block, 0)
+            totals[block] = offset + max(0, weight)
+            if (block, offset) != (old_block, old_offset):
+                changed.append(quote_model(pk=pk, weight_block=block, weight_offset=offset))
+            if len(changed) >= batch_size:
+                quote_model.objects.bulk_update(changed, ["weight_block", "weight_offset"])
+                changed = []
+        if changed:
+            quote_model.objects.bulk_update(changed, ["weight_block", "weight_offset"])
+
+        block_model.objects.all().delete()
+        start = 0
+        blocks = []
+        for block in sorted(totals):
+            blocks.append(block_model(block_id=block, start=start, total=totals[block]))
+            start += totals[block]
+        block_model.objects.bulk_create(blocks, batch_size=batch_size)
+    return len(blocks)
+
+
+def refresh_weight_block(block_id):
+    """
+    Пересчитать один блок префиксных сумм после изменения веса в нём.
+
+    Пересчитывает смещения цитат блока (не более ``RANDOM_QUOTE_WEIGHT_BLOCK_SIZE``
+    строк) и сдвигает ``start`` последующих блоков одним ``UPDATE``.
+    Подходит для любых изменений: создания, правки веса и удаления цитаты.
+    """
+    size = weight_block_size()
+    with transaction.atomic():
+        block, created = QuoteWeightBlock.objects.select_for_update().get_or_create(block_id=block_id)
+        if created:
+            block.start = (
+                QuoteWeightBlock.objects.filter(block_id__lt=block_id)
+                .aggregate(total=Sum("total"))["total"] or 0
+            )
+
+        rows = (
+            Quote.objects.filter(pk__gte=block_id * size, pk__lt=(block_id + 1) * size)
+            .order_by("pk")
+            .values_list("pk", "weight", "weight_block", "weight_offset")
+        )
+        total = 0
+        changed = []
+        for pk, weight, old_block, old_offset in rows:
+            if (old_block, old_offset) != (block_id, total):
+                changed.append(Quote(pk=pk, weight_block=block_id, weight_offset=total))
+            total += max(0, weight)
+        if changed:
+            Quote.objects.bulk_update(changed, ["weight_block", "weight_offset"])
+
+        delta = total - block.total
+        block.total = total
+        block.save()
+        if delta:
+            QuoteWeightBlock.objects.filter(block_id__gt=block_id).update(start=F("start") + delta)
+
+
+def apply_weight_deltas(deltas):
+    """
+    Отразить в индексах выбора изменения весов, сделанные ``UPDATE`` в обход сигналов.
+
+    Args:
+        deltas (dict): ``{quote_id: изменение веса}`` до ограничения 0..100.
+    """
+    for quote_id, delta in deltas.items():
+        if delta:
+            sampler.adjust(quote_id, delta)
+    if use_database_sampling():
+        size = weight_block_size()
+        for block_id in sorted({quote_id // size for quote_id, delta in deltas.items() if delta}):
+            refresh_weight_block(block_id)
+
+
+class DatabaseSampler(SamplingStrategy):
+    """
+    Взвешенный выбор ``quote_id`` целиком на стороне БД.
+
+    Не хранит состояния в процессе. Выбор — три коротких индексных запроса:
+        1) суммарный вес — из последнего блока (``start + total``);
+        2) блок, в диапазон которого попало случайное число (индекс по ``start``);
+        3) цитата внутри блока (индекс ``(weight_block, weight_offset)``).
+
+    Работает одинаково на SQLite и PostgreSQL. Префиксные суммы поддерживаются
+    сигналами модели ``Quote`` и перестраиваются командой ``rebuild_weight_index``.
+    """
+
+    def choose(self):
+        """
+        Выбрать ``quote_id`` с вероятностью, пропорциональной весу.
+
+        Returns:
+            int | None: идентификатор цитаты или ``None``, если цитат нет.
+        """
+        last = self._last_block().first()
+        total = last.start + last.total if last else 0
+        if total <= 0:
+            return self._choose_uniform()
+
+        point = random.randrange(total)
+        block = self._block_at(point).first()
+        if block is None:
+            return self._choose_uniform()
+        return self._quote_at(block, point).first()
+
+    async def achoose(self):
+        """Асинхронный вариант ``choose()`` на асинхронном ORM."""
+        last = await self._last_block().afirst()
+        total = last.start + last.total if last else 0
+        if total <= 0:
+            return await self._achoose_uniform()
+
+        point = random.randrange(total)
+        block = await self._block_at(point).afirst()
+        if block is None:
+            return await self._achoose_uniform()
+        return await self._quote_at(block, point).afirst()
+
+    def draw(self, n):
+        """
+        Выбрать ``n`` раз независимо (с возвращением).
+
+        Блоки префиксных сумм читаются одним запросом, блок для каждой точки
+        находится двоичным поиском в памяти; внутри блока цитата выбирается
+        одним индексным запросом на точку.
+        """
+        blocks = list(
+            QuoteWeightBlock.objects.filter(total__gt=0).order_by("start").values_list("start", "block_id")
+        )
+        if not blocks:
+            return [self._choose_uniform() for _ in range(n)]
+        last = self._last_block().first()
+        total = last.start + last.total
+        starts = [start for start, _ in blocks]
+        chosen = []
+        for point in sorted(random.randrange(total) for _ in range(n)):
+            start, block_id = blocks[bisect.bisect_right(starts, point) - 1]
+            chosen.append(self._quote_at(QuoteWeightBlock(block_id=block_id, start=start), point).first())
+        random.shuffle(chosen)
+        return chosen
+
+    def total_weight(self):
+        last = self._last_block().first()
+        return last.start + last.total if last else 0
+
+    @staticmethod
+    def _last_block():
+        return QuoteWeightBlock.objects.order_by("-block_id")
+
+    @staticmethod
+    def _block_at(point):
+        return QuoteWeightBlock.objects.filter(start__lte=point, total__gt=0).order_by("-start")
+
+    @staticmethod
+    def _quote_at(block, point):
+        return (
+            Quote.objects.filter(
+                weight_block=block.block_id,
+                weight_offset__lte=point - block.start,
+                weight__gt=0,
+            )
+            .order_by("-weight_offset")
+            .values_list("pk", flat=True)
+        )
+
+    def choose_excluding(self, excluded):
+        """
+        Выбрать ``quote_id`` по весу среди цитат, не входящих в ``excluded``.
+
+        Интервалы исключённых цитат на общей шкале весов читаются двумя
+        запросами по первичным ключам (``O(len(excluded))``); случайное число
+        выбирается на шкале без них и затем сдвигается через исключённые
+        интервалы — выбор остаётся точным, без повторных попыток.
+        """
+        if not excluded:
+            return self.choose()
+        last = self._last_block().first()
+        total = last.start + last.total if last else 0
+        if total <= 0:
+            return super().choose_excluding(excluded)
+        rows = list(self._excluded_rows(excluded))
+        starts = dict(self._block_starts({block for block, _, _ in rows}))
+        point = self._skip_excluded(total, rows, starts)
+        if point is None:
+            return self.choose()
+        block = self._block_at(point).first()
+        if block is None:
+            return self._choose_uniform()
+        return self._quote_at(block, point).first()
+
+    async def achoose_excluding(self, excluded):
+        """Асинхронный вариант ``choose_excluding()`` на асинхронном ORM."""
+        if not excluded:
+            return await self.achoose()
+        last = await self._last_block().afirst()
+        total = last.start + last.total if last else 0
+        if total <= 0:
+            return await sync_to_async(super().choose_excluding)(excluded)
+        rows = [row async for row in self._excluded_rows(excluded)]
+        starts = {block: start async for block, start in self._block_starts({block for block, _, _ in rows})}
+        point = self._skip_excluded(total, rows, starts)
+        if point is None:
+            return await self.achoose()
+        block = await self._block_at(point).afirst()
+        if block is None:
+            return await self._achoose_uniform()
+        return await self._quote_at(block, point).afirst()
+
+    @staticmethod
+    def _excluded_rows(excluded):
+        return Quote.objects.filter(pk__in=list(excluded), weight__gt=0) \
+            .values_list("weight_block", "weight_offset", "weight")
+
+    @staticmethod
+    def _block_starts(block_ids):
+        return QuoteWeightBlock.objects.filter(block_id__in=list(block_ids)).values_list("block_id", "start")
+
+    @staticmethod
+    def _skip_excluded(total, rows, starts):
+        """Случайная точка шкалы весов вне интервалов исключённых цитат (``None`` — вне их ничего нет)."""
+        intervals = sorted((starts.get(block, 0) + offset, weight) for block, offset, weight in rows)
+        remaining = total - sum(weight for _, weight in intervals)
+        if remaining <= 0:
+            return None
+        point = random.randrange(remaining)
+        for start, weight in intervals:
+            if start > point:
+                break
+            point += weight
+        return point
+
+    def sample(self, k):
+        """
+        Выбрать до ``k`` разных ``quote_id`` по весу (без возвращения).
+
+        Повторяет ``choose()``, отбрасывая уже выбранные; число попыток
+        ограничено, поэтому при сильно неравных весах может вернуть меньше ``k``.
+        """
+        chosen = []
+        for _ in range(4 * k + 10):
+            if len(chosen) >= k:
+                break
+            quote_id = self.choose()
+            if quote_id is None:
+                break
+            if quote_id not in chosen:
+                chosen.append(quote_id)
+        return chosen
+
+    def invalidate(self):
+        """Состояние хранится в БД — сбрасывать нечего."""
+
+    # Сколько случайных ключей проверить до перехода к выбору по номеру строки.
+    UNIFORM_ATTEMPTS = 16
+
+    @staticmethod
+    def _ids():
+        return Quote.objects.values_list("pk", flat=True)
+
+    def _choose_uniform(self):
+        """
+        Равновероятный выбор без ``OFFSET``: случайный ключ из ``[min; max]``.
+
+        Ключ принимается, только если цитата с ним есть (по первичному ключу),
+        поэтому выбор точно равновероятный и при пропусках в ``quote_id``;
+        ожидаемое число попыток — доля пропусков в диапазоне. После
+        ``UNIFORM_ATTEMPTS`` промахов (пропусков больше, чем цитат) берётся
+        строка со случайным номером (``COUNT`` и ``OFFSET`` по первичному
+        ключу) — тоже равновероятно, но с просмотром индекса до этой строки.
+        """
+        low = self._ids().order_by("pk").first()
+        if low is None:
+            return None
+        high = self._ids().order_by("-pk").first()
+        for _ in range(self.UNIFORM_ATTEMPTS):
+            point = random.randint(low, high)
+            if self._ids().filter(pk=point).exists():
+                return point
+        count = self._ids().count()
+        if not count:
+            return None
+        return self._ids().order_by("pk")[random.randrange(count):].first()
+
+    async def _achoose_uniform(self):
+        """Асинхронный вариант ``_choose_uniform()``."""
+        low = await self._ids().order_by("pk").afirst()
+        if low is None:
+            return None
+        high = await self._ids().order_by("-pk").afirst()
+        for _ in range(self.UNIFORM_ATTEMPTS):
+            point = random.randint(low, high)
+            if await self._ids().filter(pk=point).aexists():
+                return point
+        count = await self._ids().acount()
+        if not count:
+            return None
+        return await self._ids().order_by("pk")[random.randrange(count):].afirst()
+
+
+db_sampler = DatabaseSampler()
+
+
+def get_sampler():
+    """Вернуть стратегию выбора согласно настройке ``RANDOM_QUOTE_SAMPLING``."""
+    return db_sampler if use_database_sampling() else sampler
@@ -0,0 +1,131 @@
+"""Проверка распределения стратегий взвешенного выбора.
+
+Любая стратегия ``sampling.SamplingStrategy`` должна выбирать цитаты так же,
+как исходный ``random.choices`` во ``random_quote_view``: пропорционально
+``max(0, weight)``, а при нулевом суммарном весе — равновероятно.
+
+Проверка: стратегия делает ``n`` независимых выборов (``draw``), частоты
+сравниваются с ожидаемыми вероятностями критерием хи-квадрат и критерием
+Колмогорова–Смирнова (для дискретного распределения граница берётся из
+неравенства Дворецкого–Кифера–Вольфовица). Цитата с нулевой ожидаемой
+вероятностью, выбранная хотя бы раз, — ошибка сразу.
+
+Статистики считаются векторно на NumPy (``pip install numpy``), поэтому
+обработка миллионов выборов занимает доли секунды; NumPy нужен только здесь.
+"""
+
+import math
+import random
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CheckResult = namedtuple(
+    "CheckResult", ["case", "strategy", "samples", "chi2", "dof", "p_value", "ks", "ks_limit", "zero_hits", "passed"]
+)
+
+MIN_EXPECTED = 5
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("Для проверки распределения нужен NumPy: pip install numpy")
+
+
+def expected_probabilities(weights):
+    """Ожидаемые вероятности по весам: ``max(0, w) / сумма``, при нулевой сумме — равные."""
+    _require_numpy()
+    clamped = np.maximum(np.asarray(weights, dtype=float), 0.0)
+    total = clamped.sum()
+    if total <= 0:
+        return np.full(len(clamped), 1.0 / len(clamped))
+    return clamped / total
+
+
+def chi2_sf(x, dof):
+    """
+    Вероятность ``P(X >= x)`` для распределения хи-квадрат с ``dof`` степенями свободы.
+
+    Для 1 и 2 степеней — точные формулы, иначе — приближение Уилсона–Хилферти
+    (точности достаточно для порогов порядка 1e-3).
+    """
+    if dof <= 0:
+        return 1.0
+    if dof == 1:
+        return math.erfc(math.sqrt(x / 2))
+    if dof == 2:
+        return math.exp(-x / 2)
+    z = ((x / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def check_distribution(ids, weights, draws, alpha=1e-3, case="", strategy=""):
+    """
+    Сравнить частоты выборов с ожидаемым распределением.
+
+    Args:
+        ids: ``quote_id`` по возрастанию.
+        weights: веса в том же порядке.
+        draws: выбранные ``quote_id``.
+        alpha (float): уровень значимости каждого критерия.
+
+    Returns:
+        CheckResult: статистики и итог (``passed``).
+    """
+    _require_numpy()
+    ids = np.asarray(ids)
+    draws = np.asarray(draws)
+    n = len(draws)
+    expected = expected_probabilities(weights)
+
+    positions = np.searchsorted(ids, draws)
+    valid = (positions < len(ids)) & (ids[np.minimum(positions, len(ids) - 1)] == draws)
+    counts = np.bincount(positions[valid], minlength=len(ids)).astype(float)
+    unknown = int(n - valid.sum())
+
+    zero = expected == 0
+    zero_hits = int(counts[zero].sum()) + unknown
+
+    # Хи-квадрат: ячейки с малым ожидаемым числом объединяются в одну.
+    expected_counts = expected[~zero] * n
+    observed = counts[~zero]
+    small = expected_counts < MIN_EXPECTED
+    if small.any():
+        expected_counts = np.append(expected_counts[~small], expected_counts[small].sum())
+        observed = np.append(observed[~small], observed[small].sum())
+    keep = expected_counts > 0
+    chi2 = float((((observed - expected_counts) ** 2)[keep] / expected_counts[keep]).sum())
+    dof = int(keep.sum()) - 1
+    p_value = chi2_sf(chi2, dof)
+
+    ks = float(np.abs(np.cumsum(counts) / n - np.cumsum(expected)).max()) if n else 0.0
+    ks_limit = math.sqrt(math.log(2 / alpha) / (2 * n)) if n else 0.0
+
+    passed = zero_hits == 0 and p_value >= alpha and ks <= ks_limit
+    return CheckResult(case, strategy, n, round(chi2, 2), dof, p_value, ks, ks_limit, zero_hits, passed)
+
+
+def weight_cases(size=500, seed=0):
+    """
+    Наборы весов для проверки: ``{название: [(quote_id, weight), ...]}``.
+
+    - ``skewed`` — «тяжёлый хвост» весов 1..100;
+    - ``clamped`` — с нулевыми и отрицательными весами (считаются нулём);
+    - ``all_zero`` — все веса нулевые (равновероятный выбор);
+    - ``single`` — одна цитата;
+    - ``sparse_ids`` — ``quote_id`` с пропусками.
+    """
+    rng = random.Random(seed)
+    skewed = [min(100, int(rng.paretovariate(1.2))) for _ in range(size)]
+    clamped = [rng.choice((0, 0, -5, rng.randint(1, 100))) for _ in range(size)]
+    clamped[0] = max(clamped[0], 1)
+    return {
+        "skewed": list(enumerate(skewed, start=1)),
+        "clamped": list(enumerate(clamped, start=1)),
+        "all_zero": [(quote_id, 0) for quote_id in range(1, size + 1)],
+        "single": [(1, 7)],
+        "sparse_ids": [(quote_id * 7 + rng.randint(0, 6), rng.randint(0, 100)) for quote_id in range(size)],
+    }
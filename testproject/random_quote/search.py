@@ -0,0 +1,262 @@
+"""Полнотекстовый поиск по цитатам.
+
+Индекс строится средствами БД и поддерживается ею же, поэтому остаётся
+согласованным при любых способах записи (``save()``, ``bulk_create``,
+``update()``, ручной SQL):
+
+- SQLite — виртуальная таблица FTS5 ``random_quote_quote_fts`` с внешним
+  содержимым (``content='random_quote_quote'``) и триггерами на вставку,
+  изменение текста/источника и удаление цитаты. Русского стеммера в FTS5
+  нет, поэтому слова запроса приводятся к основе упрощённым стеммером
+  (``stem``) и ищутся по префиксу (``"основ"*``); префиксные индексы FTS5
+  делают такой поиск быстрым;
+- PostgreSQL — функциональный GIN-индекс по ``to_tsvector('russian', ...)``
+  (текст цитаты с весом A, источник — B); запрос — ``to_tsquery('russian',
+  'слово:* & ...')`` со стеммингом Snowball и префиксным совпадением.
+
+Результаты ранжируются (``bm25`` / ``ts_rank``). На других СУБД поиск
+выполняется ``icontains`` по словам запроса. Структуры создаются миграцией
+и проверяются после каждого ``migrate`` (SQLite пересоздаёт таблицу при
+части изменений схемы, а вместе с ней теряются триггеры); полная
+перестройка — ``manage.py rebuild_search_index``.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Q
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.expressions import RawSQL
+
+from .models import Quote
+
+FTS_TABLE = "random_quote_quote_fts"
+TRIGGER_SUFFIXES = ("_ai", "_ad", "_au")
+PG_INDEX = "random_quote_quote_search_idx"
+PG_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(quote_text, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(source, '')), 'B')"
+)
+MIGRATION = ("random_quote", "0010_quote_search_index")
+MAX_TERMS = 8
+MIN_STEM = 3
+
+# Окончания русских слов (прилагательные, причастия, глаголы, существительные),
+# от длинных к коротким; отбрасывается одно — самое длинное подходящее.
+ENDINGS = sorted({
+    "ившись", "ывшись", "вшись", "ивши", "ывши", "вши",
+    "иями", "ями", "ами", "ией", "иях", "ием", "иям",
+    "ого", "его", "ому", "ему", "ыми", "ими", "ешь", "ишь", "ете", "ите", "ейте", "уйте",
+    "ает", "яет", "ует", "уют", "ают", "яют", "ила", "ыла", "ена", "ило", "ыло", "ено",
+    "или", "ыли", "ены", "ить", "ыть", "ать", "ять", "еть", "ость", "ости", "ение", "ения", "ении",
+    "ее", "ие", "ые", "ое", "ей", "ий", "ый", "ой", "ем", "им", "ым", "ом", "их", "ых",
+    "ую", "юю", "ая", "яя", "ою", "ею", "ах", "ях", "ам", "ям", "ов", "ев", "ия", "ья", "ию", "ью",
+    "ть", "ла", "ло", "ли", "ет", "ит", "ут", "ют", "ат", "ят",
+    "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+}, key=len, reverse=True)
+
+
+def search_limit():
+    """Максимум результатов публичного поиска."""
+    return getattr(settings, "RANDOM_QUOTE_SEARCH_LIMIT", 20)
+
+
+def terms(query):
+    """Слова запроса в нижнем регистре (не больше ``MAX_TERMS``)."""
+    return re.findall(r"[^\W_]+", (query or "").lower())[:MAX_TERMS]
+
+
+def stem(word):
+    """
+    Упрощённая основа русского слова для префиксного поиска.
+
+    Отбрасывает возвратный суффикс (``-ся``/``-сь``) и одно окончание,
+    если остаётся не меньше ``MIN_STEM`` символов. Слова на латинице и
+    короткие слова не меняются.
+    """
+    if not re.search("[а-яё]", word):
+        return word
+    for suffix in ("ся", "сь"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            word = word[:-len(suffix)]
+            break
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def fts5_query(words):
+    """Выражение ``MATCH`` FTS5: все основы по префиксу (``"основ"* AND ...``)."""
+    return " AND ".join(f'"{stem(word)}"*' for word in words)
+
+
+def pg_tsquery(words):
+    """Выражение ``to_tsquery``: все слова по префиксу (``слово:* & ...``)."""
+    return " & ".join(f"{word}:*" for word in words)
+
+
+def _connection():
+    return connections[router.db_for_read(Quote)]
+
+
+def backend(connection=None):
+    """Механизм поиска для соединения: ``"fts5"``, ``"postgres"`` или ``None``."""
+    vendor = (connection or _connection()).vendor
+    if vendor == "sqlite":
+        return "fts5"
+    if vendor == "postgresql":
+        return "postgres"
+    return None
+
+
+def _matching_sql(words, connection):
+    """SQL-подзапрос ``quote_id`` цитат, подходящих под запрос, и его параметры."""
+    table = Quote._meta.db_table
+    kind = backend(connection)
+    if kind == "fts5":
+        return f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [fts5_query(words)]
+    if kind == "postgres":
+        return (f"SELECT quote_id FROM {table} WHERE ({PG_VECTOR}) @@ to_tsquery('russian', %s)",
+                [pg_tsquery(words)])
+    return None, None
+
+
+def filter_queryset(queryset, query):
+    """
+    Ограничить ``queryset`` цитатами, подходящими под запрос (без ранжирования).
+
+    Используется списком цитат в админке.
+    """
+    words = terms(query)
+    if not words:
+        return queryset
+    sql, params = _matching_sql(words, connections[queryset.db])
+    if sql is None:
+        condition = Q()
+        for word in words:
+            condition &= Q(quote_text__icontains=word) | Q(source__icontains=word)
+        return queryset.filter(condition)
+    return queryset.filter(pk__in=RawSQL(sql, params))
+
+
+def search_quotes(query, limit=None):
+    """
+    Цитаты, подходящие под запрос, по убыванию релевантности.
+
+    Ранжирование выполняется в БД с ``LIMIT``, затем цитаты читаются одним
+    запросом по первичным ключам; у каждой выставляется ``search_rank``
+    (чем больше, тем релевантнее).
+
+    Returns:
+        list[Quote]: не больше ``limit`` (по умолчанию ``RANDOM_QUOTE_SEARCH_LIMIT``) цитат.
+    """
+    words = terms(query)
+    if not words:
+        return []
+    limit = limit or search_limit()
+    connection = _connection()
+    kind = backend(connection)
+    table = Quote._meta.db_table
+    if kind == "fts5":
+        # bm25 тем меньше, чем релевантнее; совпадение в тексте весит вдвое больше, чем в источнике.
+        sql = (f"SELECT rowid, -bm25({FTS_TABLE}, 2.0, 1.0) AS score FROM {FTS_TABLE} "
+               f"WHERE {FTS_TABLE} MATCH %s ORDER BY score DESC LIMIT %s")
+        params = [fts5_query(words), limit]
+    elif kind == "postgres":
+        sql = (f"SELECT quote_id, ts_rank({PG_VECTOR}, query) AS score "
+               f"FROM {table}, to_tsquery('russian', %s) AS query "
+               f"WHERE ({PG_VECTOR}) @@ query ORDER BY score DESC LIMIT %s")
+        params = [pg_tsquery(words), limit]
+    else:
+        quotes = list(filter_queryset(Quote.objects.all(), query)[:limit])
+        for quote in quotes:
+            quote.search_rank = 0.0
+        return quotes
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        ranks = cursor.fetchall()
+    quotes = Quote.objects.using(connection.alias).in_bulk([quote_id for quote_id, _ in ranks])
+    results = []
+    for quote_id, rank in ranks:
+        quote = quotes.get(quote_id)
+        if quote is not None:
+            quote.search_rank = rank
+            results.append(quote)
+    return results
+
+
+def _fts5_statements(table):
+    columns = "quote_text, source"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({columns}, content='{table}', "
+        f"content_rowid='quote_id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.quote_id, new.quote_text, new.source); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+        f"VALUES ('delete', old.quote_id, old.quote_text, old.source); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF quote_text, source ON {table} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+        f"VALUES ('delete', old.quote_id, old.quote_text, old.source); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.quote_id, new.quote_text, new.source); END",
+    ]
+
+
+def install(connection, table=None):
+    """
+    Создать недостающие структуры поиска (идемпотентно).
+
+    Returns:
+        bool: ``True``, если что-то пришлось создавать (индекс нужно перестроить:
+        пока триггеров не было, изменения цитат в него не попадали).
+    """
+    table = table or Quote._meta.db_table
+    kind = backend(connection)
+    with connection.cursor() as cursor:
+        if kind == "fts5":
+            cursor.execute("SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+                           [FTS_TABLE, *(FTS_TABLE + suffix for suffix in TRIGGER_SUFFIXES)])
+            missing = len(TRIGGER_SUFFIXES) + 1 - len(cursor.fetchall())
+            for statement in _fts5_statements(table):
+                cursor.execute(statement)
+            return missing > 0
+        if kind == "postgres":
+            cursor.execute("SELECT to_regclass(%s)", [PG_INDEX])
+            created = cursor.fetchone()[0] is None
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON {table} USING GIN (({PG_VECTOR}))")
+            return created
+    return False
+
+
+def rebuild(connection):
+    """Перестроить поисковый индекс по текущему содержимому таблицы цитат."""
+    kind = backend(connection)
+    with connection.cursor() as cursor:
+        if kind == "fts5":
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif kind == "postgres":
+            cursor.execute(f"REINDEX INDEX {PG_INDEX}")
+
+
+def uninstall(connection):
+    """Удалить структуры поиска (откат миграции)."""
+    kind = backend(connection)
+    with connection.cursor() as cursor:
+        if kind == "fts5":
+            for suffix in TRIGGER_SUFFIXES:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        elif kind == "postgres":
+            cursor.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+
+
+def ensure_search_index(sender, using, **kwargs):
+    """Обработчик ``post_migrate``: восстановить структуры поиска после изменений схемы."""
+    connection = connections[using]
+    if MIGRATION not in MigrationRecorder(connection).applied_migrations():
+        return
+    if install(connection):
+        rebuild(connection)
@@ -0,0 +1,235 @@
+"""Шардированные счётчики реакций для «горячих» цитат.
+
+Реакция — ``UPDATE`` строки ``Quote``: когда цитата становится вирусной,
+все клики ждут блокировки одной строки (в SQLite — всей базы) и каждый
+заново обновляет индексы цитат по лайкам, весу и популярности. Для таких
+цитат реакции пишутся в одну из ``RANDOM_QUOTE_REACTION_SHARDS`` строк
+``QuoteCounterShard``, выбранную случайно:
+
+- ``HotQuoteDetector`` считает реакции цитат в окне
+  ``RANDOM_QUOTE_HOT_WINDOW`` секунд; цитата, получившая в одном процессе
+  не меньше ``RANDOM_QUOTE_HOT_REACTIONS`` реакций за окно, помечается
+  горячей в кэше на ``RANDOM_QUOTE_HOT_TTL`` секунд (пометка продлевается,
+  пока поток реакций не спадёт) — режим переключается во всех процессах;
+- ``record`` прибавляет реакцию к случайному шарду (строки шардов
+  создаются при пометке);
+- ``take_pending`` вычитает накопленное из шардов и возвращает итоги по
+  цитатам — их переносит в ``Quote`` ``reactions.fold_reaction_shards``
+  (фоновым потоком не чаще раза в ``RANDOM_QUOTE_SHARD_FOLD_INTERVAL``
+  секунд на процесс и командой ``manage.py fold_reaction_shards``);
+- ``pending_reactions`` — ещё не перенесённые реакции горячей цитаты для
+  показа (как ``counters.watches_buffer.pending`` для просмотров);
+- ``prune`` удаляет пустые шарды остывших цитат.
+
+``RANDOM_QUOTE_REACTION_SHARDS = 0`` выключает шардирование; по умолчанию
+(``None``) оно выключено для SQLite: там запись блокирует всю базу, и шарды
+не разгружают запись, а только добавляют перенос.
+"""
+
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F, Q, Sum
+
+from .db import PRIMARY
+from .models import QuoteCounterShard
+
+HOT_KEY_PREFIX = "random_quote:hot"
+
+
+def shard_count():
+    """Число шардов счётчика горячей цитаты (0 — шардирование выключено)."""
+    shards = getattr(settings, "RANDOM_QUOTE_REACTION_SHARDS", None)
+    if shards is None:
+        return 0 if connections[PRIMARY].vendor == "sqlite" else 8
+    return shards
+
+
+def hot_reactions():
+    """Сколько реакций за окно в одном процессе делают цитату горячей."""
+    return getattr(settings, "RANDOM_QUOTE_HOT_REACTIONS", 30)
+
+
+def hot_window():
+    """Окно подсчёта реакций для определения горячих цитат (в секундах)."""
+    return getattr(settings, "RANDOM_QUOTE_HOT_WINDOW", 10)
+
+
+def hot_ttl():
+    """Сколько секунд цитата остаётся горячей после последнего превышения порога."""
+    return getattr(settings, "RANDOM_QUOTE_HOT_TTL", 300)
+
+
+def fold_interval():
+    """Период переноса шардов в ``Quote`` из обработчиков реакций (в секундах)."""
+    return getattr(settings, "RANDOM_QUOTE_SHARD_FOLD_INTERVAL", 5)
+
+
+def _hot_key(quote_id):
+    return f"{HOT_KEY_PREFIX}:{quote_id}"
+
+
+def is_hot(quote_id):
+    """Включён ли для цитаты шардированный режим."""
+    return bool(shard_count()) and cache.get(_hot_key(quote_id)) is not None
+
+
+def mark_hot(quote_id):
+    """
+    Перевести цитату в шардированный режим (или продлить его).
+
+    Недостающие строки шардов создаются одним ``bulk_create``.
+
+    Returns:
+        bool: ``False``, если цитаты уже нет.
+    """
+    shards = shard_count()
+    try:
+        with transaction.atomic():
+            QuoteCounterShard.objects.bulk_create(
+                [QuoteCounterShard(quote_id=quote_id, shard=shard) for shard in range(shards)],
+                ignore_conflicts=True,
+            )
+    except IntegrityError:
+        return False
+    cache.set(_hot_key(quote_id), shards, hot_ttl())
+    return True
+
+
+class HotQuoteDetector:
+    """
+    Счётчик реакций цитат в текущем окне ``RANDOM_QUOTE_HOT_WINDOW`` секунд.
+
+    Хранит только цитаты, получившие реакции в текущем окне; при смене окна
+    счётчики обнуляются. Порог проверяется в момент его достижения, поэтому
+    пометка в кэше ставится не чаще раза за окно на цитату.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._window_started = time.monotonic()
+
+    def hit(self, quote_id, count=1):
+        """
+        Учесть ``count`` реакций цитаты.
+
+        Returns:
+            bool: цитата только что превысила порог (и помечена горячей).
+        """
+        if not shard_count():
+            return False
+        threshold = hot_reactions()
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_started >= hot_window():
+                self._counts = {}
+                self._window_started = now
+            before = self._counts.get(quote_id, 0)
+            self._counts[quote_id] = before + count
+        if before < threshold <= before + count:
+            return mark_hot(quote_id)
+        return False
+
+
+hot_quotes = HotQuoteDetector()
+
+
+def _shard(quote_id):
+    return QuoteCounterShard.objects.filter(quote_id=quote_id, shard=random.randrange(shard_count()))
+
+
+def record(quote_id, likes, dislikes):
+    """
+    Прибавить реакции к случайному шарду цитаты.
+
+    Returns:
+        bool: ``False``, если строки шарда нет (цитата удалена или изменилось
+        ``RANDOM_QUOTE_REACTION_SHARDS``) — реакцию нужно применить к ``Quote``.
+    """
+    return bool(_shard(quote_id).update(likes=F("likes") + likes, dislikes=F("dislikes") + dislikes))
+
+
+async def arecord(quote_id, likes, dislikes):
+    """Асинхронный вариант ``record()``."""
+    return bool(await _shard(quote_id).aupdate(likes=F("likes") + likes, dislikes=F("dislikes") + dislikes))
+
+
+def take_pending():
+    """
+    Вычесть накопленные реакции из шардов.
+
+    Вызывается внутри транзакции, в которой итоги переносятся в ``Quote``.
+    Из шарда вычитается прочитанное значение (а не записывается ноль),
+    поэтому реакции, пришедшие между чтением и записью, не теряются.
+    Шарды с одинаковыми значениями обновляются одним ``UPDATE``.
+
+    Returns:
+        dict: ``{quote_id: [likes, dislikes]}``.
+    """
+    rows = list(
+        QuoteCounterShard.objects.select_for_update()
+        .filter(Q(likes__gt=0) | Q(dislikes__gt=0))
+        .values_list("pk", "quote_id", "likes", "dislikes")
+    )
+    totals = {}
+    groups = {}
+    for pk, quote_id, likes, dislikes in rows:
+        total = totals.setdefault(quote_id, [0, 0])
+        total[0] += likes
+        total[1] += dislikes
+        groups.setdefault((likes, dislikes), []).append(pk)
+    for (likes, dislikes), pks in groups.items():
+        QuoteCounterShard.objects.filter(pk__in=pks).update(likes=F("likes") - likes, dislikes=F("dislikes") - dislikes)
+    return totals
+
+
+def pending_reactions(quote_id):
+    """
+    Ещё не перенесённые в ``Quote`` реакции горячей цитаты.
+
+    Returns:
+        tuple[int, int]: лайки и дизлайки (нули — без запроса, если цитата не горячая).
+    """
+    if not is_hot(quote_id):
+        return 0, 0
+    sums = QuoteCounterShard.objects.filter(quote_id=quote_id).aggregate(likes=Sum("likes"), dislikes=Sum("dislikes"))
+    return sums["likes"] or 0, sums["dislikes"] or 0
+
+
+def prune():
+    """
+    Удалить пустые шарды цитат, которые больше не горячие.
+
+    Returns:
+        int: число удалённых строк.
+    """
+    quote_ids = list(QuoteCounterShard.objects.order_by().values_list("quote_id", flat=True).distinct())
+    hot = cache.get_many([_hot_key(quote_id) for quote_id in quote_ids])
+    cold = [quote_id for quote_id in quote_ids if _hot_key(quote_id) not in hot]
+    deleted, _ = QuoteCounterShard.objects.filter(quote_id__in=cold, likes=0, dislikes=0).delete()
+    return deleted
+
+
+class FoldSchedule:
+    """Когда процессу пора переносить шарды в ``Quote`` (раз в ``RANDOM_QUOTE_SHARD_FOLD_INTERVAL`` секунд)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._folded_at = time.monotonic()
+
+    def due(self):
+        """Пора ли переносить; если да — отсчёт начинается заново."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._folded_at < fold_interval():
+                return False
+            self._folded_at = now
+            return True
+
+
+fold_schedule = FoldSchedule()
@@ -0,0 +1,78 @@
+"""Сигналы модели Quote.
+
+Поддерживают в актуальном состоянии процессные структуры приложения
+(индекс взвешенного выбора ``sampling.sampler``) и префиксные суммы весов
+в БД (если включён ``RANDOM_QUOTE_SAMPLING = "database"``) при создании,
+изменении и удалении цитат — из форм, админки и обработчиков реакций,
+а также материализованную статистику ``QuoteStats``, топ цитат, очередь
+заранее выбранных цитат (``sample_queue``) и версию содержимого для кэша страниц.
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .caching import bump_content_version
+from .db import PRIMARY
+from .leaderboard import leaderboard
+from .models import Quote
+from .sample_queue import sample_queue
+from .sampling import refresh_weight_block, sampler, use_database_sampling, weight_block_size
+from .stats import apply_stats_deltas, merge_deltas, quote_deltas, use_materialized_stats
+
+STATS_FIELDS = ("source", "source_type", "watches", "likes", "dislikes", "weight")
+
+
+def _stats_deltas(values, sign):
+    source, source_type, watches, likes, dislikes, weight = values
+    return quote_deltas(source, source_type, sign=sign, watches=watches, likes=likes,
+                        dislikes=dislikes, weight=weight)
+
+
+@receiver(pre_save, sender=Quote)
+def quote_saving(sender, instance, raw=False, **kwargs):
+    """Запомнить значения из БД до изменения — для пересчёта статистики."""
+    instance._stats_before = None
+    if raw or instance._state.adding or not use_materialized_stats():
+        return
+    instance._stats_before = (
+        Quote.objects.using(PRIMARY).filter(pk=instance.pk).values_list(*STATS_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=Quote)
+def quote_saved(sender, instance, created=False, update_fields=None, raw=False, **kwargs):
+    """Обновить статистику и вес цитаты в индексах выбора после сохранения."""
+    if use_materialized_stats() and not raw:
+        # Только что записанную строку читаем с основной БД: реплика может отставать.
+        after = Quote.objects.using(PRIMARY).filter(pk=instance.pk).values_list(*STATS_FIELDS).first()
+        before = getattr(instance, "_stats_before", None)
+        parts = [_stats_deltas(after, 1)]
+        if before is not None:
+            parts.append(_stats_deltas(before, -1))
+        apply_stats_deltas(merge_deltas(*parts))
+    leaderboard.touch([instance.pk])
+    bump_content_version()
+    if created:
+        sample_queue.note_weight_change(instance.weight)
+    else:
+        # В очереди лежат прочитанные заранее поля цитаты — они могли измениться.
+        sample_queue.discard()
+
+    if update_fields is not None and "weight" not in update_fields:
+        return
+    sampler.update(instance.pk, instance.weight)
+    if use_database_sampling():
+        refresh_weight_block(instance.pk // weight_block_size())
+
+
+@receiver(post_delete, sender=Quote)
+def quote_deleted(sender, instance, **kwargs):
+    """Вычесть удалённую цитату из статистики и исключить из индексов выбора."""
+    if use_materialized_stats():
+        apply_stats_deltas(_stats_deltas([getattr(instance, name) for name in STATS_FIELDS], -1))
+    sampler.remove(instance.pk)
+    sample_queue.discard()
+    leaderboard.discard(instance.pk)
+    bump_content_version()
+    if use_database_sampling():
+        refresh_weight_block(instance.pk // weight_block_size())
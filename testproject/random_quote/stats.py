@@ -0,0 +1,344 @@
+"""Материализованная статистика для дашборда.
+
+Содержит функции поддержки таблицы ``QuoteStats``:
+- ``quote_deltas`` — вклад одной цитаты во все строки статистики;
+- ``apply_stats_deltas`` — атомарное применение приращений (F-выражения);
+- ``StatsDeltaBuffer`` / ``stats_buffer`` — процессный буфер приращений
+  от реакций, записываемый пачкой вне транзакций реакций;
+- ``collect_stats`` — пересчёт статистики с нуля агрегатами по таблице цитат;
+- ``rebuild_stats`` — полная перестройка таблицы (с отчётом о расхождениях);
+- ``refresh_metric`` — пересчёт одной метрики во всех строках после массовых изменений;
+- ``dashboard_stats`` — данные дашборда из нескольких готовых строк.
+
+Инкрементальное обновление включается настройкой
+``RANDOM_QUOTE_MATERIALIZED_STATS``; при выключенной настройке
+дашборд считает агрегаты напрямую.
+"""
+
+import atexit
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from .models import Quote, QuoteStats
+
+
+def use_materialized_stats():
+    """Включено ли ведение материализованной статистики."""
+    return getattr(settings, "RANDOM_QUOTE_MATERIALIZED_STATS", True)
+
+
+def stats_keys(source, source_type):
+    """Ключи ``(scope, key)`` строк статистики, в которые входит цитата."""
+    return (
+        (QuoteStats.GLOBAL, ""),
+        (QuoteStats.SOURCE_TYPE, source_type),
+        (QuoteStats.SOURCE, source),
+    )
+
+
+def quote_deltas(source, source_type, sign=1, quotes=1, watches=0, likes=0, dislikes=0, weight=0):
+    """
+    Вклад цитаты (или изменения её метрик) во все строки статистики.
+
+    Args:
+        sign (int): ``1`` — добавить вклад, ``-1`` — вычесть.
+
+    Returns:
+        dict: ``{(scope, key): {метрика: приращение}}``.
+    """
+    metrics = {
+        "quotes": sign * quotes,
+        "watches": sign * watches,
+        "likes": sign * likes,
+        "dislikes": sign * dislikes,
+        "weight_sum": sign * weight,
+    }
+    return {key: dict(metrics) for key in stats_keys(source, source_type)}
+
+
+def merge_deltas(*parts):
+    """Сложить несколько словарей приращений ``quote_deltas``."""
+    merged = defaultdict(lambda: defaultdict(int))
+    for part in parts:
+        for key, metrics in part.items():
+            for name, value in metrics.items():
+                merged[key][name] += value
+    return merged
+
+
+def apply_stats_deltas(deltas):
+    """
+    Применить приращения к строкам ``QuoteStats`` одним ``UPDATE`` на строку.
+
+    Отсутствующие строки создаются. Строки обрабатываются в постоянном
+    порядке, чтобы параллельные транзакции не блокировали друг друга.
+    Точка сохранения не создаётся: ошибка откатывает всю транзакцию вызывающего.
+    """
+    if not use_materialized_stats():
+        return
+    with transaction.atomic(savepoint=False):
+        for (scope, key), metrics in sorted(deltas.items()):
+            changes = {name: F(name) + value for name, value in metrics.items() if value}
+            if not changes:
+                continue
+            if not QuoteStats.objects.filter(scope=scope, key=key).update(**changes):
+                QuoteStats.objects.get_or_create(scope=scope, key=key)
+                QuoteStats.objects.filter(scope=scope, key=key).update(**changes)
+
+
+class StatsDeltaBuffer:
+    """
+    Буфер приращений ``QuoteStats`` от реакций.
+
+    Каждая реакция меняет строку ``GLOBAL`` — одну на всю таблицу; ``UPDATE``
+    этой строки в транзакции реакции сериализовал бы все реакции на ней.
+    Поэтому приращения складываются в памяти процесса по ``(scope, key)``
+    уже после записи цитат и применяются ``apply_stats_deltas`` отдельной
+    короткой транзакцией. Сброс — как у ``counters.ViewCounterBuffer``:
+    по истечении ``RANDOM_QUOTE_STATS_FLUSH_INTERVAL`` секунд, при
+    переполнении (``RANDOM_QUOTE_STATS_MAX_PENDING`` строк), явным
+    ``flush()`` и при завершении процесса. Перед чтением статистики
+    (``dashboard_stats``, ``rebuild_stats``, ``refresh_metric``) буфер
+    процесса сбрасывается.
+
+    Буферы других процессов записываются в пределах интервала сброса;
+    приращения, ещё не записанные ими во время ``rebuild_stats``, будут
+    учтены повторно — следующая проверка ``rebuild_quote_stats --check``
+    покажет такое расхождение.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._flushed_at = time.monotonic()
+
+    @property
+    def interval(self):
+        return getattr(settings, "RANDOM_QUOTE_STATS_FLUSH_INTERVAL", 5)
+
+    @property
+    def max_pending(self):
+        return getattr(settings, "RANDOM_QUOTE_STATS_MAX_PENDING", 1000)
+
+    def add(self, deltas, autoflush=True):
+        """
+        Учесть приращения ``{(scope, key): {метрика: приращение}}``; при необходимости сбросить буфер.
+
+        Returns:
+            bool: пора ли сбросить буфер.
+        """
+        if not use_materialized_stats() or not deltas:
+            return False
+        with self._lock:
+            for key, metrics in deltas.items():
+                pending = self._pending.setdefault(key, {})
+                for name, value in metrics.items():
+                    if value:
+                        pending[name] = pending.get(name, 0) + value
+            due = (
+                time.monotonic() - self._flushed_at >= self.interval
+                or len(self._pending) >= self.max_pending
+            )
+        if due and autoflush:
+            self.flush()
+        return due
+
+    def flush(self):
+        """
+        Применить накопленные приращения (один ``UPDATE`` на строку статистики).
+
+        Returns:
+            int: число строк статистики с приращениями.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return 0
+        try:
+            apply_stats_deltas(pending)
+        except Exception:
+            with self._lock:
+                for key, metrics in pending.items():
+                    current = self._pending.setdefault(key, {})
+                    for name, value in metrics.items():
+                        current[name] = current.get(name, 0) + value
+            raise
+        return len(pending)
+
+
+stats_buffer = StatsDeltaBuffer()
+
+
+def _flush_on_exit():
+    try:
+        stats_buffer.flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_on_exit)
+
+
+def apply_metric_deltas(metric, deltas):
+    """
+    Отразить в статистике приращения одной метрики для набора цитат.
+
+    Читает ``source``/``source_type`` затронутых цитат одним запросом
+    и агрегирует приращения по строкам статистики.
+
+    Args:
+        metric (str): ``"watches"``, ``"likes"``, ``"dislikes"`` или ``"weight"``.
+        deltas (dict): ``{quote_id: приращение}``.
+    """
+    if not use_materialized_stats() or not deltas:
+        return
+    name = "weight_sum" if metric == "weight" else metric
+    rows = Quote.objects.filter(pk__in=list(deltas)).values_list("pk", "source", "source_type")
+    merged = defaultdict(lambda: defaultdict(int))
+    for pk, source, source_type in rows:
+        for key in stats_keys(source, source_type):
+            merged[key][name] += deltas[pk]
+    apply_stats_deltas(merged)
+
+
+def collect_stats(quote_model=Quote):
+    """
+    Посчитать статистику с нуля агрегатами по таблице цитат.
+
+    Returns:
+        dict: ``{(scope, key): {метрика: значение}}``.
+    """
+    aggregates = dict(
+        quotes=Count("pk"),
+        watches=Sum("watches"),
+        likes=Sum("likes"),
+        dislikes=Sum("dislikes"),
+        weight_sum=Sum("weight"),
+    )
+    result = {(QuoteStats.GLOBAL, ""): _metrics(quote_model.objects.aggregate(**aggregates))}
+    for field, scope in (("source_type", QuoteStats.SOURCE_TYPE), ("source", QuoteStats.SOURCE)):
+        for row in quote_model.objects.order_by().values(field).annotate(**aggregates):
+            result[(scope, row[field])] = _metrics(row)
+    return result
+
+
+def _metrics(row):
+    """Значения метрик из строки агрегатов (``None`` → 0)."""
+    return {name: row.get(name) or 0 for name in QuoteStats.METRICS}
+
+
+def rebuild_stats(quote_model=Quote, stats_model=QuoteStats, dry_run=False):
+    """
+    Перестроить ``QuoteStats`` с нуля и вернуть найденные расхождения.
+
+    Args:
+        dry_run (bool): только сравнить, ничего не записывая.
+
+    Returns:
+        list[tuple]: ``(scope, key, метрика, сохранено, фактически)``
+        для каждого расхождения.
+    """
+    stats_buffer.flush()
+    with transaction.atomic():
+        fresh = collect_stats(quote_model)
+        stored = {
+            (row["scope"], row["key"]): row
+            for row in stats_model.objects.values("scope", "key", *QuoteStats.METRICS)
+        }
+        drift = []
+        for key in sorted(fresh.keys() | stored.keys()):
+            actual = fresh.get(key, {})
+            saved = stored.get(key, {})
+            for name in QuoteStats.METRICS:
+                if (saved.get(name) or 0) != (actual.get(name) or 0):
+                    drift.append((key[0], key[1], name, saved.get(name) or 0, actual.get(name) or 0))
+
+        if not dry_run:
+            stats_model.objects.all().delete()
+            stats_model.objects.bulk_create(
+                [stats_model(scope=scope, key=key, **metrics) for (scope, key), metrics in fresh.items()],
+                batch_size=1000,
+            )
+    return drift
+
+
+def refresh_metric(metric, batch_size=500):
+    """
+    Пересчитать одну метрику во всех строках ``QuoteStats`` агрегатами по цитатам.
+
+    Дешевле приращений, когда изменились значения у большой доли цитат
+    (пакетный пересчёт весов): три агрегата ``GROUP BY`` и ``bulk_update``
+    только изменившихся строк.
+
+    Args:
+        metric (str): ``"watches"``, ``"likes"``, ``"dislikes"`` или ``"weight"``.
+
+    Returns:
+        int: число обновлённых строк статистики.
+    """
+    if not use_materialized_stats():
+        return 0
+    # Буферизованные приращения уже есть в агрегатах по цитатам.
+    stats_buffer.flush()
+    name = "weight_sum" if metric == "weight" else metric
+    fresh = {(QuoteStats.GLOBAL, ""): Quote.objects.aggregate(value=Sum(metric))["value"] or 0}
+    for field, scope in (("source_type", QuoteStats.SOURCE_TYPE), ("source", QuoteStats.SOURCE)):
+        for key, value in Quote.objects.order_by().values_list(field).annotate(value=Sum(metric)):
+            fresh[(scope, key)] = value or 0
+    with transaction.atomic():
+        changed = []
+        for row in QuoteStats.objects.select_for_update().only("pk", "scope", "key", name):
+            value = fresh.get((row.scope, row.key), 0)
+            if getattr(row, name) != value:
+                setattr(row, name, value)
+                changed.append(row)
+        QuoteStats.objects.bulk_update(changed, [name], batch_size=batch_size)
+    return len(changed)
+
+
+def dashboard_stats(top_sources_limit=5):
+    """
+    Собрать данные дашборда из материализованной статистики.
+
+    Читает строку ``GLOBAL``, строки типов источников и топ источников по
+    лайкам — три запроса по индексам, независимо от размера таблицы цитат.
+    Перед чтением записываются приращения из ``stats_buffer`` этого процесса.
+
+    Returns:
+        tuple: ``(stats, source_stats, top_sources)`` в формате,
+        который ожидает шаблон ``dashboard.html``.
+    """
+    stats_buffer.flush()
+    total = QuoteStats.objects.filter(scope=QuoteStats.GLOBAL, key="").first() or QuoteStats()
+    stats = {
+        'total_quotes': total.quotes,
+        'total_views': total.watches,
+        'total_likes': total.likes,
+        'total_dislikes': total.dislikes,
+        'avg_weight': total.avg_weight,
+    }
+
+    labels = dict(Quote.SOURCE_CHOICES)
+    source_stats = [
+        {
+            'source_type': row.key,
+            'source_type_label': labels.get(row.key, 'Неизвестно'),
+            'count': row.quotes,
+            'total_likes': row.likes,
+            'total_views': row.watches,
+        }
+        for row in QuoteStats.objects.filter(scope=QuoteStats.SOURCE_TYPE, quotes__gt=0).order_by('-quotes')
+    ]
+
+    top_sources = [
+        {'source': row.key, 'count': row.quotes, 'total_likes': row.likes}
+        for row in QuoteStats.objects.filter(scope=QuoteStats.SOURCE, quotes__gt=0)
+        .order_by('-likes')[:top_sources_limit]
+    ]
+    return stats, source_stats, top_sources
@@ -0,0 +1,45 @@
+"""Фоновые задачи асинхронных views.
+
+``fire_and_forget`` запускает синхронную функцию (запись в БД, сброс
+буфера просмотров) в пуле потоков и не ждёт её завершения: ответ клиенту
+уходит сразу. Ссылки на задачи хранятся до их завершения, чтобы сборщик
+мусора не отменил их; ошибки выводятся в stderr.
+"""
+
+import asyncio
+import sys
+import traceback
+
+from asgiref.sync import sync_to_async
+
+_tasks = set()
+
+
+def _done(task):
+    _tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        traceback.print_exception(type(task.exception()), task.exception(), task.exception().__traceback__,
+                                  file=sys.stderr)
+
+
+def fire_and_forget(func, *args, **kwargs):
+    """
+    Запустить ``func(*args, **kwargs)`` в пуле потоков без ожидания результата.
+
+    Должна вызываться из работающего цикла событий (асинхронного view).
+
+    Returns:
+        asyncio.Task: запущенная задача.
+    """
+    task = asyncio.get_running_loop().create_task(
+        sync_to_async(func, thread_sensitive=False)(*args, **kwargs)
+    )
+    _tasks.add(task)
+    task.add_done_callback(_done)
+    return task
+
+
+async def drain():
+    """Дождаться завершения всех запущенных фоновых задач (для тестов и нагрузочного прогона)."""
+    while _tasks:
+        await asyncio.gather(*list(_tasks), return_exceptions=True)
@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.contrib.admin.views.main import ERROR_FLAG
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from random_quote.admin import QuoteAdmin
+from random_quote.bulk import bulk_set
+from random_quote.models import Quote, QuoteStats, like_percentage, popularity_score
+from random_quote.pagination import EstimatedCountPaginator
+from random_quote.sampling import sampler
+from random_quote.stats import rebuild_stats
+
+from .utils import QuoteTestCase, make_quotes
+
+
+class BulkSetTests(QuoteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quotes = make_quotes([1, 2, 3], watches=10, likes=4, dislikes=1)
+        rebuild_stats()
+
+    def test_updates_scores_stats_and_sampler(self):
+        self.assertEqual(sampler.total_weight(), 6)
+        updated = bulk_set(Quote.objects.filter(pk__in=[self.quotes[0].pk, self.quotes[1].pk]),
+                           weight=50, likes=0, source_type=Quote.MOVIE)
+        self.assertEqual(updated, 2)
+        quote = Quote.objects.get(pk=self.quotes[0].pk)
+        self.assertEqual((quote.weight, quote.likes, quote.source_type), (50, 0, Quote.MOVIE))
+        self.assertEqual(quote.popularity_score, popularity_score(0, 1, 10, 50))
+        self.assertEqual(quote.like_percentage, like_percentage(0, 1))
+        self.assertEqual(rebuild_stats(dry_run=True), [])
+        self.assertEqual(sampler.total_weight(), 103)
+
+    def test_rejects_other_fields(self):
+        with self.assertRaises(ValueError):
+            bulk_set(Quote.objects.all(), quote_text="Другой текст")
+        self.assertEqual(Quote.objects.filter(weight=1).count(), 1)
+
+
+class QuoteAdminTests(QuoteTestCase):
+    url = reverse("admin:random_quote_quote_changelist")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+
+    def act(self, action, quotes, **data):
+        return self.client.post(self.url, {
+            "action": action, "_selected_action": [quote.pk for quote in quotes], **data,
+        }, follow=True)
+
+    def test_bulk_actions(self):
+        first, second = make_quotes([1, 2], watches=5, likes=3, dislikes=2)
+        rebuild_stats()
+        self.act("set_weight", [first], weight="40")
+        self.act("set_source_type", [first, second], source_type=Quote.MOVIE)
+        self.act("reset_counters", [second])
+        self.assertEqual(list(Quote.objects.order_by("pk").values_list("weight", "source_type", "likes", "watches")),
+                         [(40, Quote.MOVIE, 3, 5), (2, Quote.MOVIE, 0, 0)])
+        self.assertEqual(rebuild_stats(dry_run=True), [])
+
+    def test_invalid_action_parameters_change_nothing(self):
+        quote = make_quotes([1])[0]
+        for action, data in (("set_weight", {"weight": ""}), ("set_source_type", {"source_type": ""})):
+            with self.subTest(action=action):
+                response = self.act(action, [quote], **data)
+                self.assertEqual([message.level_tag for message in response.context["messages"]], ["error"])
+        self.assertEqual(Quote.objects.get().weight, 1)
+
+    @mock.patch.object(QuoteAdmin, "list_per_page", 3)
+    def test_pages_follow_index_order_without_gaps(self):
+        # Одинаковые счётчики: порядок между страницами задаёт только quote_id.
+        quotes = make_quotes([1] * 7)
+        rebuild_stats()
+
+        def page(number):
+            response = self.client.get(self.url, {"p": number})
+            changelist = response.context["cl"]
+            self.assertIsInstance(changelist.paginator, EstimatedCountPaginator)
+            return [quote.pk for quote in changelist.result_list], changelist.paginator.num_pages
+
+        pages = [page(number) for number in (1, 2, 3)]
+        self.assertEqual([num_pages for _, num_pages in pages], [3, 3, 3])
+        self.assertEqual([ids for ids, _ in pages],
+                         [[quote.pk for quote in quotes[start:start + 3]] for start in (0, 3, 6)])
+
+        # Удалённая строка сдвигает список: последняя страница исчезает, остальные без пропусков.
+        quotes[2].delete()
+        self.assertEqual(page(1), ([quotes[0].pk, quotes[1].pk, quotes[3].pk], 2))
+        self.assertEqual(page(2), ([quote.pk for quote in quotes[4:]], 2))
+        self.assertIn(ERROR_FLAG + "=1", self.client.get(self.url, {"p": 3})["Location"])
+
+    @mock.patch.object(QuoteAdmin, "list_per_page", 3)
+    def test_stale_estimate_leaves_last_page_empty(self):
+        quotes = make_quotes([1] * 4)
+        rebuild_stats()
+        QuoteStats.objects.filter(scope=QuoteStats.GLOBAL).update(quotes=7)
+        response = self.client.get(self.url, {"p": 3})
+        self.assertEqual(list(response.context["cl"].result_list), [])
+        response = self.client.get(self.url, {"p": 2})
+        self.assertEqual([quote.pk for quote in response.context["cl"].result_list], [quotes[3].pk])
@@ -0,0 +1,38 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from random_quote.counters import watches_buffer
+from random_quote.models import Quote
+
+from .utils import QuoteTestCase, make_quotes
+
+
+class RandomQuotesApiTests(QuoteTestCase):
+    url = reverse("api_quotes_random")
+
+    def test_count_includes_current_view_after_inline_flush(self):
+        quote = make_quotes([1], watches=10)[0]
+        with self.settings(RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL=3600):
+            watches_buffer.increment(quote.pk, amount=2)
+        with self.settings(RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL=0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()["quotes"][0]["watches"], 13)
+        self.assertEqual(Quote.objects.get(pk=quote.pk).watches, 13)
+        self.assertEqual(watches_buffer.pending(quote.pk), 0)
+
+    @override_settings(RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL=3600)
+    def test_count_includes_buffered_views(self):
+        quote = make_quotes([1], watches=10)[0]
+        for _ in range(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()["quotes"][0]["watches"], 13)
+        self.assertEqual(Quote.objects.get(pk=quote.pk).watches, 10)
+
+    @override_settings(RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL=3600)
+    def test_distinct_quotes_and_bounds(self):
+        make_quotes([1, 2, 3])
+        quotes = self.client.get(self.url, {"n": 3}).json()["quotes"]
+        self.assertEqual(len({quote["quote_id"] for quote in quotes}), 3)
+        for n in ("0", "51", "x"):
+            with self.subTest(n=n):
+                self.assertEqual(self.client.get(self.url, {"n": n}).status_code, 400)
@@ -0,0 +1,61 @@
+from django.test import override_settings
+from django.urls import path, reverse
+
+from random_quote import async_views, urls
+from random_quote.counters import watches_buffer
+from random_quote.models import Quote
+from random_quote.sampling import sampler
+from random_quote.tasks import drain
+
+from .utils import QuoteTestCase, make_quotes
+
+# Маршруты приложения с асинхронными views, как при ``RANDOM_QUOTE_ASYNC_VIEWS = True``.
+ASYNC_VIEWS = {
+    "random_quote": async_views.random_quote_view,
+    "quote_like": async_views.like_quote,
+    "quote_dislike": async_views.dislike_quote,
+    "quotes_top": async_views.top_quotes_view,
+    "dashboard": async_views.dashboard_view,
+}
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS.get(pattern.name, pattern.callback), name=pattern.name)
+    for pattern in urls.urlpatterns
+]
+
+
+@override_settings(ROOT_URLCONF=__name__, RANDOM_QUOTE_SAMPLE_QUEUE=False, RANDOM_QUOTE_REACTION_SHARDS=0,
+                   RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL=3600)
+class AsyncViewTests(QuoteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quote = make_quotes([1], watches=10, likes=2)[0]
+        # Индекс выбора загружается заранее: реакции меняют его фоновыми задачами.
+        self.assertEqual(sampler.total_weight(), 1)
+
+    async def test_random_quote_counts_unflushed_watches(self):
+        watches_buffer.increment(self.quote.pk, amount=2, autoflush=False)
+        response = await self.async_client.get(reverse("random_quote"))
+        await drain()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["quote"].pk, self.quote.pk)
+        self.assertEqual(response.context["quote"].watches, 13)
+        self.assertEqual(watches_buffer.pending(self.quote.pk), 3)
+
+    async def test_reactions(self):
+        response = await self.async_client.post(reverse("quote_like", args=[self.quote.pk]))
+        self.assertRedirects(response, reverse("random_quote"), fetch_redirect_response=False)
+        await drain()
+        quote = await Quote.objects.aget(pk=self.quote.pk)
+        self.assertEqual((quote.likes, quote.dislikes, quote.weight), (3, 0, 2))
+        self.assertEqual(sampler.total_weight(), 2)
+
+        await self.async_client.post(reverse("quote_dislike", args=[self.quote.pk]))
+        await drain()
+        quote = await Quote.objects.aget(pk=self.quote.pk)
+        self.assertEqual((quote.likes, quote.dislikes, quote.weight), (3, 1, 1))
+
+    async def test_reaction_rejects_get_and_missing_quote(self):
+        url = reverse("quote_like", args=[self.quote.pk])
+        self.assertEqual((await self.async_client.get(url)).status_code, 405)
+        missing = reverse("quote_like", args=[self.quote.pk + 1])
+        self.assertEqual((await self.async_client.post(missing)).status_code, 404)
@@ -0,0 +1,46 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from random_quote.caching import content_version
+from random_quote.reactions import LIKE, apply_reaction
+
+from .utils import QuoteTestCase, make_quotes
+
+
+@override_settings(RANDOM_QUOTE_LEADERBOARD_SIZE=2, RANDOM_QUOTE_REACTION_SHARDS=0)
+class TopPageCacheTests(QuoteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.first, self.second, self.third = make_quotes([1, 1, 1])
+        for quote, likes in ((self.first, 5), (self.second, 3), (self.third, 1)):
+            for _ in range(likes):
+                apply_reaction(quote.pk, LIKE)
+        self.url = reverse("quotes_top")
+
+    def top_ids(self, response):
+        return [entry.pk for entry in response.context["quotes"]]
+
+    def test_ignores_unknown_query_parameters(self):
+        first = self.client.get(self.url)
+        self.assertIsNotNone(first.context)
+        for query in ("?utm=1", "?x=2&y=3"):
+            with self.subTest(query=query):
+                response = self.client.get(self.url + query)
+                self.assertIsNone(response.context)
+                self.assertEqual(response["ETag"], first["ETag"])
+        self.assertIsNotNone(self.client.get(self.url + "?page=1").context)
+        self.assertIsNone(self.client.get(self.url + "?page=1&junk=z").context)
+
+    def test_reactions_do_not_bump_content_version(self):
+        version = content_version()
+        apply_reaction(self.third.pk, LIKE)
+        self.assertEqual(content_version(), version)
+
+    def test_order_change_renders_new_page(self):
+        self.assertEqual(self.top_ids(self.client.get(self.url)), [self.first.pk, self.second.pk])
+        apply_reaction(self.first.pk, LIKE)
+        self.assertIsNone(self.client.get(self.url).context)
+        for _ in range(3):
+            apply_reaction(self.third.pk, LIKE)
+        response = self.client.get(self.url)
+        self.assertEqual(self.top_ids(response), [self.first.pk, self.third.pk])
@@ -0,0 +1,62 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from random_quote.counters import ViewCounterBuffer, watches_buffer
+from random_quote.models import Quote, QuoteStats
+from random_quote.stats import rebuild_stats
+
+from .utils import QuoteTestCase, make_quotes
+
+
+class ViewCounterBufferTests(QuoteTestCase):
+    @override_settings(RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL=3600)
+    def test_flush_writes_pending_views(self):
+        first, second = make_quotes([1, 1])
+        buffer = ViewCounterBuffer()
+        for quote_id in (first.pk, first.pk, second.pk):
+            self.assertFalse(buffer.increment(quote_id))
+        self.assertEqual(buffer.pending(first.pk), 2)
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(buffer.pending(first.pk), 0)
+        self.assertEqual(dict(Quote.objects.values_list("pk", "watches")), {first.pk: 2, second.pk: 1})
+        self.assertEqual(buffer.flush(), 0)
+
+    @override_settings(RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL=3600, RANDOM_QUOTE_WATCHES_MAX_PENDING=2)
+    def test_max_pending_forces_flush(self):
+        first, second = make_quotes([1, 1])
+        buffer = ViewCounterBuffer()
+        buffer.increment(first.pk)
+        self.assertTrue(buffer.increment(second.pk))
+        self.assertEqual(Quote.objects.get(pk=second.pk).watches, 1)
+
+    @override_settings(RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL=3600)
+    def test_flush_keeps_stats_in_sync(self):
+        make_quotes([1, 1])
+        rebuild_stats()
+        buffer = ViewCounterBuffer()
+        for quote in Quote.objects.all():
+            buffer.increment(quote.pk, amount=3)
+        buffer.flush()
+        self.assertEqual(QuoteStats.objects.get(scope=QuoteStats.GLOBAL).watches, 6)
+        self.assertEqual(rebuild_stats(dry_run=True), [])
+
+
+@override_settings(RANDOM_QUOTE_SAMPLE_QUEUE=False)
+class DisplayedWatchesTests(QuoteTestCase):
+    def test_count_includes_current_view_after_inline_flush(self):
+        quote = make_quotes([1], watches=10)[0]
+        with self.settings(RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL=3600):
+            watches_buffer.increment(quote.pk, amount=2)
+        with self.settings(RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL=0):
+            response = self.client.get(reverse("random_quote"))
+        self.assertEqual(response.context["quote"].watches, 13)
+        self.assertEqual(Quote.objects.get(pk=quote.pk).watches, 13)
+        self.assertEqual(watches_buffer.pending(quote.pk), 0)
+
+    @override_settings(RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL=3600)
+    def test_count_includes_buffered_views(self):
+        quote = make_quotes([1], watches=10)[0]
+        for _ in range(3):
+            response = self.client.get(reverse("random_quote"))
+        self.assertEqual(response.context["quote"].watches, 13)
+        self.assertEqual(Quote.objects.get(pk=quote.pk).watches, 10)
@@ -0,0 +1,73 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from random_quote import dashboard
+from random_quote.models import Quote
+from random_quote.reactions import LIKE, apply_reactions
+from random_quote.stats import rebuild_stats
+
+from .utils import QuoteTestCase, make_quotes
+
+
+class DashboardCacheTests(QuoteTestCase):
+    def setUp(self):
+        super().setUp()
+        make_quotes([1, 2, 3], likes=1)
+        rebuild_stats()
+
+    def test_hit_after_miss(self):
+        data = dashboard.get_dashboard_data()
+        self.assertEqual(data["stats"]["total_quotes"], 3)
+        with self.assertNumQueries(0):
+            dashboard.get_dashboard_data()
+        self.assertEqual(dashboard.cache_stats(), {"hits": 1, "stale": 0, "waits": 0, "misses": 1})
+
+    @override_settings(RANDOM_QUOTE_STATS_FLUSH_INTERVAL=3600, RANDOM_QUOTE_REACTION_SHARDS=0)
+    def test_includes_buffered_reactions(self):
+        quote = Quote.objects.first()
+        apply_reactions([(quote.pk, LIKE)] * 2)
+        data = dashboard.build_dashboard_data()
+        self.assertEqual(data["stats"]["total_likes"], 5)
+        self.assertEqual(data["top_sources"][0], {"source": quote.source, "count": 1, "total_likes": 3})
+
+    def test_stale_value_while_another_request_refreshes(self):
+        cache.set(dashboard.CACHE_KEY, (0, {"stale": True}))
+        cache.add(dashboard.LOCK_KEY, 1)
+        self.assertEqual(dashboard.get_dashboard_data(), {"stale": True})
+        self.assertEqual(dashboard.cache_stats()["stale"], 1)
+
+    @override_settings(RANDOM_QUOTE_DASHBOARD_COLD_WAIT=5)
+    def test_cold_miss_waits_for_refreshing_request(self):
+        cache.add(dashboard.LOCK_KEY, 1)
+        timer = threading.Timer(0.1, cache.set, (dashboard.CACHE_KEY, (float("inf"), {"fresh": True})))
+        timer.start()
+        with mock.patch.object(dashboard, "build_dashboard_data") as build:
+            self.assertEqual(dashboard.get_dashboard_data(), {"fresh": True})
+        timer.join()
+        build.assert_not_called()
+        self.assertEqual(dashboard.cache_stats()["waits"], 1)
+
+    @override_settings(RANDOM_QUOTE_DASHBOARD_COLD_WAIT=0.1)
+    def test_cold_miss_refreshes_after_wait(self):
+        cache.add(dashboard.LOCK_KEY, 1)
+        self.assertEqual(dashboard.get_dashboard_data()["stats"]["total_quotes"], 3)
+        self.assertEqual(dashboard.cache_stats()["misses"], 1)
+
+
+class DashboardCacheViewTests(QuoteTestCase):
+    def test_staff_only(self):
+        url = reverse("dashboard_cache")
+        self.assertEqual(self.client.get(url).status_code, 302)
+        user = get_user_model().objects.create_user("editor", password="secret")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        user.is_staff = True
+        user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {"hits", "stale", "waits", "misses"})
@@ -0,0 +1,68 @@
+import asyncio
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import SimpleTestCase, override_settings
+
+from random_quote.db import PRIMARY, ReadReplicaRouter, apply_sqlite_pragmas, replica_reads
+from random_quote.models import Quote
+
+
+@override_settings(RANDOM_QUOTE_READ_REPLICAS=["replica"])
+class ReadReplicaRouterTests(SimpleTestCase):
+    databases = {PRIMARY}
+    router = ReadReplicaRouter()
+
+    def test_reads_go_to_primary_outside_read_only_views(self):
+        self.assertEqual(self.router.db_for_read(Quote), PRIMARY)
+
+    def test_read_only_view_reads_from_replica(self):
+        @replica_reads
+        def view():
+            return self.router.db_for_read(Quote)
+
+        self.assertEqual(view(), "replica")
+        self.assertEqual(self.router.db_for_read(Quote), PRIMARY)
+
+    def test_async_read_only_view_reads_from_replica(self):
+        @replica_reads
+        async def view():
+            return self.router.db_for_read(Quote)
+
+        self.assertEqual(asyncio.run(view()), "replica")
+
+    def test_transaction_reads_from_primary(self):
+        @replica_reads
+        def view():
+            with transaction.atomic():
+                return self.router.db_for_read(Quote)
+
+        self.assertEqual(view(), PRIMARY)
+
+    @override_settings(RANDOM_QUOTE_READ_REPLICAS=[])
+    def test_no_replicas(self):
+        self.assertEqual(replica_reads(lambda: self.router.db_for_read(Quote))(), PRIMARY)
+
+
+class SqlitePragmaTests(SimpleTestCase):
+    databases = {PRIMARY}
+
+    @override_settings(RANDOM_QUOTE_SQLITE_PRAGMAS={"busy_timeout": 1234})
+    def test_pragmas_leave_journal_mode_alone(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            before = cursor.fetchone()[0]
+            apply_sqlite_pragmas(sender=None, connection=connection)
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 1234)
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], before)
+
+    def test_journal_mode_command(self):
+        out = StringIO()
+        try:
+            call_command("sqlite_journal_mode", "wal", stdout=out)
+            self.assertIn("wal", out.getvalue())
+        finally:
+            call_command("sqlite_journal_mode", "delete", stdout=StringIO())
@@ -0,0 +1,87 @@
+import gzip
+import io
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+
+from random_quote.exporting import EXPORT_FIELDS, export_queryset, iter_export
+from random_quote.importing import QuoteImporter, read_rows
+from random_quote.models import Quote, QuoteStats
+from random_quote.stats import rebuild_stats
+
+from .utils import QuoteTestCase, make_quote
+
+
+def create_quotes():
+    Quote.objects.bulk_create([
+        make_quote(1, weight=5, source="Мастер и Маргарита", source_type=Quote.BOOK, likes=3),
+        make_quote(2, weight=0, source="Мастер и Маргарита", source_type=Quote.BOOK),
+        make_quote(3, weight=100, source='Источник, с "кавычками"', source_type=Quote.MOVIE, likes=8),
+    ])
+    rebuild_stats()
+
+
+class ExportTests(QuoteTestCase):
+    def setUp(self):
+        super().setUp()
+        create_quotes()
+
+    def snapshot(self):
+        return sorted(Quote.objects.values_list("quote_text", "source", "source_type", "weight"))
+
+    def round_trip(self, fmt):
+        before = self.snapshot()
+        exported = "".join(iter_export(export_queryset(), fmt))
+        Quote.objects.all().delete()
+        rebuild_stats()
+        importer = QuoteImporter(batch_size=2).run(read_rows(io.StringIO(exported), fmt))
+        self.assertEqual((importer.read, importer.imported, importer.rejected_total), (3, 3, 0))
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(QuoteStats.objects.get(scope=QuoteStats.GLOBAL).quotes, 3)
+        return exported
+
+    def test_csv_round_trip(self):
+        exported = self.round_trip("csv")
+        self.assertTrue(exported.startswith(",".join(EXPORT_FIELDS)))
+
+    def test_jsonl_round_trip(self):
+        self.assertEqual(len(self.round_trip("jsonl").splitlines()), 3)
+
+    def test_reimport_rejects_duplicates(self):
+        exported = "".join(iter_export(export_queryset(), "jsonl"))
+        importer = QuoteImporter().run(read_rows(io.StringIO(exported), "jsonl"))
+        self.assertEqual((importer.imported, importer.rejected_total), (0, 3))
+        self.assertEqual(Quote.objects.count(), 3)
+
+    def test_filters(self):
+        def likes(**filters):
+            return [row[EXPORT_FIELDS.index("likes")] for row in export_queryset(**filters)]
+
+        self.assertEqual(likes(source_type=Quote.BOOK), [3, 0])
+        self.assertEqual(likes(min_likes=3), [3, 8])
+        self.assertEqual(likes(created_from=timezone.now() + timedelta(days=1)), [])
+
+
+class ExportViewTests(QuoteTestCase):
+    def setUp(self):
+        super().setUp()
+        create_quotes()
+        self.url = reverse("quotes_export")
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+
+    def test_streams_gzip_jsonl(self):
+        response = self.client.get(self.url, {"format": "jsonl", "gzip": "1", "min_likes": "1"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="quotes.jsonl.gz"')
+        rows = [json.loads(line) for line in gzip.decompress(b"".join(response.streaming_content)).splitlines()]
+        self.assertEqual([row["likes"] for row in rows], [3, 8])
+
+    def test_rejects_bad_parameters_and_non_staff(self):
+        for params in ({"format": "xml"}, {"source_type": "X"}, {"created_from": "вчера"}, {"min_likes": "x"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
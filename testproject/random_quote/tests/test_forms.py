@@ -0,0 +1,56 @@
+from unittest import mock
+
+from django.urls import reverse
+
+from random_quote.forms import QuoteForm
+from random_quote.models import Quote, SOURCE_KEY_LENGTH, normalize_source
+
+from .utils import QuoteTestCase, make_quote
+
+
+def form_data(text="Жизнь прожить — не поле перейти.", source="Пословица", weight=5):
+    return {"quote_text": text, "source": source, "source_type": Quote.PEOPLE, "weight": weight}
+
+
+class QuoteFormTests(QuoteTestCase):
+    def test_duplicate_ignores_case_and_spaces(self):
+        QuoteForm(form_data()).save()
+        form = QuoteForm(form_data(text="  ЖИЗНЬ прожить — не поле перейти.  ", source=" пословица "))
+        self.assertFalse(form.is_valid())
+        self.assertIn(QuoteForm.DUPLICATE_ERROR, form.non_field_errors())
+
+    def test_three_quotes_per_source(self):
+        for number in range(3):
+            QuoteForm(form_data(text=f"Цитата номер {number} из источника")).save()
+        form = QuoteForm(form_data(text="Четвёртая цитата того же источника", source="ПОСЛОВИЦА"))
+        self.assertFalse(form.is_valid())
+        self.assertIn("source", form.errors)
+
+    def test_same_text_from_another_source(self):
+        QuoteForm(form_data()).save()
+        self.assertTrue(QuoteForm(form_data(source="Другой источник")).is_valid())
+
+    def test_source_key_fits_after_casefold(self):
+        source = "ß" * 100
+        quote = QuoteForm(form_data(source=source)).save()
+        self.assertEqual(len(quote.source_key), 200)
+        self.assertLessEqual(len(normalize_source("ﬃ" * 100)), SOURCE_KEY_LENGTH)
+        self.assertLessEqual(len(quote.source_key), Quote._meta.get_field("source_key").max_length)
+
+
+class QuoteCreateViewTests(QuoteTestCase):
+    def test_creates_quote(self):
+        response = self.client.post(reverse("quote_add"), form_data())
+        self.assertRedirects(response, reverse("random_quote"), fetch_redirect_response=False)
+        self.assertEqual(Quote.objects.count(), 1)
+
+    def test_race_with_duplicate_becomes_form_error(self):
+        make_quote(1, source="Пословица").save()
+        existing = Quote.objects.get()
+        data = form_data(text=existing.quote_text.upper(), source="пословица")
+        # Проверка формы прошла до того, как дубликат был сохранён другим запросом.
+        with mock.patch.object(QuoteForm, "_source_usage", return_value=(0, 0)):
+            response = self.client.post(reverse("quote_add"), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(QuoteForm.DUPLICATE_ERROR, response.context["form"].non_field_errors())
+        self.assertEqual(Quote.objects.count(), 1)
@@ -0,0 +1,66 @@
+import io
+import json
+
+from random_quote.importing import QuoteImporter, read_rows
+from random_quote.models import Quote, QuoteStats
+from random_quote.stats import rebuild_stats
+
+from .utils import QuoteTestCase, make_quote
+
+
+def jsonl(*rows):
+    return io.StringIO("".join((row if isinstance(row, str) else json.dumps(row, ensure_ascii=False)) + "\n"
+                               for row in rows))
+
+
+class QuoteImporterTests(QuoteTestCase):
+    def run_import(self, stream, fmt="jsonl", **options):
+        rejected = []
+        importer = QuoteImporter(on_reject=lambda number, row, reason: rejected.append((number, reason)),
+                                 **options)
+        importer.run(read_rows(stream, fmt))
+        return importer, rejected
+
+    def test_rejects_invalid_rows_with_line_numbers(self):
+        importer, rejected = self.run_import(jsonl(
+            {"quote_text": "Достаточно длинная цитата", "source": "Книга", "source_type": "Книга", "weight": "7"},
+            {"quote_text": "Коротко", "source": "Книга"},
+            {"quote_text": "Достаточно длинная цитата два", "source": "Книга", "source_type": "Радио"},
+            {"quote_text": "Достаточно длинная цитата три", "source": "Книга", "weight": 101},
+            "{не json",
+            ["не", "объект"],
+        ))
+        self.assertEqual((importer.read, importer.imported, importer.rejected_total), (6, 1, 5))
+        self.assertEqual([number for number, _ in rejected], [2, 3, 4, 5, 6])
+        quote = Quote.objects.get()
+        self.assertEqual((quote.source_type, quote.weight, quote.source_key), (Quote.BOOK, 7, "книга"))
+
+    def test_duplicates_and_source_limit_across_batches_and_table(self):
+        make_quote(1, source="Источник").save()
+        rows = [{"quote_text": f"Проверочная цитата {number}", "source": " ИСТОЧНИК "} for number in (1, 2, 2, 3, 4)]
+        importer, rejected = self.run_import(jsonl(*rows), batch_size=2)
+        self.assertEqual(importer.imported, 2)
+        self.assertEqual([reason for _, reason in rejected], [
+            "Такая цитата уже существует.",
+            "Такая цитата уже существует.",
+            "У одного источника нельзя хранить больше трёх цитат.",
+        ])
+        self.assertEqual(Quote.objects.filter(source_key="источник").count(), 3)
+
+    def test_csv_and_stats(self):
+        rebuild_stats()
+        stream = io.StringIO("quote_text,source,source_type,weight\n"
+                             "Проверочная цитата один,Фильм,Ф,3\n"
+                             "Проверочная цитата два,Фильм,Ф,\n")
+        importer, _ = self.run_import(stream, fmt="csv")
+        self.assertEqual(importer.imported, 2)
+        stats = QuoteStats.objects.get(scope=QuoteStats.GLOBAL)
+        self.assertEqual((stats.quotes, stats.weight_sum), (2, 4))
+        self.assertEqual(rebuild_stats(dry_run=True), [])
+
+    def test_dry_run_writes_nothing(self):
+        importer, _ = self.run_import(
+            jsonl({"quote_text": "Достаточно длинная цитата", "source": "Книга"}), dry_run=True
+        )
+        self.assertEqual(importer.imported, 1)
+        self.assertFalse(Quote.objects.exists())
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.template.base import Template
+from django.test import override_settings
+from django.urls import reverse
+
+from random_quote.instrumentation import MIDDLEWARE_PATH, registry
+
+from .utils import QuoteTestCase, make_quotes
+
+
+def timed():
+    return getattr(Template._render, "random_quote_timed", False)
+
+
+@override_settings(RANDOM_QUOTE_SAMPLE_QUEUE=False, RANDOM_QUOTE_INSTRUMENTATION=True)
+class InstrumentationMiddlewareTests(QuoteTestCase):
+    def setUp(self):
+        super().setUp()
+        make_quotes([1])
+        registry.reset()
+
+    def test_server_timing_and_registry(self):
+        response = self.client.get(reverse("random_quote"))
+        names = [part.split(";")[0] for part in response["Server-Timing"].split(", ")]
+        self.assertEqual(names[:3], ["total", "db", "tpl"])
+        data = registry.snapshot()
+        self.assertEqual(data["requests"], {("random_quote", "GET", 200): 1})
+        self.assertGreater(data["sql_count"]["random_quote"], 0)
+        self.assertGreater(data["template_time"]["random_quote"], 0)
+
+    @override_settings(RANDOM_QUOTE_SERVER_TIMING=False)
+    def test_server_timing_header_can_be_disabled(self):
+        response = self.client.get(reverse("random_quote"))
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(sum(registry.snapshot()["requests"].values()), 1)
+
+    def test_template_timer_follows_settings(self):
+        self.assertTrue(timed())
+        with self.settings(RANDOM_QUOTE_INSTRUMENTATION=False):
+            self.assertFalse(timed())
+            self.assertNotIn("Server-Timing", self.client.get(reverse("random_quote")))
+        self.assertTrue(timed())
+        with self.settings(MIDDLEWARE=[name for name in settings.MIDDLEWARE if name != MIDDLEWARE_PATH]):
+            self.assertFalse(timed())
+        self.assertTrue(timed())
+
+
+class MetricsViewTests(QuoteTestCase):
+    url = reverse("metrics")
+
+    @override_settings(RANDOM_QUOTE_METRICS_ALLOWED_IPS=["10.0.0.1"])
+    def test_allowed_address(self):
+        response = self.client.get(self.url, REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("# TYPE random_quote_requests_total counter", response.content.decode())
+
+    @override_settings(RANDOM_QUOTE_METRICS_ALLOWED_IPS=["10.0.0.1"])
+    def test_other_addresses_are_rejected_unless_staff(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR="10.0.0.2").status_code, 403)
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR="10.0.0.2").status_code, 200)
@@ -0,0 +1,65 @@
+from django.test import override_settings
+
+from random_quote.leaderboard import Leaderboard, leaderboard
+from random_quote.models import Quote
+from random_quote.reactions import LIKE, apply_reaction
+
+from .utils import QuoteTestCase, make_quotes
+
+
+@override_settings(RANDOM_QUOTE_LEADERBOARD_SIZE=2, RANDOM_QUOTE_LEADERBOARD_SLACK=1)
+class LeaderboardTests(QuoteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quotes = make_quotes([1, 1, 1, 1])
+        for quote, likes in zip(self.quotes, (4, 3, 2, 1)):
+            self.set_likes(quote, likes)
+        self.board = Leaderboard()
+
+    def set_likes(self, quote, likes):
+        Quote.objects.filter(pk=quote.pk).update(likes=likes)
+
+    def top_ids(self):
+        return [entry.pk for entry in self.board.top()]
+
+    def expected_ids(self):
+        return list(Quote.objects.order_by("-likes", "-weight", "-watches", "pk").values_list("pk", flat=True)[:2])
+
+    def test_top_without_changes_does_not_query(self):
+        expected = self.expected_ids()
+        self.assertEqual(self.top_ids(), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.top_ids(), expected)
+
+    def test_touched_quotes_are_merged(self):
+        self.top_ids()
+        last = self.quotes[-1]
+        self.set_likes(last, 10)
+        self.board.touch([last.pk])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.top_ids(), [last.pk, self.quotes[0].pk])
+
+    def test_drop_below_floor_reloads(self):
+        self.top_ids()
+        first, second = self.quotes[:2]
+        for quote in (first, second):
+            self.set_likes(quote, 0)
+        self.board.touch([first.pk, second.pk])
+        self.assertEqual(self.top_ids(), self.expected_ids())
+        self.assertEqual(self.top_ids(), [self.quotes[2].pk, self.quotes[3].pk])
+
+    def test_deleted_quote_leaves_top(self):
+        self.top_ids()
+        first = self.quotes[0]
+        Quote.objects.filter(pk=first.pk).delete()
+        self.board.discard(first.pk)
+        self.assertEqual(self.top_ids(), self.expected_ids())
+        self.assertNotIn(first.pk, self.top_ids())
+
+    @override_settings(RANDOM_QUOTE_REACTION_SHARDS=0)
+    def test_reactions_reorder_shared_top(self):
+        last = self.quotes[-1]
+        self.assertNotIn(last.pk, [entry.pk for entry in leaderboard.top()])
+        for _ in range(5):
+            apply_reaction(last.pk, LIKE)
+        self.assertEqual([entry.pk for entry in leaderboard.top()], [last.pk, self.quotes[0].pk])
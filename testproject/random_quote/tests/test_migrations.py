@@ -0,0 +1,47 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+APP = "random_quote"
+
+
+class BackfillMigrationTests(TransactionTestCase):
+    """Замороженные заполнения миграций на исторических моделях."""
+
+    before = [(APP, "0003_alter_quote_options_quote_created_at_and_more")]
+
+    def setUp(self):
+        super().setUp()
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        self.old_apps = executor.loader.project_state(self.before).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes(APP))
+        super().tearDown()
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([(APP, target)])
+        return executor.loader.project_state([(APP, target)]).apps
+
+    def test_backfills(self):
+        OldQuote = self.old_apps.get_model(APP, "Quote")
+        OldQuote.objects.create(quote_text="Первая цитата", source="Straße " + "ß" * 93, weight=3, likes=4)
+        OldQuote.objects.create(quote_text="Вторая цитата", source="Книга", source_type="К", weight=5, dislikes=1)
+
+        apps = self.migrate("0012_quote_counter_shards")
+        Quote = apps.get_model(APP, "Quote")
+        first, second = Quote.objects.order_by("pk")
+        self.assertEqual(first.source_key, ("straße " + "ß" * 93).casefold())
+        self.assertEqual(second.source_key, "книга")
+        self.assertEqual((first.weight_offset, second.weight_offset), (0, 3))
+        self.assertEqual(first.popularity_score, 4 * 3 + 3 * 0.5)
+        self.assertEqual(first.like_percentage, 100.0)
+
+        stats = {(row.scope, row.key): row for row in apps.get_model(APP, "QuoteStats").objects.all()}
+        self.assertEqual((stats[("g", "")].quotes, stats[("g", "")].weight_sum), (2, 8))
+        self.assertEqual(stats[("t", "К")].dislikes, 1)
+        self.assertEqual(apps.get_model(APP, "QuoteWeightBlock").objects.get().total, 8)
@@ -0,0 +1,94 @@
+import threading
+
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+
+from random_quote.models import Quote, QuoteStats
+from random_quote.reactions import DISLIKE, LIKE, apply_reaction, apply_reactions
+from random_quote.stats import rebuild_stats, stats_buffer
+
+from .utils import QuoteTestCase, make_quotes
+
+
+@override_settings(RANDOM_QUOTE_REACTION_SHARDS=0, RANDOM_QUOTE_STATS_FLUSH_INTERVAL=3600)
+class ApplyReactionsTests(QuoteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quotes = make_quotes([99, 1, 50])
+        rebuild_stats()
+
+    def test_weight_is_clamped_and_stats_follow(self):
+        high, low, _ = self.quotes
+        applied, missing = apply_reactions(
+            [(high.pk, LIKE)] * 3 + [(low.pk, DISLIKE)] * 2 + [(low.pk, LIKE)] + [(0, LIKE)]
+        )
+        self.assertEqual((applied, missing), (6, [0]))
+        high.refresh_from_db()
+        low.refresh_from_db()
+        self.assertEqual((high.likes, high.weight, high.like_percentage), (3, 100, 100.0))
+        self.assertEqual((low.likes, low.dislikes, low.weight), (1, 2, 0))
+        self.assertEqual(high.popularity_score, 3 * 3 + 100 * 0.5)
+        # Общая строка статистики не меняется в транзакции реакций — только при сбросе буфера.
+        self.assertEqual(QuoteStats.objects.get(scope=QuoteStats.GLOBAL).likes, 0)
+        self.assertEqual(stats_buffer.flush(), 4)
+        global_stats = QuoteStats.objects.get(scope=QuoteStats.GLOBAL)
+        self.assertEqual((global_stats.likes, global_stats.dislikes, global_stats.weight_sum), (4, 2, 150))
+        self.assertEqual(rebuild_stats(dry_run=True), [])
+
+    def test_single_reaction(self):
+        quote = self.quotes[2]
+        self.assertTrue(apply_reaction(quote.pk, DISLIKE))
+        self.assertFalse(apply_reaction(0, LIKE))
+        quote.refresh_from_db()
+        self.assertEqual((quote.dislikes, quote.weight), (1, 49))
+        self.assertEqual(rebuild_stats(dry_run=True), [])
+
+    def test_single_reaction_query_count(self):
+        quote = self.quotes[2]
+        apply_reaction(quote.pk, LIKE)
+        # UPDATE счётчиков, чтение весов и UPDATE веса; начало и конец
+        # транзакции в тесте — точка сохранения. Статистика — в буфере.
+        with self.assertNumQueries(5):
+            apply_reaction(quote.pk, LIKE)
+
+    @override_settings(RANDOM_QUOTE_STATS_FLUSH_INTERVAL=0)
+    def test_zero_interval_writes_stats_after_each_reaction(self):
+        apply_reaction(self.quotes[2].pk, LIKE)
+        self.assertEqual(QuoteStats.objects.get(scope=QuoteStats.GLOBAL).likes, 1)
+        self.assertEqual(stats_buffer.flush(), 0)
+
+
+@override_settings(RANDOM_QUOTE_REACTION_SHARDS=0, RANDOM_QUOTE_SAMPLE_QUEUE=False)
+class ConcurrentReactionsTests(TransactionTestCase):
+    """Одновременные лайки из нескольких потоков не теряются и не падают с «database is locked»."""
+
+    threads = 8
+    likes_per_thread = 20
+
+    def test_concurrent_likes(self):
+        quote = make_quotes([1])[0]
+        rebuild_stats()
+        errors = []
+        start = threading.Barrier(self.threads)
+
+        def like():
+            try:
+                start.wait()
+                for _ in range(self.likes_per_thread):
+                    apply_reaction(quote.pk, LIKE)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=like) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        quote.refresh_from_db()
+        self.assertEqual(quote.likes, self.threads * self.likes_per_thread)
+        self.assertEqual(quote.weight, 100)
+        self.assertEqual(rebuild_stats(dry_run=True), [])
@@ -0,0 +1,66 @@
+import json
+
+from django.test import override_settings
+from django.urls import reverse
+
+from random_quote.models import Quote
+
+from .utils import QuoteTestCase, make_quotes
+
+TOKEN = "test-token"
+
+
+@override_settings(RANDOM_QUOTE_API_TOKEN=TOKEN, RANDOM_QUOTE_REACTIONS_BATCH_LIMIT=5)
+class ReactionsBatchTests(QuoteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_class(enforce_csrf_checks=True)
+
+    def post(self, body, token=TOKEN):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        data = body if isinstance(body, str) else json.dumps(body)
+        return self.client.post(reverse("quote_reactions"), data, content_type="application/json", **headers)
+
+    def test_applies_reactions_without_csrf_token(self):
+        first, second = make_quotes([1, 1])
+        response = self.post({"reactions": [
+            {"quote_id": first.pk, "reaction": "like"},
+            {"quote_id": first.pk, "reaction": "like"},
+            {"quote_id": second.pk, "reaction": "dislike"},
+            {"quote_id": 999_999, "reaction": "like"},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"applied": 3, "missing": [999_999]})
+        self.assertEqual(
+            {quote_id: (likes, dislikes) for quote_id, likes, dislikes
+             in Quote.objects.values_list("pk", "likes", "dislikes")},
+            {first.pk: (2, 0), second.pk: (0, 1)},
+        )
+
+    def test_bad_payload(self):
+        quote = make_quotes([1])[0]
+        bodies = [
+            "not json",
+            {"items": []},
+            {"reactions": [{"quote_id": "x", "reaction": "like"}]},
+            {"reactions": [{"quote_id": quote.pk, "reaction": "love"}]},
+            {"reactions": [{"quote_id": quote.pk, "reaction": "like"}] * 6},
+        ]
+        for body in bodies:
+            with self.subTest(body=body):
+                response = self.post(body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+        self.assertEqual(Quote.objects.get(pk=quote.pk).likes, 0)
+
+    def test_requires_token(self):
+        quote = make_quotes([1])[0]
+        body = {"reactions": [{"quote_id": quote.pk, "reaction": "like"}]}
+        self.assertEqual(self.post(body, token=None).status_code, 403)
+        self.assertEqual(self.post(body, token="wrong").status_code, 403)
+        with self.settings(RANDOM_QUOTE_API_TOKEN=""):
+            self.assertEqual(self.post(body, token="").status_code, 403)
+        self.assertEqual(Quote.objects.get(pk=quote.pk).likes, 0)
+
+    def test_get_not_allowed(self):
+        self.assertEqual(self.client.get(reverse("quote_reactions")).status_code, 405)
@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+
+from random_quote import rotation
+from random_quote.rotation import COOKIE_NAME, SESSION_KEY, RecentlySeen
+
+from .utils import QuoteTestCase, make_quotes
+
+
+@override_settings(RANDOM_QUOTE_SAMPLE_QUEUE=False, RANDOM_QUOTE_RECENT_WINDOW=1)
+class RecentlySeenTests(QuoteTestCase):
+    def setUp(self):
+        super().setUp()
+        make_quotes([1, 1])
+        self.url = reverse("random_quote")
+
+    def shown(self):
+        response = self.client.get(self.url)
+        return response, response.context["quote"].pk
+
+    def assert_alternates(self):
+        shown = [self.shown()[1] for _ in range(4)]
+        self.assertTrue(all(first != second for first, second in zip(shown, shown[1:])), shown)
+
+    def test_anonymous_visitor_gets_cookie_not_session(self):
+        response, _ = self.shown()
+        self.assertIn(COOKIE_NAME, response.cookies)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assert_alternates()
+
+    def window_writes(self):
+        """Записи окон в кэш во время запроса (остальные ключи кэша пропускаются)."""
+        with mock.patch.object(rotation.cache, "set", wraps=rotation.cache.set) as cache_set:
+            response, quote_id = self.shown()
+        writes = [call.args for call in cache_set.call_args_list if call.args[0].startswith("random_quote:recent:")]
+        return response, quote_id, writes
+
+    @override_settings(RANDOM_QUOTE_RECENT_TTL=90)
+    def test_window_is_cached_only_after_cookie_returns(self):
+        response, _, writes = self.window_writes()
+        self.assertEqual(writes, [])
+        key = RecentlySeen._cache_key(f"visitor:{response.cookies[COOKIE_NAME].value}")
+
+        response, quote_id, writes = self.window_writes()
+        self.assertNotIn(COOKIE_NAME, response.cookies)
+        self.assertEqual(writes, [(key, [quote_id], 90)])
+
+    def test_existing_session_keys_cache_window(self):
+        session = self.client.session
+        session.save()
+        response, _ = self.shown()
+        self.assertNotIn(COOKIE_NAME, response.cookies)
+        self.assertNotIn(SESSION_KEY, self.client.session)
+        self.assert_alternates()
+
+    @override_settings(RANDOM_QUOTE_RECENT_STORAGE="session")
+    def test_session_storage_skips_anonymous_visitors(self):
+        response, _ = self.shown()
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assert_alternates()
+
+    @override_settings(RANDOM_QUOTE_RECENT_STORAGE="session")
+    def test_session_storage_for_authenticated_users(self):
+        self.client.force_login(User.objects.create_user("reader"))
+        _, quote_id = self.shown()
+        self.assertEqual(self.client.session[SESSION_KEY], [quote_id])
+        self.assert_alternates()
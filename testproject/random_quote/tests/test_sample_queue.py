@@ -0,0 +1,42 @@
+from django.test import override_settings
+
+from random_quote.sample_queue import SampleQueue
+
+from .utils import QuoteTestCase, make_quotes
+
+
+@override_settings(RANDOM_QUOTE_SAMPLE_QUEUE_SIZE=120, RANDOM_QUOTE_SAMPLE_QUEUE_MIN_DRIFT=20)
+class SampleQueueTests(QuoteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.queue = SampleQueue()
+
+    def test_refill_and_take(self):
+        first, second = make_quotes([1, 3])
+        self.assertEqual(self.queue.refill(), 120)
+        self.assertEqual(len(self.queue), 120)
+        self.assertEqual(self.queue.refill(), 0)
+        quote, remaining = self.queue.take(excluded={first.pk})
+        self.assertEqual(quote.pk, second.pk)
+        self.assertLess(remaining, 120)
+        self.assertEqual(quote.quote_text, second.quote_text)
+
+    def test_small_table_tolerates_min_drift(self):
+        make_quotes([1] * 10)
+        self.queue.refill()
+        generation = self.queue.generation()
+        for _ in range(20):
+            self.queue.note_weight_change(1)
+        self.assertEqual(self.queue.generation(), generation)
+        self.queue.note_weight_change(1)
+        self.assertNotEqual(self.queue.generation(), generation)
+        self.assertEqual(len(self.queue), 0)
+
+    def test_large_table_uses_share_of_total_weight(self):
+        make_quotes([100] * 50)
+        self.queue.refill()
+        generation = self.queue.generation()
+        self.queue.note_weight_change(50)
+        self.assertEqual(self.queue.generation(), generation)
+        self.queue.note_weight_change(1)
+        self.assertNotEqual(self.queue.generation(), generation)
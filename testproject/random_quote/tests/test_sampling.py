@@ -0,0 +1,88 @@
+import math
+import unittest
+from collections import Counter
+
+from random_quote.management.commands.validate_sampling import database_strategy, memory_strategy
+from random_quote.models import Quote
+from random_quote.sampling import DatabaseSampler, ReferenceSampler, WeightedSampler
+from random_quote.sampling_checks import check_distribution, weight_cases
+
+from .utils import QuoteTestCase, make_quotes, np
+
+
+@unittest.skipIf(np is None, "Для проверки распределения нужен NumPy")
+class DistributionTests(QuoteTestCase):
+    """Частоты выборов совпадают с весами (хи-квадрат и КС при засеянном генераторе)."""
+
+    cases = weight_cases(size=200, seed=0)
+
+    def assertDistribution(self, name, pairs, draws):
+        result = check_distribution([quote_id for quote_id, _ in pairs], [weight for _, weight in pairs], draws,
+                                    case=name)
+        self.assertTrue(result.passed, result)
+
+    def test_reference(self):
+        for name, pairs in self.cases.items():
+            with self.subTest(case=name):
+                self.assertDistribution(name, pairs, ReferenceSampler(pairs).draw(50_000))
+
+    def test_memory(self):
+        for name, pairs in self.cases.items():
+            with self.subTest(case=name):
+                self.assertDistribution(name, pairs, memory_strategy(pairs).draw(50_000))
+
+    def test_memory_single_choices(self):
+        pairs = self.cases["skewed"]
+        strategy = memory_strategy(pairs)
+        self.assertDistribution("skewed", pairs, [strategy.choose() for _ in range(20_000)])
+
+    def test_database(self):
+        for name, pairs in self.cases.items():
+            with self.subTest(case=name):
+                self.assertDistribution(name, pairs, database_strategy(pairs).draw(3_000))
+
+    def test_database_uniform_fallback_after_misses(self):
+        # Плотные ключи и ключи после больших пропусков должны выбираться одинаково часто.
+        pairs = [(quote_id, 0) for quote_id in range(1, 51)] + [(quote_id * 1000, 0) for quote_id in range(1, 51)]
+        strategy = database_strategy(pairs)
+        strategy.UNIFORM_ATTEMPTS = 0
+        self.assertDistribution("sparse_fallback", pairs, [strategy.choose() for _ in range(2_000)])
+
+    def test_database_uniform_sparse_ids(self):
+        pairs = [(quote_id, 0) for quote_id, _ in self.cases["sparse_ids"]]
+        strategy = database_strategy(pairs)
+        self.assertDistribution("sparse_zero", pairs, [strategy.choose() for _ in range(2_000)])
+
+
+class WeightedSamplerTests(QuoteTestCase):
+    def test_updates_keep_total(self):
+        strategy = WeightedSampler(ttl=math.inf)
+        strategy.load([(1, 5), (2, 0), (3, -4)])
+        self.assertEqual(strategy.total_weight(), 5)
+        strategy.update(2, 10)
+        strategy.adjust(1, -100)
+        self.assertEqual(strategy.total_weight(), 10)
+        self.assertEqual(set(strategy.draw(100)), {2})
+
+    def test_choose_excluding(self):
+        strategy = WeightedSampler(ttl=math.inf)
+        strategy.load([(1, 100), (2, 1), (3, 0)])
+        self.assertEqual({strategy.choose_excluding({1}) for _ in range(50)}, {2})
+        self.assertIsNone(WeightedSampler(ttl=math.inf).choose_excluding({1}))
+
+    def test_rebuilds_from_database(self):
+        quotes = make_quotes([3, 0])
+        self.assertEqual(set(WeightedSampler().draw(50)), {quotes[0].pk})
+
+
+class DatabaseSamplerTests(QuoteTestCase):
+    def test_empty_table(self):
+        self.assertIsNone(DatabaseSampler().choose())
+
+    def test_uniform_without_offset_scan(self):
+        quotes = make_quotes([0] * 5)
+        ids = [quote.pk for quote in quotes]
+        Quote.objects.filter(pk__in=ids[1:4]).delete()
+        draws = Counter(DatabaseSampler()._choose_uniform() for _ in range(400))
+        self.assertEqual(set(draws), {ids[0], ids[4]})
+        self.assertGreater(min(draws.values()), 120)
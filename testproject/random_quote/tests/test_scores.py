@@ -0,0 +1,90 @@
+import random
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+from random_quote.models import Quote, backfill_scores, like_percentage, popularity_score
+
+from .utils import QuoteTestCase, make_quote, make_quotes
+
+APP = "random_quote"
+METRICS = [(0, 0, 0, 0), (1, 2, 0, 1), (2, 1, 15, 7), (1, 7, 3, 100), (1, 8, 0, 0), (50, 0, 999, 42)]
+
+
+class ScoreFunctionTests(QuoteTestCase):
+    def test_formulas(self):
+        self.assertEqual(popularity_score(likes=4, dislikes=2, watches=30, weight=6), 4 * 3 + 3.0 + 3.0 - 2)
+        self.assertEqual(like_percentage(0, 0), 0.0)
+        self.assertEqual(like_percentage(1, 2), 33.3)
+        self.assertEqual(like_percentage(2, 1), 66.7)
+        # 1 из 8 — ровно 12.5 %, 1 из 7 — 14.2857 % округляется до 14.3.
+        self.assertEqual(like_percentage(1, 7), 12.5)
+        self.assertEqual(like_percentage(1, 6), 14.3)
+
+    def test_save_refreshes_scores(self):
+        quote = make_quote(1)
+        quote.save()
+        quote.likes, quote.dislikes, quote.watches = 3, 1, 10
+        quote.save(update_fields=["likes", "dislikes", "watches"])
+        quote.refresh_from_db()
+        self.assertEqual(quote.popularity_score, popularity_score(3, 1, 10, quote.weight))
+        self.assertEqual(quote.like_percentage, 75.0)
+
+    def test_sql_expressions_match_python(self):
+        quotes = make_quotes([0] * len(METRICS))
+        for quote, (likes, dislikes, watches, weight) in zip(quotes, METRICS):
+            Quote.objects.filter(pk=quote.pk).update(likes=likes, dislikes=dislikes, watches=watches, weight=weight)
+        self.assertEqual(backfill_scores(Quote, batch_size=2), len(METRICS))
+        for quote in Quote.objects.all():
+            with self.subTest(quote=quote.pk):
+                self.assertAlmostEqual(quote.popularity_score,
+                                       popularity_score(quote.likes, quote.dislikes, quote.watches, quote.weight))
+                self.assertEqual(quote.like_percentage, like_percentage(quote.likes, quote.dislikes))
+
+    def test_rankings(self):
+        quotes = make_quotes([1, 1, 1])
+        for quote, (likes, dislikes) in zip(quotes, ((1, 1), (5, 0), (2, 0))):
+            Quote.objects.filter(pk=quote.pk).update(likes=likes, dislikes=dislikes)
+        backfill_scores(Quote)
+        ids = [quote.pk for quote in quotes]
+        self.assertEqual(list(Quote.ranked("popularity").values_list("pk", flat=True)), [ids[1], ids[2], ids[0]])
+        self.assertEqual(list(Quote.ranked("like_ratio").values_list("pk", flat=True)), [ids[1], ids[2], ids[0]])
+
+
+class ScoreBackfillMigrationTests(TransactionTestCase):
+    """Миграция 0008 заполняет показатели существующих цитат."""
+
+    before = [(APP, "0007_quote_normalized_keys")]
+    after = [(APP, "0008_quote_scores")]
+
+    def setUp(self):
+        super().setUp()
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        self.old_apps = executor.loader.project_state(self.before).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes(APP))
+        super().tearDown()
+
+    def test_backfill(self):
+        OldQuote = self.old_apps.get_model(APP, "Quote")
+        rng = random.Random(0)
+        # Больше одного диапазона quote_id (по 1000) и пропуски в ключах.
+        for number, pk in enumerate((1, 2, 1500, 2600)):
+            likes, dislikes, watches, weight = rng.choice(METRICS)
+            OldQuote.objects.create(pk=pk, quote_text=f"Цитата {number}", source=f"Источник {number}",
+                                    source_key=f"источник {number}", text_hash=str(number),
+                                    likes=likes, dislikes=dislikes, watches=watches, weight=weight)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        Quote = executor.loader.project_state(self.after).apps.get_model(APP, "Quote")
+        for quote in Quote.objects.all():
+            with self.subTest(quote=quote.pk):
+                self.assertAlmostEqual(quote.popularity_score,
+                                       popularity_score(quote.likes, quote.dislikes, quote.watches, quote.weight))
+                self.assertEqual(quote.like_percentage, like_percentage(quote.likes, quote.dislikes))
@@ -0,0 +1,41 @@
+from unittest import skipUnless
+
+from django.db import connection
+
+from random_quote.models import Quote, quote_text_hash
+from random_quote.search import filter_queryset, search_quotes
+
+from .utils import QuoteTestCase, make_quote
+
+
+@skipUnless(connection.vendor == "sqlite", "Триггеры FTS5 есть только в SQLite")
+class FullTextSearchTests(QuoteTestCase):
+    def found(self, query):
+        return [quote.pk for quote in search_quotes(query)]
+
+    def test_bulk_create_is_indexed(self):
+        quote, other = Quote.objects.bulk_create([
+            make_quote(1, source="Война и мир"),
+            make_quote(2, source="Мастер и Маргарита"),
+        ])
+        self.assertEqual(self.found("войны"), [quote.pk])
+        self.assertEqual(list(filter_queryset(Quote.objects.all(), "маргарита").values_list("pk", flat=True)),
+                         [other.pk])
+
+    def test_update_and_delete_follow_triggers(self):
+        quote = make_quote(1, source="Война и мир")
+        quote.save()
+        Quote.objects.filter(pk=quote.pk).update(source="Анна Каренина")
+        self.assertEqual(self.found("война"), [])
+        self.assertEqual(self.found("карениной"), [quote.pk])
+        quote.delete()
+        self.assertEqual(self.found("каренина"), [])
+
+    def test_text_matches_rank_above_source(self):
+        in_source = make_quote(1, source="Про звёзды")
+        in_text = make_quote(2, source="Другое")
+        in_text.quote_text = "Звёзды светят для того, чтобы каждый нашёл свою"
+        in_text.text_hash = quote_text_hash(in_text.quote_text)
+        in_source.save()
+        in_text.save()
+        self.assertEqual(self.found("звёзды"), [in_text.pk, in_source.pk])
@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from random_quote import reactions
+from random_quote.models import Quote, QuoteCounterShard
+from random_quote.reactions import DISLIKE, LIKE, apply_reaction, fold_reaction_shards
+from random_quote.sharding import fold_schedule, mark_hot, pending_reactions, shard_count
+
+from .utils import QuoteTestCase, make_quotes
+
+
+@override_settings(RANDOM_QUOTE_REACTION_SHARDS=4, RANDOM_QUOTE_SHARD_FOLD_INTERVAL=3600, RANDOM_QUOTE_SAMPLE_QUEUE=False)
+class ShardFoldingTests(QuoteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quote, self.other = make_quotes([98, 5])
+        self.assertTrue(mark_hot(self.quote.pk))
+
+    def react(self, quote, likes, dislikes):
+        for reaction, count in ((LIKE, likes), (DISLIKE, dislikes)):
+            for _ in range(count):
+                self.assertTrue(apply_reaction(quote.pk, reaction))
+
+    def test_hot_reactions_go_to_shards_until_folded(self):
+        self.react(self.quote, 6, 2)
+        self.quote.refresh_from_db()
+        self.assertEqual((self.quote.likes, self.quote.dislikes, self.quote.weight), (0, 0, 98))
+        self.assertEqual(pending_reactions(self.quote.pk), (6, 2))
+
+        self.assertEqual(fold_reaction_shards(), 8)
+        self.quote.refresh_from_db()
+        # Вес меняется на разность один раз и ограничивается сверху.
+        self.assertEqual((self.quote.likes, self.quote.dislikes, self.quote.weight), (6, 2, 100))
+        self.assertEqual(pending_reactions(self.quote.pk), (0, 0))
+        self.assertEqual(fold_reaction_shards(), 0)
+
+    def test_cold_quote_is_updated_directly(self):
+        self.react(self.other, 2, 1)
+        self.other.refresh_from_db()
+        self.assertEqual((self.other.likes, self.other.dislikes, self.other.weight), (2, 1, 6))
+        self.assertFalse(QuoteCounterShard.objects.filter(quote=self.other).exists())
+
+    def test_reaction_does_not_fold_in_request(self):
+        self.react(self.quote, 3, 0)
+        with mock.patch.object(fold_schedule, "due", return_value=True), \
+                mock.patch.object(reactions.threading, "Thread") as thread:
+            self.react(self.quote, 1, 0)
+        thread.assert_called_once_with(target=reactions._fold_shards_in_thread, daemon=True)
+        thread.return_value.start.assert_called_once_with()
+        self.assertEqual(Quote.objects.get(pk=self.quote.pk).likes, 0)
+
+
+class ShardCountTests(QuoteTestCase):
+    @override_settings(RANDOM_QUOTE_REACTION_SHARDS=None)
+    def test_disabled_by_default_on_sqlite(self):
+        self.assertEqual(shard_count(), 0)
@@ -0,0 +1,87 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from random_quote.models import QuoteEvent, QuoteHourlyRollup
+from random_quote.trending import compact, hour_of, hour_start, rollup, trending_scores, write_events
+
+from .utils import QuoteTestCase, make_quotes
+
+LIKE, DISLIKE, VIEW = QuoteEvent.LIKE, QuoteEvent.DISLIKE, QuoteEvent.VIEW
+
+
+class RollupTests(QuoteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.first, self.second = make_quotes([1, 1])
+        self.hour = hour_of(timezone.now()) - 5
+
+    def at(self, hour, minutes=10):
+        return hour_start(hour) + timedelta(minutes=minutes)
+
+    def rolled(self):
+        return {
+            (row.hour, row.quote_id): (row.likes, row.dislikes, row.watches)
+            for row in QuoteHourlyRollup.objects.all()
+        }
+
+    def test_rollup_groups_events_by_hour(self):
+        write_events(LIKE, {self.first.pk: 2, self.second.pk: 1}, now=self.at(self.hour))
+        write_events(LIKE, {self.first.pk: 1}, now=self.at(self.hour, 50))
+        write_events(VIEW, {self.first.pk: 10}, now=self.at(self.hour + 1))
+        write_events(DISLIKE, {self.second.pk: 4}, now=self.at(self.hour + 1))
+        self.assertEqual(rollup(), 4)
+        self.assertEqual(self.rolled(), {
+            (self.hour, self.first.pk): (3, 0, 0),
+            (self.hour, self.second.pk): (1, 0, 0),
+            (self.hour + 1, self.first.pk): (0, 0, 10),
+            (self.hour + 1, self.second.pk): (0, 4, 0),
+        })
+        self.assertEqual([quote_id for quote_id, _ in trending_scores()], [self.first.pk])
+
+    def test_late_events_in_closed_hour_are_rolled(self):
+        write_events(LIKE, {self.first.pk: 1}, now=self.at(self.hour))
+        write_events(LIKE, {self.first.pk: 1}, now=self.at(self.hour + 1))
+        rollup()
+        # Пачка со временем прошлого часа записана уже после свёртки.
+        write_events(LIKE, {self.second.pk: 2}, now=self.at(self.hour, 59))
+        rollup()
+        self.assertEqual(self.rolled()[(self.hour, self.second.pk)], (2, 0, 0))
+
+    def test_rollup_keeps_hours_without_raw_events(self):
+        old_hour = self.hour - 100
+        QuoteHourlyRollup.objects.create(quote_id=self.first.pk, hour=old_hour, likes=7)
+        write_events(LIKE, {self.second.pk: 1}, now=self.at(self.hour))
+        self.assertEqual(rollup(since_hour=old_hour - 10), 1)
+        self.assertEqual(self.rolled(), {
+            (old_hour, self.first.pk): (7, 0, 0),
+            (self.hour, self.second.pk): (1, 0, 0),
+        })
+
+    def test_command_since_hours_is_clamped_to_retained_events(self):
+        old_hour = self.hour - 100
+        QuoteHourlyRollup.objects.create(quote_id=self.first.pk, hour=old_hour, likes=7)
+        write_events(VIEW, {self.second.pk: 3}, now=self.at(self.hour))
+        call_command("rollup_events", "--since-hours", "1000", "--no-compact", stdout=StringIO())
+        self.assertEqual(self.rolled(), {
+            (old_hour, self.first.pk): (7, 0, 0),
+            (self.hour, self.second.pk): (0, 0, 3),
+        })
+
+    @override_settings(RANDOM_QUOTE_EVENT_RETENTION_HOURS=2)
+    def test_compact_deletes_whole_hours_that_will_not_be_rerolled(self):
+        now = self.at(self.hour + 10, 30)
+        for hour in range(self.hour, self.hour + 10):
+            write_events(LIKE, {self.first.pk: 1}, now=self.at(hour, 40))
+        rollup()
+        events, _ = compact(now=now)
+        self.assertEqual(events, 8)
+        # Остались события часа перед последним свёрнутым и самого последнего.
+        kept = sorted({hour_of(moment) for moment in QuoteEvent.objects.values_list("created_at", flat=True)})
+        self.assertEqual(kept, [self.hour + 8, self.hour + 9])
+        before = self.rolled()
+        rollup()
+        self.assertEqual(self.rolled(), before)
@@ -0,0 +1,58 @@
+import unittest
+
+from django.test import override_settings
+
+from random_quote.models import Quote, popularity_score
+from random_quote.sampling import DatabaseSampler, rebuild_weight_blocks, sampler
+from random_quote.stats import rebuild_stats
+from random_quote.weighting import recompute_weights
+
+from .utils import QuoteTestCase, make_quotes, np
+
+# (likes, dislikes): средняя доля лайков — 0.5.
+REACTIONS = [(0, 0), (10, 0), (0, 10), (5, 5), (4, 4)]
+
+
+@unittest.skipIf(np is None, "Для пересчёта весов нужен NumPy")
+class RecomputeWeightsTests(QuoteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quotes = make_quotes([50, 1, 1, 1, 1], watches=20)
+        for quote, (likes, dislikes) in zip(self.quotes, REACTIONS):
+            Quote.objects.filter(pk=quote.pk).update(likes=likes, dislikes=dislikes)
+        rebuild_stats()
+
+    def weights(self):
+        return list(Quote.objects.order_by("pk").values_list("weight", flat=True))
+
+    def test_bayesian_weights_in_chunks(self):
+        self.assertEqual(sampler.total_weight(), 54)
+        # Порции по две цитаты: чтение по quote_id проходит все порции.
+        result = recompute_weights("bayesian", strength=10, chunk_size=2)
+        self.assertEqual((result.scanned, result.changed, result.prior), (5, 4, 0.5))
+        self.assertEqual(self.weights(), [50, 75, 25, 50, 50])
+        self.assertEqual(result.histogram[50], 3)
+        quote = Quote.objects.get(pk=self.quotes[1].pk)
+        self.assertEqual(quote.popularity_score, popularity_score(10, 0, 20, 75))
+        self.assertEqual(rebuild_stats(dry_run=True), [])
+        self.assertEqual(sampler.total_weight(), 250)
+
+    def test_wilson_gives_prior_without_reactions(self):
+        recompute_weights("wilson", chunk_size=10)
+        weights = self.weights()
+        self.assertEqual(weights[0], 50)
+        self.assertLess(weights[2], weights[3])
+        self.assertLess(weights[3], weights[1])
+
+    def test_dry_run_writes_nothing(self):
+        result = recompute_weights("bayesian", strength=10, dry_run=True)
+        self.assertEqual(result.changed, 4)
+        self.assertEqual(self.weights(), [50, 1, 1, 1, 1])
+
+    @override_settings(RANDOM_QUOTE_SAMPLING="database")
+    def test_weight_blocks_are_rebuilt(self):
+        rebuild_weight_blocks()
+        self.assertEqual(DatabaseSampler().total_weight(), 54)
+        recompute_weights("bayesian", strength=10)
+        self.assertEqual(DatabaseSampler().total_weight(), 250)
+        self.assertEqual(DatabaseSampler().draw(0), [])
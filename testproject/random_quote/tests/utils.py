@@ -0,0 +1,58 @@
+"""Общие заготовки тестов приложения."""
+
+import random
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from random_quote.counters import watches_buffer
+from random_quote.leaderboard import leaderboard
+from random_quote.models import Quote, normalize_source, quote_text_hash
+from random_quote.sampling import sampler
+from random_quote.stats import stats_buffer
+from random_quote.trending import event_log
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def make_quote(number, weight=1, source=None, **fields):
+    """Несохранённая цитата номер ``number`` с заполненными служебными полями."""
+    text = f"Проверочная цитата {number}"
+    source = source or f"Источник {number}"
+    quote = Quote(quote_text=text, source=source, weight=weight,
+                  source_key=normalize_source(source), text_hash=quote_text_hash(text), **fields)
+    quote.refresh_scores()
+    return quote
+
+
+def make_quotes(weights, **fields):
+    """Создать цитаты с весами ``weights`` одним ``bulk_create`` (без сигналов)."""
+    return Quote.objects.bulk_create(
+        [make_quote(number, weight, **fields) for number, weight in enumerate(weights, start=1)]
+    )
+
+
+class QuoteTestCase(TestCase):
+    """
+    Тест с чистыми процессными индексами и кэшем.
+
+    Индекс выбора, таблица лидеров, буферы просмотров, событий и статистики
+    и кэш живут дольше одной тестовой транзакции, поэтому сбрасываются перед
+    каждым тестом; генераторы случайных чисел засеваются — результаты
+    воспроизводимы.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        sampler.invalidate()
+        leaderboard.invalidate()
+        watches_buffer._pending.clear()
+        event_log._pending.clear()
+        stats_buffer._pending.clear()
+        random.seed(0)
+        if np is not None:
+            np.random.seed(0)
@@ -0,0 +1,315 @@
+"""Журнал событий цитат и рейтинг «в тренде».
+
+Счётчики ``Quote.likes``/``dislikes``/``watches`` — итоги за всё время,
+поэтому топ по ним почти не меняется. Для рейтинга текущей популярности:
+
+- реакции копятся в процессном буфере ``event_log`` и пишутся пачками
+  в журнал ``QuoteEvent`` (просмотры — при сбросе ``counters.watches_buffer``,
+  который уже пакетный, функцией ``write_events``);
+- ``rollup()`` сворачивает журнал в почасовые ``QuoteHourlyRollup``
+  (идемпотентно пересчитывает часы начиная с предпоследнего свёрнутого —
+  в него могли попасть поздно записанные пачки — но не раньше первого
+  сохранённого сырого события);
+- ``trending_scores()`` ранжирует цитаты по сумме очков за час
+  (``likes * 3 + watches * 0.1 - dislikes``, как в ``popularity_score``,
+  но без веса), умноженных на ``0.5 ** (возраст / период полураспада)``, —
+  одним ``GROUP BY`` по строкам свёртки за окно ``RANDOM_QUOTE_TRENDING_WINDOW_HOURS``;
+- ``compact()`` удаляет свёрнутые сырые события старше
+  ``RANDOM_QUOTE_EVENT_RETENTION_HOURS`` (целыми часами) и свёртки старше
+  ``RANDOM_QUOTE_ROLLUP_RETENTION_HOURS``, так что объём хранения ограничен.
+
+Свёртку и очистку выполняет ``manage.py rollup_events`` (по расписанию, например
+раз в 5 минут); рейтинг отражает события до последней свёртки.
+"""
+
+import atexit
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Max, Min, Sum, Value, When
+from django.db.models.functions import Power, TruncHour
+from django.utils import timezone
+
+from .models import Quote, QuoteEvent, QuoteHourlyRollup
+
+TRENDING_CACHE_KEY = "random_quote:trending"
+
+
+def event_log_enabled():
+    return getattr(settings, "RANDOM_QUOTE_EVENT_LOG", True)
+
+
+def half_life_hours():
+    """Период полураспада очков рейтинга «в тренде» в часах."""
+    return getattr(settings, "RANDOM_QUOTE_TRENDING_HALF_LIFE_HOURS", 24)
+
+
+def window_hours():
+    """Сколько последних часов свёртки учитывается в рейтинге."""
+    return getattr(settings, "RANDOM_QUOTE_TRENDING_WINDOW_HOURS", 168)
+
+
+def trending_size():
+    return getattr(settings, "RANDOM_QUOTE_TRENDING_SIZE", 10)
+
+
+def trending_cache_ttl():
+    return getattr(settings, "RANDOM_QUOTE_TRENDING_CACHE_TTL", 300)
+
+
+def event_retention_hours():
+    return getattr(settings, "RANDOM_QUOTE_EVENT_RETENTION_HOURS", 48)
+
+
+def rollup_retention_hours():
+    return getattr(settings, "RANDOM_QUOTE_ROLLUP_RETENTION_HOURS", 720)
+
+
+def hour_of(moment):
+    """Номер часа от начала эпохи Unix для ``datetime`` с часовым поясом."""
+    return int(moment.timestamp() // 3600)
+
+
+def hour_start(hour):
+    """Начало часа с номером ``hour`` (UTC)."""
+    return datetime.fromtimestamp(hour * 3600, tz=dt_timezone.utc)
+
+
+def write_events(kind, counts, now=None):
+    """
+    Записать пачку событий одного вида одним ``bulk_create``.
+
+    Args:
+        kind (int): ``QuoteEvent.LIKE``, ``DISLIKE`` или ``VIEW``.
+        counts (dict): ``{quote_id: количество}``.
+
+    Returns:
+        int: число записанных строк.
+    """
+    if not event_log_enabled():
+        return 0
+    now = now or timezone.now()
+    events = [QuoteEvent(quote_id=quote_id, kind=kind, count=count, created_at=now)
+              for quote_id, count in counts.items() if count]
+    QuoteEvent.objects.bulk_create(events, batch_size=500)
+    return len(events)
+
+
+class EventLog:
+    """
+    Буфер событий реакций перед записью в ``QuoteEvent``.
+
+    События агрегируются по ``(quote_id, kind)``. Сброс — как у
+    ``counters.ViewCounterBuffer``: по истечении
+    ``RANDOM_QUOTE_EVENTS_FLUSH_INTERVAL`` секунд, при переполнении
+    (``RANDOM_QUOTE_EVENTS_MAX_PENDING``), явным ``flush()`` и при
+    завершении процесса.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._flushed_at = time.monotonic()
+
+    @property
+    def interval(self):
+        return getattr(settings, "RANDOM_QUOTE_EVENTS_FLUSH_INTERVAL", 5)
+
+    @property
+    def max_pending(self):
+        return getattr(settings, "RANDOM_QUOTE_EVENTS_MAX_PENDING", 1000)
+
+    def record(self, quote_id, kind, count=1, autoflush=True):
+        """
+        Учесть ``count`` событий вида ``kind``; при необходимости сбросить буфер.
+
+        Returns:
+            bool: пора ли сбросить буфер (асинхронные views передают
+            ``autoflush=False`` и сбрасывают его фоновой задачей).
+        """
+        if not event_log_enabled() or not count:
+            return False
+        with self._lock:
+            key = (quote_id, kind)
+            self._pending[key] = self._pending.get(key, 0) + count
+            due = (
+                time.monotonic() - self._flushed_at >= self.interval
+                or len(self._pending) >= self.max_pending
+            )
+        if due and autoflush:
+            self.flush()
+        return due
+
+    def flush(self):
+        """
+        Записать накопленные события одним ``bulk_create``.
+
+        Returns:
+            int: число записанных строк.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return 0
+        now = timezone.now()
+        try:
+            QuoteEvent.objects.bulk_create([
+                QuoteEvent(quote_id=quote_id, kind=kind, count=count, created_at=now)
+                for (quote_id, kind), count in pending.items()
+            ], batch_size=500)
+        except Exception:
+            with self._lock:
+                for key, count in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + count
+            raise
+        return len(pending)
+
+
+event_log = EventLog()
+
+
+def _flush_on_exit():
+    try:
+        event_log.flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_on_exit)
+
+
+def _kind_sum(kind):
+    return Sum(Case(When(kind=kind, then=F("count")), default=Value(0)))
+
+
+def rollup(since_hour=None, batch_size=1000):
+    """
+    Свернуть журнал событий в почасовые строки ``QuoteHourlyRollup``.
+
+    Часы начиная с ``since_hour`` пересчитываются целиком из сырых событий
+    (строки свёртки заменяются в одной транзакции), поэтому повторный запуск
+    безопасен. По умолчанию пересчёт начинается с часа перед последним
+    свёрнутым: последний мог быть неполным, а в предыдущий могли попасть
+    пачки, записанные уже после свёртки (время события — начало сброса
+    буфера). При пустой свёртке пересчёт начинается с первого события.
+
+    ``since_hour`` не раньше часа первого сохранённого сырого события:
+    более ранние события удалены ``compact()``, и их свёртки пересчитать
+    не из чего — они остаются как есть.
+
+    Returns:
+        int: число записанных строк свёртки.
+    """
+    first = QuoteEvent.objects.aggregate(created_at=Min("created_at"))["created_at"]
+    if first is None:
+        return 0
+    earliest = hour_of(first)
+    if since_hour is None:
+        latest = QuoteHourlyRollup.objects.aggregate(hour=Max("hour"))["hour"]
+        since_hour = earliest if latest is None else latest - 1
+    since_hour = max(since_hour, earliest)
+
+    rows = (
+        QuoteEvent.objects.filter(created_at__gte=hour_start(since_hour))
+        .annotate(bucket=TruncHour("created_at", tzinfo=dt_timezone.utc))
+        .values("bucket", "quote_id")
+        .annotate(
+            likes=_kind_sum(QuoteEvent.LIKE),
+            dislikes=_kind_sum(QuoteEvent.DISLIKE),
+            watches=_kind_sum(QuoteEvent.VIEW),
+        )
+        .order_by()
+    )
+    written = 0
+    with transaction.atomic():
+        QuoteHourlyRollup.objects.filter(hour__gte=since_hour).delete()
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(QuoteHourlyRollup(
+                quote_id=row["quote_id"], hour=hour_of(row["bucket"]),
+                likes=row["likes"], dislikes=row["dislikes"], watches=row["watches"],
+            ))
+            if len(batch) >= batch_size:
+                QuoteHourlyRollup.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        QuoteHourlyRollup.objects.bulk_create(batch)
+        written += len(batch)
+    cache.delete(TRENDING_CACHE_KEY)
+    return written
+
+
+def compact(now=None, batch_size=5000):
+    """
+    Удалить устаревшие данные журнала.
+
+    Сырые события удаляются целыми часами, если они старше
+    ``RANDOM_QUOTE_EVENT_RETENTION_HOURS`` и не будут пересчитываться
+    (лежат до часа перед последним свёрнутым, см. ``rollup``): так час
+    первого сохранённого события всегда полон; строки
+    свёртки — если старше ``RANDOM_QUOTE_ROLLUP_RETENTION_HOURS``. События
+    удаляются пачками по ``batch_size``, чтобы не держать длинных блокировок.
+
+    Returns:
+        tuple[int, int]: удалено событий и строк свёртки.
+    """
+    now = now or timezone.now()
+    events_deleted = 0
+    latest = QuoteHourlyRollup.objects.aggregate(hour=Max("hour"))["hour"]
+    if latest is not None:
+        cutoff = hour_start(min(hour_of(now - timedelta(hours=event_retention_hours())), latest - 1))
+        while True:
+            ids = list(QuoteEvent.objects.filter(created_at__lt=cutoff).values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+            events_deleted += QuoteEvent.objects.filter(pk__in=ids).delete()[0]
+    rollups_deleted, _ = QuoteHourlyRollup.objects.filter(
+        hour__lt=hour_of(now) - rollup_retention_hours()
+    ).delete()
+    return events_deleted, rollups_deleted
+
+
+def trending_scores(limit=None, now=None):
+    """
+    Цитаты с наибольшим затухающим счётом по свёртке за окно.
+
+    Счёт — ``Σ (likes * 3 + watches * 0.1 - dislikes) * 0.5 ** (возраст_часа / полураспад)``
+    и считается в БД одним ``GROUP BY quote_id``.
+
+    Returns:
+        list[tuple[int, float]]: пары ``(quote_id, счёт)`` по убыванию счёта
+        (только с положительным счётом).
+    """
+    limit = limit or trending_size()
+    now_hour = hour_of(now or timezone.now())
+    points = F("likes") * Value(3.0) + F("watches") * Value(0.1) - F("dislikes") * Value(1.0)
+    decay = Power(Value(0.5), (Value(float(now_hour)) - F("hour")) / Value(float(half_life_hours())))
+    rows = (
+        QuoteHourlyRollup.objects.filter(hour__gt=now_hour - window_hours())
+        .values("quote_id")
+        .annotate(score=Sum(ExpressionWrapper(points * decay, output_field=FloatField())))
+        .filter(score__gt=0)
+        .order_by("-score", "quote_id")
+    )
+    return [(row["quote_id"], row["score"]) for row in rows[:limit]]
+
+
+def trending_quotes():
+    """
+    Рейтинг «в тренде»: список пар ``(Quote, счёт)``.
+
+    Результат ``trending_scores()`` кэшируется на ``RANDOM_QUOTE_TRENDING_CACHE_TTL``
+    секунд и сбрасывается после каждой свёртки; цитаты читаются одним запросом
+    по первичным ключам (удалённые пропускаются).
+    """
+    scores = cache.get(TRENDING_CACHE_KEY)
+    if scores is None:
+        scores = trending_scores()
+        cache.set(TRENDING_CACHE_KEY, scores, trending_cache_ttl())
+    quotes = Quote.objects.in_bulk([quote_id for quote_id, _ in scores])
+    return [(quotes[quote_id], score) for quote_id, score in scores if quote_id in quotes]
@@ -5,22 +5,48 @@ URLConf приложения цитат.
 - Главная: показ случайной цитаты (взвешенный рандом).
 - Создание цитаты (CBV).
 - Лайк/дизлайк по первичному ключу (ожидается POST; view делает редирект).
+- Пакетный приём реакций в JSON (POST).
 - Топ-10 по лайкам (ListView).
-- Дашборд со сводной статистикой.
+- Рейтинг «в тренде» по затухающему счёту недавних событий.
+- Полнотекстовый поиск цитат.
+- Дашборд со сводной статистикой (и счётчики его кэша).
+- Потоковая выгрузка цитат.
+- JSON API: случайные цитаты, топ, рейтинги по популярности/доле лайков и дашборд.
+- Метрики запросов для Prometheus.
 
 Имена маршрутов используются в reverse()/reverse_lazy и в шаблонах.
+При ``RANDOM_QUOTE_ASYNC_VIEWS = True`` случайная цитата, реакции, топ
+и дашборд обслуживаются асинхронными views из ``async_views``.
 """
 
+from django.conf import settings
 from django.urls import path
+from . import async_views
+from .api import dashboard_api, random_quotes_api, ranked_quotes_api, top_quotes_api
 from .views import (
     QuoteCreateView,
     random_quote_view,
     like_quote,
     dislike_quote,
+    reactions_batch,
     Top10ByLikesView,
-    dashboard_view
+    trending_quotes_view,
+    search_view,
+    dashboard_view,
+    dashboard_cache_view,
+    export_quotes_view,
+    metrics_view,
 )
 
+if getattr(settings, "RANDOM_QUOTE_ASYNC_VIEWS", False):
+    random_quote_view = async_views.random_quote_view
+    like_quote = async_views.like_quote
+    dislike_quote = async_views.dislike_quote
+    top_quotes_view = async_views.top_quotes_view
+    dashboard_view = async_views.dashboard_view
+else:
+    top_quotes_view = Top10ByLikesView.as_view()
+
 urlpatterns = [
     # Главная страница приложения: показ случайной цитаты с учётом "веса".
     # name="random_quote" используется для редиректов из форм/обработчиков.
@@ -38,9 +64,34 @@ urlpatterns = [
     # Аналогично обработчику лайка: POST + редирект на random_quote.
     path("quotes/<int:pk>/dislike/", dislike_quote, name="quote_dislike"),
 
+    # Пакетный приём реакций (JSON) для клиентов, копящих лайки/дизлайки офлайн.
+    path("quotes/reactions/", reactions_batch, name="quote_reactions"),
+
     # Список топ-10 цитат по лайкам (доп. сортировка по weight и watches).
-    path("quotes/top/", Top10ByLikesView.as_view(), name="quotes_top"),
+    path("quotes/top/", top_quotes_view, name="quotes_top"),
+
+    # Цитаты «в тренде»: недавние реакции и просмотры с экспоненциальным затуханием.
+    path("quotes/trending/", trending_quotes_view, name="quotes_trending"),
+
+    # Полнотекстовый поиск по тексту и источнику (?q=), с ранжированием.
+    path("quotes/search/", search_view, name="quotes_search"),
 
     # Дашборд со сводной статистикой и аналитикой по типам источников/лайкам/просмотрам.
-    path("quotes/dashboard/", dashboard_view, name="dashboard")
+    path("quotes/dashboard/", dashboard_view, name="dashboard"),
+
+    # Счётчики попаданий/промахов кэша дашборда (JSON, только для персонала).
+    path("quotes/dashboard/cache/", dashboard_cache_view, name="dashboard_cache"),
+
+    # Потоковая выгрузка цитат и метрик в CSV/JSONL (для персонала).
+    path("quotes/export/", export_quotes_view, name="quotes_export"),
+
+    # JSON API: случайные цитаты (?n= — несколько без повторов), топ,
+    # рейтинги (?by=popularity|like_ratio) и дашборд.
+    path("api/quotes/random/", random_quotes_api, name="api_quotes_random"),
+    path("api/quotes/top/", top_quotes_api, name="api_quotes_top"),
+    path("api/quotes/ranked/", ranked_quotes_api, name="api_quotes_ranked"),
+    path("api/dashboard/", dashboard_api, name="api_dashboard"),
+
+    # Метрики запросов (время, SQL, шаблоны, кэш) в текстовом формате Prometheus.
+    path("metrics/", metrics_view, name="metrics"),
 ]
\ No newline at end of file
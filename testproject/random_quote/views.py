@@ -3,21 +3,46 @@
 Содержит:
 - форму создания цитаты (CBV),
 - показ случайной цитаты с взвешенным выбором и учётом просмотров,
-- обработчики лайков/дизлайков,
+- обработчики лайков/дизлайков (по одному и пакетом в JSON),
 - топ-10 по лайкам,
-- дашборд со сводной статистикой и аналитикой по типам источников.
+- рейтинг «в тренде» по затухающему счёту недавних событий,
+- полнотекстовый поиск цитат,
+- дашборд со сводной статистикой и аналитикой по типам источников,
+- потоковую выгрузку цитат в CSV/JSONL,
+- метрики запросов в формате Prometheus.
 """
 
-import random
+import hmac
+import json
 
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import IntegrityError, transaction
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse,
+)
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse, reverse_lazy
 from django.views.generic import CreateView, ListView, DetailView
-from django.views.decorators.http import require_POST
-from django.db.models import F, Count, Sum, Avg, Case, When, Value, CharField
-from django.db.models.functions import Coalesce
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
 from .models import Quote
+from .caching import cached_page, fragment_cache_ttl
+from .counters import watches_buffer
+from .dashboard import cache_stats as dashboard_cache_stats, cache_ttl as dashboard_cache_ttl, get_dashboard_data
+from .db import replica_reads
+from .exporting import FORMATS, export_queryset, gzip_chunks, iter_export, parse_bound
 from .forms import QuoteForm
+from .instrumentation import render_prometheus
+from .leaderboard import leaderboard
+from .reactions import DISLIKE, LIKE, REACTIONS, apply_reaction, apply_reactions
+from .rotation import RecentlySeen
+from .sample_queue import low_water, sample_queue, sample_queue_enabled
+from .sampling import get_sampler
+from .search import search_quotes
+from .sharding import pending_reactions
+from .trending import half_life_hours, trending_quotes
 
 
 class QuoteCreateView(CreateView):
@@ -27,47 +52,91 @@ class QuoteCreateView(CreateView):
     Шаблон: ``quote_form.html``.
     Форма: ``QuoteForm``.
     После успешного сохранения — редирект на страницу случайной цитаты.
+    Если такую же цитату сохранили между проверкой формы и записью,
+    уникальное ограничение БД превращается в ошибку формы о дубликате.
     """
     template_name = "quote_form.html"
     form_class = QuoteForm
     success_url = reverse_lazy("random_quote")
 
+    def form_valid(self, form):
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            form.add_error(None, QuoteForm.DUPLICATE_ERROR)
+            return self.form_invalid(form)
+
 """
 Показ случайной цитаты с учётом веса.
 
 Алгоритм:
-1) Загружаем все цитаты.
-2) Если пусто — возвращаем шаблон без цитаты.
-3) Если суммарный вес > 0, используем взвешенный выбор по полю ``weight``.
-   Иначе — равновероятный выбор.
-4) Инкрементируем счётчик ``watches`` через F-выражение и обновляем объект.
+0) Если включена очередь заранее выбранных цитат (``RANDOM_QUOTE_SAMPLE_QUEUE``),
+   берём из неё готовую цитату вне окна недавно показанных — без выбора и
+   без запроса к БД; когда очередь опускается ниже
+   ``RANDOM_QUOTE_SAMPLE_QUEUE_LOW_WATER``, она пополняется в фоновом
+   потоке (см. ``sample_queue``). Если очередь пуста — шаги 1–3.
+1) Выбираем ``quote_id`` по весу стратегией из ``sampling.get_sampler()``:
+   процессный индекс (O(log n)) или префиксные суммы в БД — в зависимости
+   от ``RANDOM_QUOTE_SAMPLING``; всю таблицу не загружаем. При нулевом
+   суммарном весе выбор равновероятный. Недавно показанные посетителю
+   цитаты (окно ``rotation.RecentlySeen``) исключаются из выбора.
+2) Если цитат нет — возвращаем шаблон без цитаты.
+3) Загружаем одну выбранную цитату по первичному ключу.
+4) Учитываем просмотр в буфере ``counters.watches_buffer`` (пакетная запись
+   в БД раз в ``RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL`` секунд); показываем
+   значение из БД плюс ещё не записанные просмотры (включая текущий), а для горячей цитаты —
+   и ещё не перенесённые из шардов реакции (``sharding.pending_reactions``).
 Контекст шаблона:
-- ``quote``: выбранная цитата или ``None``.
+- ``quote``: выбранная цитата или ``None``;
+- ``fragment_cache_ttl``: время жизни кэша блока цитаты (ключ — ``quote_id`` + ``updated_at``).
     """
+@replica_reads
 def random_quote_view(request):
-    quotes = list(Quote.objects.all())
-    if not quotes:
-        return render(request, "random.html", {"quote": None})
+    sampler = get_sampler()
+    recent = RecentlySeen.load(request)
+    chosen = None
+    if sample_queue_enabled():
+        chosen, remaining = sample_queue.take(recent.ids)
+        if remaining < low_water():
+            sample_queue.refill_in_background()
+    for _ in range(2):
+        if chosen is not None:
+            break
+        quote_id = sampler.choose_excluding(recent.ids)
+        if quote_id is None:
+            break
+        chosen = Quote.objects.filter(pk=quote_id).first()
+        if chosen is not None:
+            break
+        # Цитата удалена другим процессом — индекс устарел.
+        sampler.invalidate()
 
-    weights = [max(0, q.weight) for q in quotes]
-    if sum(weights) > 0:
-        chosen = random.choices(quotes, weights=weights, k=1)[0]
-    else:
-        chosen = random.choice(quotes)
+    if chosen is None:
+        return render(request, "random.html", {"quote": None})
 
-    Quote.objects.filter(pk=chosen.pk).update(watches=F("watches") + 1)
-    chosen.refresh_from_db(fields=["watches"])
+    # Незаписанные просмотры читаются до ``increment``: он может сбросить буфер в БД,
+    # и тогда ``pending`` вернёт 0, хотя ``chosen`` прочитана до записи.
+    unflushed = watches_buffer.pending(chosen.pk)
+    watches_buffer.increment(chosen.pk)
+    chosen.watches += unflushed + 1
+    likes, dislikes = pending_reactions(chosen.pk)
+    chosen.likes += likes
+    chosen.dislikes += dislikes
 
-    return render(request, "random.html", {"quote": chosen})
+    response = render(request, "random.html", {"quote": chosen, "fragment_cache_ttl": fragment_cache_ttl()})
+    recent.push(chosen.pk)
+    recent.save(request, response)
+    return response
 
 
 """
 Обработчик лайка для цитаты (POST).
 
 Действия:
-    - Увеличивает ``likes`` на 1.
-    - Повышает ``weight`` (но не выше 100).
-    - Сохраняет только изменённые поля.
+    - Одним атомарным ``UPDATE`` увеличивает ``likes`` на 1
+      и повышает ``weight`` (но не выше 100).
+    - Возвращает 404, если цитата не найдена (ни одна строка не обновлена).
     - Редиректит на показ случайной цитаты.
 
 Args:
@@ -75,19 +144,17 @@ Args:
 """
 @require_POST
 def like_quote(request, pk: int):
-    quote = get_object_or_404(Quote, pk=pk)
-    quote.likes += 1
-    quote.weight = min(quote.weight + 1, 100)
-    quote.save(update_fields=['likes', 'weight'])
+    if not apply_reaction(pk, LIKE):
+        raise Http404("Цитата не найдена.")
     return redirect(random_quote_view)
 
 """
 Обработчик дизлайка для цитаты (POST).
 
 Действия:
-    - Увеличивает ``dislikes`` на 1.
-    - Понижает ``weight`` (но не ниже 0).
-    - Сохраняет только изменённые поля.
+    - Одним атомарным ``UPDATE`` увеличивает ``dislikes`` на 1
+      и понижает ``weight`` (но не ниже 0).
+    - Возвращает 404, если цитата не найдена (ни одна строка не обновлена).
     - Редиректит на показ случайной цитаты.
 
 Args:
@@ -95,35 +162,143 @@ Args:
 """
 @require_POST
 def dislike_quote(request, pk: int):
-    quote = get_object_or_404(Quote, pk=pk)
-    quote.dislikes += 1
-    quote.weight = max(quote.weight - 1, 0)
-    quote.save(update_fields=['dislikes', 'weight'])
+    if not apply_reaction(pk, DISLIKE):
+        raise Http404("Цитата не найдена.")
     return redirect(random_quote_view)
 
 
+def api_token_valid(request):
+    """Передан ли в ``Authorization: Bearer`` токен ``RANDOM_QUOTE_API_TOKEN`` (пустой токен не подходит)."""
+    token = getattr(settings, "RANDOM_QUOTE_API_TOKEN", "")
+    scheme, _, given = request.headers.get("Authorization", "").partition(" ")
+    return bool(token) and scheme.lower() == "bearer" and hmac.compare_digest(given.strip().encode(), token.encode())
+
+
+"""
+Пакетный приём реакций в JSON (POST).
+
+Для клиентов, копящих реакции офлайн. Тело запроса::
+
+    {"reactions": [{"quote_id": 1, "reaction": "like"},
+                   {"quote_id": 2, "reaction": "dislike"}]}
+
+Реакции агрегируются по цитате и применяются атомарными ``UPDATE``
+в одной транзакции (см. ``reactions.apply_reactions``). Размер пачки
+ограничен ``RANDOM_QUOTE_REACTIONS_BATCH_LIMIT``.
+
+Эндпоинт для JSON-клиентов, поэтому без проверки CSRF; вместо неё —
+токен ``RANDOM_QUOTE_API_TOKEN`` в заголовке ``Authorization: Bearer <токен>``.
+Без настроенного токена эндпоинт отключён.
+
+Ответ: ``{"applied": <число реакций>, "missing": [<quote_id без цитаты>]}``;
+при некорректном теле — 400 с ``{"error": ...}``, без токена или с неверным — 403.
+"""
+@csrf_exempt
+@require_POST
+def reactions_batch(request):
+    if not api_token_valid(request):
+        return JsonResponse({"error": "Нужен заголовок Authorization: Bearer <токен API>."}, status=403)
+    try:
+        payload = json.loads(request.body)
+        items = payload["reactions"]
+        reactions = [(int(item["quote_id"]), item["reaction"]) for item in items]
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({"error": "Ожидается JSON вида {\"reactions\": [{\"quote_id\": ..., \"reaction\": ...}]}."},
+                            status=400)
+
+    if any(reaction not in REACTIONS for _, reaction in reactions):
+        return JsonResponse({"error": "Допустимые реакции: like, dislike."}, status=400)
+    limit = getattr(settings, "RANDOM_QUOTE_REACTIONS_BATCH_LIMIT", 500)
+    if len(reactions) > limit:
+        return JsonResponse({"error": f"Не больше {limit} реакций за запрос."}, status=400)
+
+    applied, missing = apply_reactions(reactions)
+    return JsonResponse({"applied": applied, "missing": missing})
+
+
+@method_decorator(replica_reads, name="dispatch")
+@method_decorator(cached_page("top", params=("page",), variant=leaderboard.signature), name="dispatch")
 class Top10ByLikesView(ListView):
     """
-    Список топ-10 цитат по лайкам.
+    Список топ-N цитат по лайкам.
 
     Шаблон: ``top10.html``.
     Имя контекста: ``quotes``.
     Сортировка: по лайкам ↓, затем по весу ↓ и просмотрам ↓.
+    Данные берутся из процессного топа ``leaderboard.leaderboard`` (без запросов
+    к БД, если цитаты не менялись). Размер топа — ``RANDOM_QUOTE_LEADERBOARD_SIZE``,
+    размер страницы — ``RANDOM_QUOTE_LEADERBOARD_PAGE_SIZE``.
+    Страница кэшируется целиком до изменения цитат или состава и порядка топа
+    (см. ``caching.cached_page``); лайки в ней отстают не больше чем на
+    ``RANDOM_QUOTE_PAGE_CACHE_TTL`` секунд.
     """
-    model = Quote
     template_name = "top10.html"
     context_object_name = "quotes"
 
-    """Вернуть QuerySet из 10 самых «сильных» цитат по заданному порядку."""
+    def get_paginate_by(self, queryset):
+        return getattr(settings, "RANDOM_QUOTE_LEADERBOARD_PAGE_SIZE", 10)
+
+    """Вернуть список лучших цитат из процессного топа."""
     def get_queryset(self):
-        return Quote.objects.order_by("-likes", "-weight", "-watches")[:10]
+        return leaderboard.top()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["top_size"] = leaderboard.size
+        page = context.get("page_obj")
+        context["start_index"] = page.start_index() if page else 1
+        context["fragment_cache_ttl"] = fragment_cache_ttl()
+        return context
+
+
+"""
+Рейтинг цитат «в тренде».
+
+Ранжирование — по затухающему счёту реакций и просмотров из почасовой
+свёртки журнала событий (см. ``trending``); список кэшируется и обновляется
+после каждой свёртки (``manage.py rollup_events``).
+Контекст шаблона:
+- ``entries``: пары ``(quote, score)`` по убыванию счёта;
+- ``half_life``: период полураспада счёта в часах.
+"""
+@replica_reads
+@require_GET
+def trending_quotes_view(request):
+    return render(request, "trending.html", {
+        "entries": trending_quotes(),
+        "half_life": half_life_hours(),
+        "fragment_cache_ttl": fragment_cache_ttl(),
+    })
+
 
+"""
+Полнотекстовый поиск цитат (GET, параметр ``q``).
 
+Слова запроса ищутся по префиксу с учётом русских окончаний в тексте
+цитаты и источнике; результаты ранжируются по релевантности
+(см. ``search.search_quotes``), не больше ``RANDOM_QUOTE_SEARCH_LIMIT``.
+Контекст шаблона:
+- ``query``: строка запроса;
+- ``results``: найденные цитаты (с атрибутом ``search_rank``).
+"""
+@replica_reads
+@require_GET
+def search_view(request):
+    query = request.GET.get("q", "").strip()[:200]
+    return render(request, "search.html", {"query": query, "results": search_quotes(query) if query else []})
+
+
+@replica_reads
+@cached_page("dashboard", timeout=dashboard_cache_ttl)
 def dashboard_view(request):
     """
     Дашборд с общей статистикой и аналитикой.
 
-    Считает агрегаты по всем цитатам и формирует срезы:
+    Данные собирает слой ``dashboard.get_dashboard_data()`` — из материализованной
+    статистики ``QuoteStats`` или агрегатами по таблице (общая статистика одним
+    запросом) — и кэширует их на ``RANDOM_QUOTE_DASHBOARD_CACHE_TTL`` секунд;
+    отрендеренная страница кэшируется на тот же срок с поддержкой ETag/304.
+    Срезы:
         - ``stats``: суммарные просмотры/лайки/дизлайки, количество цитат и средний вес.
         - ``source_stats``: группировка по типу источника (с человекочитаемой меткой),
           количества цитат, лайков и просмотров (Coalesce -> 0 для None).
@@ -132,44 +307,69 @@ def dashboard_view(request):
 
     Рендерит шаблон ``dashboard.html`` с соответствующим контекстом.
     """
-    stats = {
-        'total_quotes': Quote.objects.count(),
-        'total_views': Quote.objects.aggregate(Sum('watches'))['watches__sum'] or 0,
-        'total_likes': Quote.objects.aggregate(Sum('likes'))['likes__sum'] or 0,
-        'total_dislikes': Quote.objects.aggregate(Sum('dislikes'))['dislikes__sum'] or 0,
-        'avg_weight': Quote.objects.aggregate(Avg('weight'))['weight__avg'] or 0,
-    }
-
-    source_stats = (
-        Quote.objects.values('source_type')
-        .annotate(
-            source_type_label=Case(
-                When(source_type=Quote.MOVIE, then=Value('Фильм')),
-                When(source_type=Quote.BOOK, then=Value('Книга')),
-                When(source_type=Quote.SERIES, then=Value('Сериал')),
-                When(source_type=Quote.PEOPLE, then=Value('Известный человек')),
-                default=Value('Неизвестно'),
-                output_field=CharField(),
-            ),
-            count=Count('quote_id'),
-            total_likes=Coalesce(Sum('likes'), 0),
-            total_views=Coalesce(Sum('watches'), 0),
+    return render(request, 'dashboard.html', get_dashboard_data())
+
+
+@staff_member_required
+def dashboard_cache_view(request):
+    """Счётчики попаданий/промахов кэша дашборда в JSON (только для персонала)."""
+    return JsonResponse(dashboard_cache_stats())
+
+
+@staff_member_required
+@require_GET
+def export_quotes_view(request):
+    """
+    Потоковая выгрузка цитат и метрик (только для персонала).
+
+    Параметры запроса:
+        - ``format``: ``csv`` (по умолчанию) или ``jsonl``;
+        - ``source_type``, ``created_from``, ``created_to``, ``min_likes`` — фильтры;
+        - ``gzip=1`` — отдать файл ``.gz``, сжатый «на лету».
+
+    Ответ — ``StreamingHttpResponse``: строки читаются из БД пачками,
+    поэтому память не зависит от размера таблицы.
+    """
+    fmt = request.GET.get("format", "csv")
+    source_type = request.GET.get("source_type") or None
+    try:
+        if fmt not in FORMATS:
+            raise ValueError(f"Неизвестный формат: {fmt}")
+        if source_type and source_type not in dict(Quote.SOURCE_CHOICES):
+            raise ValueError(f"Неизвестный тип источника: {source_type}")
+        min_likes = request.GET.get("min_likes")
+        queryset = export_queryset(
+            source_type=source_type,
+            created_from=parse_bound(request.GET.get("created_from")),
+            created_to=parse_bound(request.GET.get("created_to"), end=True),
+            min_likes=int(min_likes) if min_likes else None,
         )
-        .order_by('-count')
-    )
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
 
-    top_sources = Quote.objects.values('source').annotate(
-        count=Count('quote_id'),
-        total_likes=Sum('likes')
-    ).order_by('-total_likes')[:5]
+    chunks = iter_export(queryset, fmt)
+    filename = f"quotes.{fmt}"
+    content_type = "text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson; charset=utf-8"
+    if request.GET.get("gzip") == "1":
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        content_type = "application/gzip"
 
-    recent_quotes = Quote.objects.order_by('-created_at')[:5]
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
-    context = {
-        'stats': stats,
-        'source_stats': source_stats,
-        'top_sources': top_sources,
-        'recent_quotes': recent_quotes,
-    }
 
-    return render(request, 'dashboard.html', context)
\ No newline at end of file
+@require_GET
+def metrics_view(request):
+    """
+    Метрики запросов к views цитат в текстовом формате Prometheus.
+
+    Доступны с адресов из ``RANDOM_QUOTE_METRICS_ALLOWED_IPS`` и персоналу.
+    Метрики собирает ``instrumentation.InstrumentationMiddleware``; значения
+    накапливаются в каждом процессе отдельно.
+    """
+    allowed = getattr(settings, "RANDOM_QUOTE_METRICS_ALLOWED_IPS", ["127.0.0.1"])
+    if request.META.get("REMOTE_ADDR") not in allowed and not request.user.is_staff:
+        return HttpResponseForbidden("Доступ к метрикам запрещён.")
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
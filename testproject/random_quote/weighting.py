@@ -0,0 +1,190 @@
+"""Пакетный пересчёт весов цитат по реакциям.
+
+Лайк/дизлайк сдвигают ``weight`` на ±1, поэтому вес зависит от порядка
+кликов и «шумит». ``recompute_weights`` периодически выставляет вес заново
+по накопленным ``likes``/``dislikes``/``watches``:
+
+- цитаты читаются порциями по ``quote_id`` (keyset, без ``OFFSET``) только
+  нужными колонками и превращаются в массивы NumPy;
+- новые веса считаются векторно формулой из ``FORMULAS`` и ограничиваются
+  диапазоном 0..100;
+- изменившиеся веса записываются порциями: цитаты с одинаковым новым весом —
+  одним ``UPDATE ... WHERE quote_id IN (...)`` вместе с ``popularity_score``;
+  ``weight_sum`` материализованной статистики пересчитывается в конце
+  агрегатами (``stats.refresh_metric``);
+- после пересчёта сбрасываются индексы выбора по весу (процессный и,
+  в режиме ``"database"``, префиксные суммы), очередь заранее выбранных
+  цитат, топ и версия кэша страниц.
+
+NumPy нужен только здесь (``pip install numpy``).
+"""
+
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum, Value
+
+from .caching import bump_content_version
+from .leaderboard import leaderboard
+from .models import Quote, score_expressions
+from .sample_queue import sample_queue
+from .sampling import rebuild_weight_blocks, sampler, use_database_sampling
+from .stats import refresh_metric
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MIN_WEIGHT = 0
+MAX_WEIGHT = 100
+# Размер списка IN (...) в одном UPDATE (лимит переменных SQLite).
+UPDATE_BATCH = 500
+
+RecomputeResult = namedtuple("RecomputeResult", ["scanned", "changed", "prior", "histogram", "seconds"])
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("Для пересчёта весов нужен NumPy: pip install numpy")
+
+
+def weight_formula():
+    return getattr(settings, "RANDOM_QUOTE_WEIGHT_FORMULA", "bayesian")
+
+
+def prior_strength():
+    """Сила априорного распределения — сколько «виртуальных» реакций добавляется каждой цитате."""
+    return getattr(settings, "RANDOM_QUOTE_WEIGHT_PRIOR_STRENGTH", 10)
+
+
+def bayesian(likes, dislikes, watches, prior, strength):
+    """
+    Байесовская доля лайков: ``(likes + strength * prior) / (likes + dislikes + strength)``.
+
+    Цитата без реакций получает средний по всем цитатам вес ``100 * prior``;
+    с ростом числа реакций вес приближается к её собственной доле лайков.
+    """
+    return 100 * (likes + strength * prior) / (likes + dislikes + strength)
+
+
+def wilson(likes, dislikes, watches, prior, strength, z=1.96):
+    """
+    Нижняя граница доверительного интервала Уилсона для доли лайков (95%).
+
+    Осторожная оценка: мало реакций — низкий вес. Цитата без реакций
+    получает ``100 * prior``.
+    """
+    n = likes + dislikes
+    safe_n = np.maximum(n, 1)
+    p = likes / safe_n
+    z2 = z * z
+    lower = (p + z2 / (2 * safe_n) - z * np.sqrt(p * (1 - p) / safe_n + z2 / (4 * safe_n * safe_n))) / (1 + z2 / safe_n)
+    return np.where(n > 0, 100 * lower, 100 * prior)
+
+
+def engagement(likes, dislikes, watches, prior, strength):
+    """
+    Байесовская доля лайков, умноженная на вовлечённость.
+
+    Множитель — доля просмотров, на которые ответили реакцией, относительно
+    типичной (``strength`` просмотров на реакцию), в пределах 0.5..1:
+    часто оцениваемые цитаты сохраняют вес, редко — теряют до половины.
+    """
+    rate = (likes + dislikes) * strength / np.maximum(watches, 1)
+    return bayesian(likes, dislikes, watches, prior, strength) * (0.5 + 0.5 * np.minimum(rate, 1.0))
+
+
+FORMULAS = {
+    "bayesian": bayesian,
+    "wilson": wilson,
+    "engagement": engagement,
+}
+
+
+def global_prior():
+    """Средняя доля лайков по всем цитатам (0.5, если реакций ещё нет)."""
+    totals = Quote.objects.aggregate(likes=Sum("likes"), dislikes=Sum("dislikes"))
+    likes, dislikes = totals["likes"] or 0, totals["dislikes"] or 0
+    return likes / (likes + dislikes) if likes + dislikes else 0.5
+
+
+def iter_chunks(chunk_size):
+    """
+    Порции цитат в порядке ``quote_id`` массивами NumPy.
+
+    Yields:
+        numpy.ndarray: ``(n, 5)``, колонки — ``quote_id, likes, dislikes, watches, weight``.
+    """
+    last = None
+    while True:
+        rows = Quote.objects.order_by("pk")
+        if last is not None:
+            rows = rows.filter(pk__gt=last)
+        rows = list(rows.values_list("pk", "likes", "dislikes", "watches", "weight")[:chunk_size])
+        if not rows:
+            return
+        chunk = np.array(rows, dtype=np.int64)
+        last = int(chunk[-1, 0])
+        yield chunk
+
+
+def _write(ids, weights):
+    """Записать изменившиеся веса порции: один ``UPDATE`` на значение веса и пачку id."""
+    order = np.argsort(weights, kind="stable")
+    ids, weights = ids[order], weights[order]
+    values, starts = np.unique(weights, return_index=True)
+    bounds = list(starts[1:]) + [len(weights)]
+    with transaction.atomic():
+        for value, start, end in zip(values.tolist(), starts.tolist(), bounds):
+            for i in range(start, end, UPDATE_BATCH):
+                Quote.objects.filter(pk__in=ids[i:min(end, i + UPDATE_BATCH)].tolist()).update(
+                    weight=value,
+                    popularity_score=score_expressions(weight=Value(value))["popularity_score"],
+                )
+
+
+def recompute_weights(formula=None, strength=None, chunk_size=5000, dry_run=False):
+    """
+    Пересчитать веса всех цитат формулой ``formula`` (ключ ``FORMULAS``).
+
+    Args:
+        strength (float): сила априорного распределения (по умолчанию
+            ``RANDOM_QUOTE_WEIGHT_PRIOR_STRENGTH``).
+        chunk_size (int): цитат в одной порции чтения.
+        dry_run (bool): только посчитать, ничего не записывая.
+
+    Returns:
+        RecomputeResult: число просмотренных и изменённых цитат, априорная
+        доля лайков, гистограмма новых весов (101 значение) и время в секундах.
+    """
+    _require_numpy()
+    started = time.monotonic()
+    compute = FORMULAS[formula or weight_formula()]
+    strength = prior_strength() if strength is None else strength
+    prior = global_prior()
+    histogram = np.zeros(MAX_WEIGHT + 1, dtype=np.int64)
+    scanned = changed = 0
+
+    for chunk in iter_chunks(chunk_size):
+        ids, likes, dislikes, watches, old = chunk.T
+        raw = compute(likes.astype(float), dislikes.astype(float), watches.astype(float), prior, strength)
+        weights = np.clip(np.rint(raw), MIN_WEIGHT, MAX_WEIGHT).astype(np.int64)
+        histogram += np.bincount(weights, minlength=MAX_WEIGHT + 1)
+        mask = weights != old
+        scanned += len(ids)
+        changed += int(mask.sum())
+        if mask.any() and not dry_run:
+            _write(ids[mask], weights[mask])
+
+    if changed and not dry_run:
+        refresh_metric("weight")
+        sampler.invalidate()
+        if use_database_sampling():
+            rebuild_weight_blocks()
+        sample_queue.discard()
+        leaderboard.invalidate()
+        bump_content_version()
+    return RecomputeResult(scanned, changed, prior, histogram.tolist(), round(time.monotonic() - started, 3))
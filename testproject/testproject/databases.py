@@ -0,0 +1,93 @@
+"""
+Профили подключения к базе данных.
+
+Профиль выбирается переменной окружения ``RANDOM_QUOTE_DB_PROFILE``
+(см. ``settings.DATABASES``):
+
+- ``sqlite`` (по умолчанию) — файл ``db.sqlite3``; при подключении
+  применяются PRAGMA из ``RANDOM_QUOTE_SQLITE_PRAGMAS`` (``synchronous=NORMAL``,
+  ``busy_timeout``, ``mmap_size``), см. ``random_quote.db``; режим WAL
+  включается один раз командой ``manage.py sqlite_journal_mode wal``;
+- ``postgres`` — PostgreSQL (нужен пакет ``psycopg2``) с постоянными соединениями (``CONN_MAX_AGE``)
+  и проверкой их работоспособности (``CONN_HEALTH_CHECKS``). Параметры
+  берутся из переменных ``POSTGRES_*``. При работе через пулер соединений
+  в режиме транзакций (PgBouncer) задайте ``POSTGRES_POOLER=1``: соединения
+  не удерживаются процессом, серверные курсоры отключаются. Реплики для
+  чтения перечисляются в ``POSTGRES_REPLICA_HOSTS`` и получают псевдонимы
+  ``replica1``, ``replica2``, …; маршрутизацию выполняет
+  ``random_quote.db.ReadReplicaRouter``.
+"""
+
+import os
+import tempfile
+
+PROFILES = ("sqlite", "postgres")
+
+
+def sqlite_database(name):
+    """
+    Настройки SQLite (PRAGMA применяются при подключении, см. ``random_quote.db``).
+
+    Тестовая БД — файл во временном каталоге, а не база в памяти: тесты
+    конкурентной записи работают из нескольких потоков со своими соединениями.
+    """
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'TEST': {'NAME': os.path.join(tempfile.gettempdir(), f'test_{os.path.basename(name)}')},
+    }
+
+
+def postgres_database(environ, host=None):
+    """
+    Настройки PostgreSQL из переменных окружения ``POSTGRES_*``.
+
+    Args:
+        environ: отображение переменных окружения.
+        host (str | None): хост вместо ``POSTGRES_HOST`` (для реплик).
+    """
+    pooled = environ.get('POSTGRES_POOLER') == '1'
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': environ.get('POSTGRES_DB', 'random_quote'),
+        'USER': environ.get('POSTGRES_USER', 'random_quote'),
+        'PASSWORD': environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': host or environ.get('POSTGRES_HOST', '127.0.0.1'),
+        'PORT': environ.get('POSTGRES_PORT', '5432'),
+        # За пулером соединение возвращается ему после каждого запроса.
+        'CONN_MAX_AGE': 0 if pooled else int(environ.get('POSTGRES_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': not pooled,
+        # Серверные курсоры (.iterator()) несовместимы с пулом в режиме транзакций.
+        'DISABLE_SERVER_SIDE_CURSORS': pooled,
+        'OPTIONS': {'connect_timeout': int(environ.get('POSTGRES_CONNECT_TIMEOUT', 5))},
+    }
+
+
+def database_settings(profile, base_dir, environ):
+    """
+    Собрать ``DATABASES`` для профиля.
+
+    Returns:
+        dict: псевдоним → настройки подключения (``default`` и, для
+        ``postgres``, реплики ``replicaN``).
+
+    Raises:
+        ValueError: неизвестный профиль.
+    """
+    if profile == 'sqlite':
+        return {'default': sqlite_database(environ.get('SQLITE_PATH', base_dir / 'db.sqlite3'))}
+    if profile != 'postgres':
+        raise ValueError(f"Неизвестный профиль БД: {profile} (допустимо: {', '.join(PROFILES)})")
+
+    databases = {'default': postgres_database(environ)}
+    hosts = [host.strip() for host in environ.get('POSTGRES_REPLICA_HOSTS', '').split(',') if host.strip()]
+    for number, host in enumerate(hosts, start=1):
+        replica = postgres_database(environ, host=host)
+        replica['TEST'] = {'MIRROR': 'default'}
+        databases[f'replica{number}'] = replica
+    return databases
+
+
+def replica_aliases(databases):
+    """Псевдонимы реплик для чтения из ``DATABASES``."""
+    return [alias for alias in databases if alias != 'default']
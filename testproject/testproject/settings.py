@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .databases import database_settings, replica_aliases
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'random_quote.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,10 +81,36 @@ WSGI_APPLICATION = 'testproject.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
+# Профиль БД: "sqlite" (по умолчанию) или "postgres" — см. testproject/databases.py.
+RANDOM_QUOTE_DB_PROFILE = os.environ.get('RANDOM_QUOTE_DB_PROFILE', 'sqlite')
+
+DATABASES = database_settings(RANDOM_QUOTE_DB_PROFILE, BASE_DIR, os.environ)
+
+# Чтение моделей цитат на страницах просмотра (views с random_quote.db.replica_reads) —
+# с реплик (если они есть); остальные чтения и запись — в основную БД.
+RANDOM_QUOTE_READ_REPLICAS = replica_aliases(DATABASES)
+DATABASE_ROUTERS = ['random_quote.db.ReadReplicaRouter']
+
+# PRAGMA, применяемые к каждому соединению SQLite: synchronous=NORMAL (без fsync
+# на каждую транзакцию в режиме WAL), ожидание блокировки записи (мс),
+# отображение файла в память (байт) и временные таблицы в памяти.
+# Режим журнала хранится в файле БД и включается один раз:
+# `manage.py sqlite_journal_mode wal` (чтение не блокируется записью).
+RANDOM_QUOTE_SQLITE_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'random-quote',
     }
 }
 
@@ -127,3 +157,157 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Random quote app
+# Время жизни (в секундах) процессного индекса весов для выбора случайной цитаты.
+# Изменения из текущего процесса применяются сразу, а по истечении TTL индекс
+# перечитывается из БД, чтобы подхватить изменения из других процессов.
+
+RANDOM_QUOTE_SAMPLER_TTL = 60
+
+# Стратегия выбора случайной цитаты:
+#   "memory"   — процессный индекс весов (по умолчанию);
+#   "database" — префиксные суммы весов в БД, без состояния в процессе
+#                (для многопроцессных развёртываний). При включении на
+#                существующих данных выполните `manage.py rebuild_weight_index`.
+RANDOM_QUOTE_SAMPLING = "memory"
+
+# Количество идентификаторов цитат в одном блоке префиксных сумм (режим "database").
+# Изменение веса пересчитывает не более стольких строк своего блока.
+RANDOM_QUOTE_WEIGHT_BLOCK_SIZE = 1000
+
+# Период (в секундах) пакетной записи счётчика просмотров в БД.
+# 0 — записывать каждый просмотр сразу. Незаписанные просмотры
+# сбрасываются также при завершении процесса.
+RANDOM_QUOTE_WATCHES_FLUSH_INTERVAL = 5
+
+# Принудительный сброс буфера просмотров, если в нём накопилось столько цитат.
+RANDOM_QUOTE_WATCHES_MAX_PENDING = 1000
+
+# Максимальное число реакций в одном запросе пакетного эндпоинта quotes/reactions/.
+RANDOM_QUOTE_REACTIONS_BATCH_LIMIT = 500
+
+# Токен клиентов JSON API для пакетного эндпоинта (заголовок
+# `Authorization: Bearer <токен>`); пустой — эндпоинт отключён.
+RANDOM_QUOTE_API_TOKEN = os.environ.get('RANDOM_QUOTE_API_TOKEN', '')
+
+# Вести материализованную статистику QuoteStats для дашборда (инкрементально
+# при создании цитат, реакциях и сбросе просмотров). Проверка и перестройка —
+# `manage.py rebuild_quote_stats [--check]`.
+RANDOM_QUOTE_MATERIALIZED_STATS = True
+
+# Период (в секундах) пакетной записи приращений статистики от реакций:
+# строки QuoteStats (особенно общая строка) не обновляются в транзакции
+# каждой реакции. 0 — записывать сразу после реакции. Принудительный сброс,
+# если в буфере накопилось столько строк статистики.
+RANDOM_QUOTE_STATS_FLUSH_INTERVAL = 5
+RANDOM_QUOTE_STATS_MAX_PENDING = 1000
+
+# Кэш данных дашборда: сколько секунд значение свежее, и сколько ещё секунд
+# после этого его можно отдавать, пока один запрос пересчитывает данные.
+RANDOM_QUOTE_DASHBOARD_CACHE_TTL = 10
+RANDOM_QUOTE_DASHBOARD_STALE_TTL = 60
+
+# Пока пустой кэш дашборда заполняет один запрос, остальные ждут его
+# результата не дольше стольких секунд (затем считают сами).
+RANDOM_QUOTE_DASHBOARD_COLD_WAIT = 5
+
+# Топ цитат: сколько записей показывать, сколько хранить сверх этого
+# (запас на дизлайки без перечитывания), размер страницы и период
+# полного перечитывания из БД (в секундах).
+RANDOM_QUOTE_LEADERBOARD_SIZE = 10
+RANDOM_QUOTE_LEADERBOARD_SLACK = 10
+RANDOM_QUOTE_LEADERBOARD_PAGE_SIZE = 10
+RANDOM_QUOTE_LEADERBOARD_TTL = 60
+
+# Кэш страниц: время жизни страницы топа и блоков отдельных цитат (в секундах).
+# Страницы инвалидируются сразу при изменении цитат, страница топа — и при
+# изменении его состава или порядка; лайки в ней отстают не больше чем на TTL.
+RANDOM_QUOTE_PAGE_CACHE_TTL = 60
+RANDOM_QUOTE_FRAGMENT_CACHE_TTL = 300
+
+# JSON API: max-age ответа топа (в секундах) и максимум цитат в ?n= случайной выборки.
+RANDOM_QUOTE_API_MAX_AGE = 30
+RANDOM_QUOTE_API_MAX_N = 50
+
+# Обслуживать случайную цитату, реакции, топ и дашборд асинхронными views
+# (random_quote/async_views.py). Включайте при запуске через ASGI-сервер:
+#   uvicorn testproject.asgi:application
+# Сравнение пропускной способности — `manage.py loadtest`.
+RANDOM_QUOTE_ASYNC_VIEWS = False
+
+# Инструментация запросов к views цитат: время запроса, число и время SQL,
+# рендеринг шаблонов, обращения к кэшам. Заголовок Server-Timing в ответах,
+# метрики Prometheus на /metrics/ (с перечисленных адресов или для персонала)
+# и журнал медленных запросов со списком SQL (порог в мс; None — выключен).
+RANDOM_QUOTE_INSTRUMENTATION = True
+RANDOM_QUOTE_SERVER_TIMING = True
+RANDOM_QUOTE_METRICS_ALLOWED_IPS = ['127.0.0.1']
+RANDOM_QUOTE_SLOW_REQUEST_MS = 500
+
+# Ротация без повторов: сколько последних показанных посетителю цитат не
+# выбирать снова (0 — выключено) и где хранить это окно: "cache" — в кэше по
+# cookie сессии или посетителя (без записи сессии на каждый показ), "session" —
+# в сессии вошедших пользователей (анонимные посетители всё равно в кэше), и
+# сколько секунд окно живёт в кэше после последнего показа.
+RANDOM_QUOTE_RECENT_WINDOW = 5
+RANDOM_QUOTE_RECENT_STORAGE = 'cache'
+RANDOM_QUOTE_RECENT_TTL = 30 * 60
+
+# Журнал событий (реакции и просмотры) для рейтинга «в тренде»: период и
+# порог пакетной записи реакций, период полураспада счёта и окно (в часах),
+# размер рейтинга и время его кэширования (в секундах), сколько часов хранить
+# сырые события и почасовую свёртку. Свёртка и очистка — `manage.py rollup_events`
+# по расписанию.
+RANDOM_QUOTE_EVENT_LOG = True
+RANDOM_QUOTE_EVENTS_FLUSH_INTERVAL = 5
+RANDOM_QUOTE_EVENTS_MAX_PENDING = 1000
+RANDOM_QUOTE_TRENDING_HALF_LIFE_HOURS = 24
+RANDOM_QUOTE_TRENDING_WINDOW_HOURS = 168
+RANDOM_QUOTE_TRENDING_SIZE = 10
+RANDOM_QUOTE_TRENDING_CACHE_TTL = 300
+RANDOM_QUOTE_EVENT_RETENTION_HOURS = 48
+RANDOM_QUOTE_ROLLUP_RETENTION_HOURS = 720
+
+# Полнотекстовый поиск (quotes/search/ и поиск в админке): максимум результатов.
+# Индекс — FTS5 в SQLite, GIN по tsvector в PostgreSQL; перестройка —
+# `manage.py rebuild_search_index`.
+RANDOM_QUOTE_SEARCH_LIMIT = 20
+
+# Список цитат в админке: до скольких записей выборка с фильтрами считается
+# точно (дальше — оценка), и время жизни (в секундах) кэша вариантов фильтра по весу.
+RANDOM_QUOTE_ADMIN_EXACT_COUNT_LIMIT = 10000
+RANDOM_QUOTE_ADMIN_FILTER_CACHE_TTL = 300
+
+# Пересчёт весов по реакциям (`manage.py recompute_weights`, по расписанию):
+# формула ("bayesian", "wilson" или "engagement") и сила априорного
+# распределения — сколько «виртуальных» реакций со средней долей лайков
+# добавляется каждой цитате.
+RANDOM_QUOTE_WEIGHT_FORMULA = "bayesian"
+RANDOM_QUOTE_WEIGHT_PRIOR_STRENGTH = 10
+
+# Очередь заранее выбранных случайных цитат в кэше для главной страницы:
+# до скольких элементов пополнять, при скольких оставшихся запускать фоновое
+# пополнение, время жизни элемента (в секундах), доля суммарного веса, после
+# изменения на которую реакциями очередь сбрасывается, и наименьшее такое
+# изменение (чтобы на маленькой таблице очередь не сбрасывалась каждой
+# реакцией). Прогрев — `manage.py fill_sample_queue`.
+RANDOM_QUOTE_SAMPLE_QUEUE = True
+RANDOM_QUOTE_SAMPLE_QUEUE_SIZE = 1000
+RANDOM_QUOTE_SAMPLE_QUEUE_LOW_WATER = 200
+RANDOM_QUOTE_SAMPLE_QUEUE_TTL = 60
+RANDOM_QUOTE_SAMPLE_QUEUE_DRIFT = 0.01
+RANDOM_QUOTE_SAMPLE_QUEUE_MIN_DRIFT = 20
+
+# Шардированные счётчики реакций «горячих» цитат: число шардов (0 — выключено,
+# None — 8, а для SQLite выключено: там запись всё равно блокирует всю базу),
+# сколько реакций за окно (в секундах) в одном процессе делают цитату горячей,
+# сколько секунд она остаётся горячей после последнего превышения порога и
+# период фонового переноса шардов в цитаты после реакций. Остаток после спада
+# переносит `manage.py fold_reaction_shards` по расписанию.
+RANDOM_QUOTE_REACTION_SHARDS = None
+RANDOM_QUOTE_HOT_REACTIONS = 30
+RANDOM_QUOTE_HOT_WINDOW = 10
+RANDOM_QUOTE_HOT_TTL = 300
+RANDOM_QUOTE_SHARD_FOLD_INTERVAL = 5